@@ -0,0 +1,95 @@
+"""Benchmark building the metric families as the flow run window grows.
+
+Times PrefectMetrics._build_metrics() on synthetic resources with a fixed
+number of deployments and flows and an increasing number of flow runs, and
+prints the CPU time per run. A flat per-run cost means the scrape stays
+linear in run count.
+
+Usage:
+    python benchmarks/build_metrics.py [--deployments 2000] [--runs 1000,10000,50000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics.metrics import PrefectMetrics  # noqa: E402
+
+
+def build_resources(num_deployments: int, num_runs: int) -> dict:
+    flows = [{"id": f"flow-{i}", "name": f"flow-{i}"} for i in range(num_deployments)]
+    deployments = [
+        {"id": f"dep-{i}", "name": f"dep-{i}", "flow_id": f"flow-{i}", "tags": []}
+        for i in range(num_deployments)
+    ]
+    flow_runs = [
+        {
+            "id": f"run-{i}",
+            "deployment_id": f"dep-{i % num_deployments}",
+            "flow_id": f"flow-{i % num_deployments}",
+            "state_name": "Completed",
+            "work_queue_name": "default",
+            "start_time": "2026-06-01T10:00:00+00:00",
+            "total_run_time": 1.0,
+        }
+        for i in range(num_runs)
+    ]
+    return {
+        "deployments": deployments,
+        "flows": flows,
+        "flow_runs": flow_runs,
+        "all_flow_runs": flow_runs,
+        "ongoing_flow_runs": flow_runs[: num_runs // 10],
+        "failed_flow_runs": {},
+        "work_pools": [],
+        "work_queues": [],
+    }
+
+
+def make_metrics() -> PrefectMetrics:
+    return PrefectMetrics(
+        url="http://prefect.invalid/api",
+        headers={},
+        offset_minutes=5,
+        failed_runs_offset_minutes=0,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="benchmark",
+        csrf_enabled=False,
+        logger=logging.getLogger("benchmark"),
+        enable_pagination=False,
+        pagination_limit=200,
+    )
+
+
+def time_build(metrics: PrefectMetrics, resources: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        for _family in metrics._build_metrics(resources):
+            pass
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--deployments", type=int, default=2000)
+    parser.add_argument("--runs", default="1000,10000,50000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    metrics = make_metrics()
+    print(f"{'runs':>8} {'cpu_seconds':>12} {'us_per_run':>11}")
+    for num_runs in (int(n) for n in args.runs.split(",")):
+        resources = build_resources(args.deployments, num_runs)
+        seconds = time_build(metrics, resources, args.repeat)
+        print(f"{num_runs:>8} {seconds:>12.3f} {seconds / num_runs * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
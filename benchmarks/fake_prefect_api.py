@@ -0,0 +1,368 @@
+"""A local stand-in for the Prefect REST API, seeded with synthetic resources.
+
+Serves the endpoints the exporter calls, with the filters, sorts and
+pagination it uses, plus an injected per-request latency:
+
+    POST /api/{deployments,flows,flow_runs,work_pools,work_queues}/filter
+    POST /api/{deployments,flows,flow_runs,work_pools}/count
+    GET  /api/work_queues/{id}/status
+    GET  /api/csrf-token?client=...
+
+GET /_stats returns the number of requests served per endpoint.
+
+Usage:
+    python benchmarks/fake_prefect_api.py [--port 4200] [--runs 100000] [--latency-ms 20]
+"""
+
+import argparse
+import bisect
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+TIMESTAMP_FMT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+# (state type, state name, share of runs)
+RUN_STATES = (
+    ("COMPLETED", "Completed", 0.80),
+    ("FAILED", "Failed", 0.05),
+    ("RUNNING", "Running", 0.10),
+    ("SCHEDULED", "Scheduled", 0.05),
+)
+
+
+def build_resources(
+    num_deployments: int,
+    num_runs: int,
+    num_work_pools: int,
+    num_work_queues: int,
+    window_minutes: int = 5,
+    seed: int = 0,
+) -> dict:
+    """
+    Build synthetic Prefect resources.
+
+    Flow runs are spread over the last ``window_minutes`` so they fall in the
+    exporter's lookup window when it uses the same OFFSET_MINUTES.
+
+    Args:
+        num_deployments (int): Deployments, each with its own flow.
+        num_runs (int): Flow runs, spread across the deployments.
+        num_work_pools (int): Work pools.
+        num_work_queues (int): Work queues, spread across the work pools.
+        window_minutes (int, optional): Minutes the run start times span. Default is 5.
+        seed (int, optional): Random seed. Default is 0.
+
+    Returns:
+        dict: Mapping of resource name -> list of JSON items.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    work_pools = [
+        {
+            "id": f"pool-{i}",
+            "name": f"pool-{i}",
+            "type": "process",
+            "is_paused": False,
+            "status": "READY",
+        }
+        for i in range(max(1, num_work_pools))
+    ]
+    work_queues = [
+        {
+            "id": f"queue-{i}",
+            "name": f"queue-{i}",
+            "priority": 1,
+            "type": None,
+            "is_paused": False,
+            "status": "READY",
+            "work_pool_name": work_pools[i % len(work_pools)]["name"],
+        }
+        for i in range(num_work_queues)
+    ]
+    flows = [{"id": f"flow-{i}", "name": f"flow-{i}"} for i in range(num_deployments)]
+    deployments = [
+        {
+            "id": f"dep-{i}",
+            "name": f"dep-{i}",
+            "flow_id": f"flow-{i}",
+            "path": ".",
+            "paused": False,
+            "status": "READY",
+            "tags": [],
+            "work_pool_name": work_pools[i % len(work_pools)]["name"],
+            "work_queue_name": "default",
+        }
+        for i in range(num_deployments)
+    ]
+
+    states = [state[:2] for state in RUN_STATES]
+    weights = [state[2] for state in RUN_STATES]
+    flow_runs = []
+    for i in range(num_runs):
+        state_type, state_name = rng.choices(states, weights)[0]
+        expected = now - timedelta(seconds=rng.uniform(0, window_minutes * 60))
+        started = ended = None
+        if state_type != "SCHEDULED":
+            started = expected + timedelta(seconds=rng.uniform(0, 5))
+        if state_type in ("COMPLETED", "FAILED"):
+            ended = started + timedelta(seconds=rng.uniform(1, 60))
+        deployment = i % num_deployments if num_deployments else None
+        flow_runs.append(
+            {
+                "id": f"run-{i}",
+                "name": f"run-{i}",
+                "flow_id": None if deployment is None else f"flow-{deployment}",
+                "deployment_id": None if deployment is None else f"dep-{deployment}",
+                "work_queue_name": "default",
+                "state_type": state_type,
+                "state_name": state_name,
+                "state": {"type": state_type, "name": state_name},
+                "expected_start_time": expected.strftime(TIMESTAMP_FMT),
+                "start_time": started and started.strftime(TIMESTAMP_FMT),
+                "end_time": ended and ended.strftime(TIMESTAMP_FMT),
+                "total_run_time": (ended - started).total_seconds() if ended else 0.0,
+            }
+        )
+
+    return {
+        "deployments": deployments,
+        "flows": flows,
+        "flow_runs": flow_runs,
+        "work_pools": work_pools,
+        "work_queues": work_queues,
+    }
+
+
+def _matches(item: dict, filters: dict) -> bool:
+    """Apply the subset of Prefect's filter operators the exporter sends."""
+    for field, condition in filters.items():
+        if field == "operator":
+            continue
+        if field == "state":
+            value = item.get("state_type")
+            condition = condition.get("type", {})
+        else:
+            value = item.get(field)
+        checks = []
+        if "any_" in condition:
+            checks.append(value in condition["any_"])
+        if "not_any_" in condition:
+            checks.append(value not in condition["not_any_"])
+        if "is_null_" in condition:
+            checks.append((value is None) == condition["is_null_"])
+        if "after_" in condition:
+            checks.append(value is not None and value >= condition["after_"])
+        combine = any if condition.get("operator") == "or_" else all
+        if checks and not combine(checks):
+            return False
+    return True
+
+
+def _compile(filters: dict) -> dict:
+    """Turn the id lists of ``filters`` into sets, for sharded queries listing many ids."""
+    compiled = {}
+    for field, condition in filters.items():
+        if isinstance(condition, dict):
+            condition = {
+                operator: set(value) if isinstance(value, list) else value
+                for operator, value in condition.items()
+            }
+        compiled[field] = condition
+    return compiled
+
+
+class FakePrefectApi:
+    """
+    FakePrefectApi class answering the exporter's queries from in-memory resources.
+
+    A filter's full result is computed once and cached by its body, so
+    paging through it costs a slice per page, like an indexed database.
+    Keyset pages bisect the cached result sorted by the seek field.
+    """
+
+    SORTS = {
+        "EXPECTED_START_TIME_ASC": ("expected_start_time", False),
+        "START_TIME_DESC": ("start_time", True),
+    }
+
+    def __init__(self, resources: dict, latency: float = 0.0) -> None:
+        """
+        Initialize the FakePrefectApi instance.
+
+        Args:
+            resources (dict): Mapping of resource name -> list of JSON items.
+            latency (float, optional): Seconds added to every request. Default is 0.
+        """
+        self.resources = resources
+        self.latency = latency
+        self.requests = Counter()
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def filter(self, resource: str, body: dict) -> list:
+        filters = dict(body.get(resource, {}))
+        sort = body.get("sort")
+        seek = None
+        if sort == "EXPECTED_START_TIME_ASC" and "expected_start_time" in filters:
+            seek = filters.pop("expected_start_time")
+        exclude = set()
+        if "id" in filters:
+            exclude = set(filters.pop("id").get("not_any_", ()))
+
+        results = self._filtered(resource, filters, sort)
+        start = body.get("offset", 0)
+        if seek is not None:
+            keys = self._results[self._key(resource, filters, sort)][1]
+            start = bisect.bisect_left(keys, seek.get("after_", ""))
+        limit = body.get("limit", len(results))
+
+        page = []
+        for item in results[start:]:
+            if len(page) >= limit:
+                break
+            if item.get("id") not in exclude:
+                page.append(item)
+        return page
+
+    def count(self, resource: str, body: dict) -> int:
+        return len(self._filtered(resource, body.get(resource, {}), None))
+
+    def _key(self, resource, filters, sort):
+        return json.dumps([resource, filters, sort], sort_keys=True)
+
+    def _filtered(self, resource: str, filters: dict, sort) -> list:
+        key = self._key(resource, filters, sort)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is None:
+                compiled = _compile(filters)
+                items = [
+                    item
+                    for item in self.resources[resource]
+                    if _matches(item, compiled)
+                ]
+                field, descending = self.SORTS.get(sort, (None, False))
+                if field is not None:
+                    items.sort(
+                        key=lambda item: item.get(field) or "", reverse=descending
+                    )
+                cached = self._results[key] = (
+                    items,
+                    [item.get(field) or "" for item in items] if field else [],
+                )
+        return cached[0]
+
+    def handle(self, method: str, path: str, query: str, body: dict):
+        """
+        Answer one request.
+
+        Returns:
+            tuple: (HTTP status, JSON-serializable response).
+        """
+        time.sleep(self.latency)
+        parts = path.strip("/").split("/")
+        if parts[:1] == ["api"]:
+            parts = parts[1:]
+
+        if method == "GET" and parts == ["_stats"]:
+            return 200, dict(self.requests)
+        if method == "GET" and parts == ["csrf-token"]:
+            self.requests["csrf-token"] += 1
+            client = query.partition("client=")[2]
+            expiration = datetime.now(timezone.utc) + timedelta(hours=1)
+            return 200, {
+                "token": "benchmark-token",
+                "client": client,
+                "expiration": expiration.isoformat(),
+            }
+        if method == "GET" and len(parts) == 3 and parts[0] == "work_queues":
+            self.requests["work_queues/status"] += 1
+            return 200, {
+                "healthy": True,
+                "late_runs_count": 0,
+                "health_check_policy": {"maximum_late_runs": 0},
+            }
+        if method == "POST" and len(parts) == 2 and parts[0] in self.resources:
+            self.requests[f"{parts[0]}/{parts[1]}"] += 1
+            if parts[1] == "filter":
+                return 200, self.filter(parts[0], body)
+            if parts[1] == "count":
+                return 200, self.count(parts[0], body)
+        return 404, {"detail": "Not Found"}
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+        """
+        Build an HTTP server for the API. Call serve_forever() to start it.
+
+        Args:
+            host (str, optional): Address to bind. Default is "127.0.0.1".
+            port (int, optional): Port to bind, 0 picks a free one. Default is 0.
+
+        Returns:
+            ThreadingHTTPServer: The server; ``server_address`` holds the bound port.
+        """
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                url = urlsplit(self.path)
+                status, payload = api.handle(method, url.path, url.query, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4200)
+    parser.add_argument("--deployments", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=100000)
+    parser.add_argument("--work-pools", type=int, default=10)
+    parser.add_argument("--work-queues", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--window-minutes", type=int, default=5)
+    args = parser.parse_args()
+
+    resources = build_resources(
+        args.deployments,
+        args.runs,
+        args.work_pools,
+        args.work_queues,
+        args.window_minutes,
+    )
+    server = FakePrefectApi(resources, args.latency_ms / 1000).serve(
+        args.host, args.port
+    )
+    print(f"Serving the fake Prefect API on http://{args.host}:{args.port}/api")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
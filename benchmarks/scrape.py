@@ -0,0 +1,212 @@
+"""End-to-end scrape benchmark against a local fake Prefect API.
+
+Starts benchmarks/fake_prefect_api.py in a child process, seeded with
+synthetic deployments, flow runs and work queues and an injected per-request
+latency, then runs PrefectMetrics.collect() several times and measures
+scrape latency, API requests per scrape, CPU time and peak RSS of the
+exporter process. Results are printed as JSON so releases can be compared,
+e.g. by diffing the output of two checkouts run with the same arguments.
+
+With --shards N, each shard's exporter runs in its own process, one after
+another, and is measured separately.
+
+Usage:
+    python benchmarks/scrape.py [--deployments 1000] [--runs 100000] [--work-queues 500]
+        [--latency-ms 20] [--scrapes 3] [--engine requests] [--shards 1] [--output results.json]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_prefect_api import FakePrefectApi, build_resources  # noqa: E402
+from metrics.async_engine import AsyncPrefectMetrics  # noqa: E402
+from metrics.metrics import PrefectMetrics  # noqa: E402
+from metrics.session import ConnectionStats, build_session  # noqa: E402
+from metrics.sharding import Shard  # noqa: E402
+
+
+def run_fake_api(args, ready) -> None:
+    """Child process entry point: build the resources and serve them."""
+    resources = build_resources(
+        args.deployments,
+        args.runs,
+        args.work_pools,
+        args.work_queues,
+        args.offset_minutes,
+    )
+    server = FakePrefectApi(resources, args.latency_ms / 1000).serve()
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def make_metrics(args, url: str, shard=None):
+    kwargs = dict(
+        url=url,
+        headers={"accept": "application/json"},
+        offset_minutes=args.offset_minutes,
+        failed_runs_offset_minutes=args.offset_minutes,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="benchmark",
+        csrf_enabled=True,
+        logger=logging.getLogger("benchmark"),
+        enable_pagination=True,
+        pagination_limit=args.pagination_limit,
+        pagination_mode=args.pagination_mode,
+        fetch_concurrency=args.fetch_concurrency,
+        work_queue_status_concurrency=args.fetch_concurrency,
+        shard=shard,
+    )
+    if args.engine == "async":
+        return AsyncPrefectMetrics(http_pool_size=args.http_pool_size, **kwargs)
+    session = build_session(args.http_pool_size, ConnectionStats())
+    return PrefectMetrics(session=session, **kwargs)
+
+
+def api_requests(url: str) -> dict:
+    return requests.get(f"{url}/_stats").json()
+
+
+def scrape(metrics, url: str) -> dict:
+    """Run one collection and measure it."""
+    before = api_requests(url)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    families = list(metrics.collect())
+    cpu_seconds = time.process_time() - cpu_start
+    wall_seconds = time.perf_counter() - wall_start
+    after = api_requests(url)
+    by_endpoint = {
+        endpoint: count - before.get(endpoint, 0)
+        for endpoint, count in sorted(after.items())
+        if count != before.get(endpoint, 0)
+    }
+    return {
+        "wall_seconds": wall_seconds,
+        "cpu_seconds": cpu_seconds,
+        "families": len(families),
+        "samples": sum(len(family.samples) for family in families),
+        "api_requests": sum(by_endpoint.values()),
+        "api_requests_by_endpoint": by_endpoint,
+    }
+
+
+def run_scrapes(args, url: str, shard=None) -> dict:
+    """Scrape ``args.scrapes`` times and summarize the results."""
+    metrics = make_metrics(args, url, shard)
+    baseline_rss = peak_rss_mib()
+    scrapes = [scrape(metrics, url) for _ in range(args.scrapes)]
+    stop = getattr(metrics, "stop", None)
+    if stop is not None:
+        stop()
+
+    wall = [result["wall_seconds"] for result in scrapes]
+    return {
+        "summary": {
+            "wall_seconds_min": min(wall),
+            "wall_seconds_median": statistics.median(wall),
+            "wall_seconds_max": max(wall),
+            "cpu_seconds_median": statistics.median(
+                result["cpu_seconds"] for result in scrapes
+            ),
+            "api_requests_per_scrape": statistics.median(
+                result["api_requests"] for result in scrapes
+            ),
+            "baseline_rss_mib": baseline_rss,
+            "peak_rss_mib": peak_rss_mib(),
+        },
+        "scrapes": scrapes,
+    }
+
+
+def run_shard(args, url: str, index: int, done) -> None:
+    """Child process entry point: run one shard's exporter and report its results."""
+    done.put(run_scrapes(args, url, Shard(index, args.shards)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--deployments", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=100000)
+    parser.add_argument("--work-pools", type=int, default=10)
+    parser.add_argument("--work-queues", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--offset-minutes", type=int, default=5)
+    parser.add_argument("--scrapes", type=int, default=3)
+    parser.add_argument("--engine", choices=("requests", "async"), default="requests")
+    parser.add_argument("--fetch-concurrency", type=int, default=4)
+    parser.add_argument("--http-pool-size", type=int, default=10)
+    parser.add_argument("--pagination-limit", type=int, default=200)
+    parser.add_argument(
+        "--pagination-mode", choices=("offset", "keyset"), default="offset"
+    )
+    parser.add_argument(
+        "--shards", type=int, default=1, help="Split collection across N exporters"
+    )
+    parser.add_argument("--output", help="Write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=run_fake_api, args=(args, ready), daemon=True
+    )
+    server.start()
+    url = f"http://127.0.0.1:{ready.get(timeout=600)}/api"
+
+    try:
+        if args.shards > 1:
+            shards = []
+            for index in range(args.shards):
+                done = multiprocessing.Queue()
+                exporter = multiprocessing.Process(
+                    target=run_shard, args=(args, url, index, done)
+                )
+                exporter.start()
+                shards.append({"shard": index, **done.get(timeout=3600)})
+                exporter.join()
+        else:
+            measured = run_scrapes(args, url)
+    finally:
+        server.terminate()
+        server.join()
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+    }
+    if args.shards > 1:
+        results["shards"] = shards
+    else:
+        results.update(measured)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
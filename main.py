@@ -1,12 +1,36 @@
 import os
-import base64
 import logging
+import signal
+import sys
 import threading
 import uuid
+from functools import partial
 
+from metrics.async_engine import AsyncPrefectMetrics
+from metrics.cardinality import parse_series_budgets
 from metrics.metrics import PrefectMetrics
 from metrics.healthz import PrefectHealthz
-from prometheus_client import start_http_server, REGISTRY
+from metrics.histograms import DEFAULT_RUN_TIME_BUCKETS
+from metrics.instrumentation import ExporterStats, PrefectExporterMetrics
+from metrics.profiling import CycleProfiler
+from metrics.push import (
+    PUSH_PROTOCOLS,
+    PushgatewayPusher,
+    PushLoop,
+    RemoteWritePusher,
+    parse_push_labels,
+)
+from metrics.schedule import parse_refresh_schedule
+from metrics.server import ExpositionCache, start_metrics_server
+from metrics.sharding import Shard
+from metrics.session import ConnectionStats, PrefectSessionMetrics, build_session
+from metrics.workspaces import (
+    MultiWorkspaceCollector,
+    Workspace,
+    build_headers,
+    load_workspaces,
+)
+from prometheus_client import REGISTRY
 
 
 def metrics():
@@ -24,9 +48,19 @@ def metrics():
         os.getenv("FAILED_RUNS_OFFSET_MINUTES", "10080")
     )  # 7 days
     failed_runs_limit = int(os.getenv("FAILED_RUNS_LIMIT", "10"))
+    refresh_interval = float(os.getenv("REFRESH_INTERVAL_SECONDS", "0"))
+    fetch_concurrency = int(os.getenv("FETCH_CONCURRENCY", "4"))
+    http_pool_size = int(os.getenv("HTTP_POOL_SIZE", "10"))
+    async_request_concurrency = int(os.getenv("ASYNC_REQUEST_CONCURRENCY", "64"))
+    api_engine = str(os.getenv("API_ENGINE", "requests"))
     url = str(os.getenv("PREFECT_API_URL", "http://localhost:4200/api"))
     api_key = str(os.getenv("PREFECT_API_KEY", ""))
     api_auth_string = str(os.getenv("PREFECT_API_AUTH_STRING", ""))
+    workspaces_config = str(os.getenv("WORKSPACES_CONFIG", ""))
+    workspace_concurrency = int(os.getenv("WORKSPACE_CONCURRENCY", "8"))
+    workspace_timeout = float(os.getenv("WORKSPACE_TIMEOUT_SECONDS", "30"))
+    shard_index = int(os.getenv("SHARD_INDEX", "0"))
+    shard_count = int(os.getenv("SHARD_COUNT", "1"))
     csrf_client_id = str(uuid.uuid4())
     # Configure logging
     logging.basicConfig(
@@ -35,35 +69,98 @@ def metrics():
     logger = logging.getLogger("prometheus-prefect-exporter")
 
     # Configure headers for HTTP requests
-    headers = {"accept": "application/json", "Content-Type": "application/json"}
-
+    headers = build_headers(api_key, api_auth_string)
     if api_auth_string:
-        api_auth_string_encoded = base64.b64encode(
-            api_auth_string.encode("utf-8")
-        ).decode("utf-8")
-        headers["Authorization"] = f"Basic {api_auth_string_encoded}"
         logger.info("Added Basic Authorization header for PREFECT_API_AUTH_STRING")
-
     if api_key:
-        headers["Authorization"] = f"Bearer {api_key}"
         logger.info("Added Bearer Authorization header for PREFECT_API_KEY")
 
+    # One keep-alive connection pool shared by every collector
+    connection_stats = ConnectionStats()
+    session = build_session(http_pool_size, connection_stats)
+
+    # Workspaces to collect: those of WORKSPACES_CONFIG, else the one configured above
+    workspaces = None
+    if workspaces_config:
+        workspaces = load_workspaces(workspaces_config)
+        logger.info(f"Collecting {len(workspaces)} workspaces from {workspaces_config}")
+
     # check endpoint
-    PrefectHealthz(
-        url=url, headers=headers, max_retries=max_retries, logger=logger
-    ).get_health_check()
+    for workspace in workspaces or [Workspace("", url, headers)]:
+        try:
+            PrefectHealthz(
+                url=workspace.url,
+                headers=workspace.headers,
+                max_retries=max_retries,
+                logger=logger,
+                session=session,
+            ).get_health_check()
+        except SystemExit:
+            if workspaces is None:
+                raise
+            # One unreachable workspace must not stop the others from being served.
+            logger.error(f"Workspace {workspace.name} failed its health check")
 
     ##
     # NOTIFY IF PAGINATION IS ENABLED
     #
     enable_pagination = str(os.getenv("PAGINATION_ENABLED", "True")) == "True"
     pagination_limit = int(os.getenv("PAGINATION_LIMIT", 200))
+    pagination_mode = str(os.getenv("PAGINATION_MODE", "offset"))
+    enable_count_queries = str(os.getenv("COUNT_QUERIES_ENABLED", "False")) == "True"
+    enable_incremental_flow_runs = (
+        str(os.getenv("INCREMENTAL_FLOW_RUNS_ENABLED", "False")) == "True"
+    )
+    incremental_full_sync_every = int(os.getenv("INCREMENTAL_FULL_SYNC_EVERY", "30"))
+    catalog_ttl = float(os.getenv("CATALOG_TTL_SECONDS", "0"))
+    work_queue_status_concurrency = int(os.getenv("WORK_QUEUE_STATUS_CONCURRENCY", "4"))
+    work_queue_status_ttl = float(os.getenv("WORK_QUEUE_STATUS_TTL_SECONDS", "0"))
+    work_queue_status_batch_size = int(os.getenv("WORK_QUEUE_STATUS_BATCH_SIZE", "0"))
+    enable_run_time_histogram = (
+        str(os.getenv("RUN_TIME_HISTOGRAM_ENABLED", "False")) == "True"
+    )
+    run_time_buckets = os.getenv("RUN_TIME_HISTOGRAM_BUCKETS")
+    run_time_buckets = (
+        [float(bound) for bound in run_time_buckets.split(",")]
+        if run_time_buckets
+        else DEFAULT_RUN_TIME_BUCKETS
+    )
+    enable_event_stream = str(os.getenv("EVENT_STREAM_ENABLED", "False")) == "True"
+    series_budgets = parse_series_budgets(os.getenv("SERIES_BUDGETS", ""))
+    refresh_schedule = parse_refresh_schedule(os.getenv("REFRESH_SCHEDULE", ""))
+    event_reconcile_interval = float(os.getenv("EVENT_STREAM_RECONCILE_SECONDS", "300"))
+    profile_dir = str(os.getenv("PROFILE_DIR", "/tmp/prometheus-prefect-exporter"))
+    profile_cycles = int(os.getenv("PROFILE_CYCLES", "0"))
+    coalesce_window = float(os.getenv("SCRAPE_COALESCE_SECONDS", "0"))
+    deadline_budget = float(os.getenv("SCRAPE_DEADLINE_SECONDS", "0"))
+    scrape_timeout_margin = float(os.getenv("SCRAPE_TIMEOUT_MARGIN_SECONDS", "0.5"))
+    enable_exposition_cache = (
+        str(os.getenv("EXPOSITION_CACHE_ENABLED", "False")) == "True"
+    )
+    push_url = str(os.getenv("PUSH_URL", ""))
+    push_protocol = str(os.getenv("PUSH_PROTOCOL", "pushgateway"))
+    push_interval = float(os.getenv("PUSH_INTERVAL_SECONDS", "60"))
+    push_job = str(os.getenv("PUSH_JOB", "prometheus-prefect-exporter"))
+    push_labels = parse_push_labels(os.getenv("PUSH_LABELS", ""))
+    push_batch_size = int(os.getenv("PUSH_BATCH_SIZE", "2000"))
+    if push_url and push_protocol not in PUSH_PROTOCOLS:
+        raise ValueError(
+            f"Unknown PUSH_PROTOCOL {push_protocol!r}, expected one of {', '.join(PUSH_PROTOCOLS)}"
+        )
+    if push_url and push_interval <= 0 and refresh_interval > 0:
+        # A background refresh would not have a snapshot yet when the only
+        # push happens, so that push collects synchronously instead.
+        logger.warning(
+            "REFRESH_INTERVAL_SECONDS is ignored when pushing once (PUSH_INTERVAL_SECONDS=0)"
+        )
+        refresh_interval = 0
     enable_flow_run_name_label = (
         str(os.getenv("ENABLE_FLOW_RUN_NAME_LABEL", "False")) == "True"
     )
     if enable_pagination:
         logger.info("Pagination is enabled")
         logger.info(f"Pagination limit is {pagination_limit}")
+        logger.info(f"Pagination mode is {pagination_mode}")
     else:
         logger.info("Pagination is disabled")
 
@@ -72,10 +169,38 @@ def metrics():
             "Flow run name label is enabled on prefect_info_flow_runs and prefect_flow_runs_ongoing_run_time"
         )
 
-    # Create an instance of the PrefectMetrics class
-    metrics = PrefectMetrics(
-        url=url,
-        headers=headers,
+    if refresh_schedule:
+        logger.info(f"Refresh schedule is {refresh_schedule}")
+
+    if shard_count > 1:
+        logger.info(
+            f"Sharding is enabled, collecting shard {shard_index} of {shard_count}"
+        )
+
+    if refresh_interval > 0:
+        logger.info(
+            f"Background refresh is enabled, collecting every {refresh_interval}s"
+        )
+
+    if api_engine == "async":
+        logger.info("Using the async HTTP/2 API engine")
+        metrics_cls = partial(
+            AsyncPrefectMetrics,
+            http_pool_size=http_pool_size,
+            request_concurrency=async_request_concurrency,
+        )
+    else:
+        metrics_cls = partial(PrefectMetrics, session=session)
+
+    # Profile the first PROFILE_CYCLES cycles, and as many again on each SIGUSR1
+    profiler = CycleProfiler(profile_dir, logger)
+    if profile_cycles > 0:
+        profiler.arm(profile_cycles)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: profiler.arm(max(1, profile_cycles)))
+
+    # Settings shared by every workspace's PrefectMetrics
+    settings = dict(
         offset_minutes=offset_minutes,
         failed_runs_offset_minutes=failed_runs_offset_minutes,
         failed_runs_limit=failed_runs_limit,
@@ -86,15 +211,117 @@ def metrics():
         # Enable pagination if not specified to avoid breaking existing deployments
         enable_pagination=enable_pagination,
         pagination_limit=pagination_limit,
+        pagination_mode=pagination_mode,
+        enable_count_queries=enable_count_queries,
+        enable_incremental_flow_runs=enable_incremental_flow_runs,
+        incremental_full_sync_every=incremental_full_sync_every,
+        catalog_ttl=catalog_ttl,
+        work_queue_status_concurrency=work_queue_status_concurrency,
+        work_queue_status_ttl=work_queue_status_ttl,
+        work_queue_status_batch_size=work_queue_status_batch_size,
+        enable_event_stream=enable_event_stream,
+        event_reconcile_interval=event_reconcile_interval,
+        enable_run_time_histogram=enable_run_time_histogram,
+        run_time_buckets=run_time_buckets,
+        series_budgets=series_budgets,
+        refresh_schedule=refresh_schedule,
+        profiler=profiler,
+        coalesce_window=coalesce_window,
+        deadline_budget=deadline_budget,
         enable_flow_run_name_label=enable_flow_run_name_label,
+        refresh_interval=refresh_interval,
+        fetch_concurrency=fetch_concurrency,
     )
 
-    # Register the metrics with Prometheus
     logger.info("Initializing metrics...")
-    REGISTRY.register(metrics)
+    if workspaces is None:
+        # Exporter self-instrumentation, shared by every collector
+        stats = ExporterStats()
+        # Create an instance of the PrefectMetrics class
+        metrics = metrics_cls(
+            url=url,
+            headers=headers,
+            api_key=api_key,
+            api_auth_string=api_auth_string,
+            stats=stats,
+            shard=Shard(shard_index, shard_count) if shard_count > 1 else None,
+            **settings,
+        )
+        # Register the metrics with Prometheus
+        REGISTRY.register(metrics)
+        REGISTRY.register(PrefectExporterMetrics(stats))
+    else:
+        # Each workspace gets its own collectors and stats; every sample is
+        # labeled with the workspace it came from.
+        collectors = {}
+        for workspace in workspaces:
+            stats = ExporterStats()
+            collectors[workspace.name] = [
+                metrics_cls(
+                    url=workspace.url,
+                    headers=dict(workspace.headers),
+                    api_key=workspace.api_key,
+                    api_auth_string=workspace.api_auth_string,
+                    stats=stats,
+                    shard=Shard(shard_index, shard_count) if shard_count > 1 else None,
+                    **settings,
+                ),
+                PrefectExporterMetrics(stats),
+            ]
+        metrics = MultiWorkspaceCollector(
+            collectors, logger, workspace_concurrency, workspace_timeout
+        )
+        REGISTRY.register(metrics)
+    if api_engine != "async":
+        REGISTRY.register(PrefectSessionMetrics(connection_stats))
+    metrics.start()
+
+    if push_url:
+        # Push mode: no HTTP server, collect and push on an interval instead
+        pusher_cls = PushgatewayPusher
+        if push_protocol == "remote_write":
+            pusher_cls = partial(RemoteWritePusher, batch_size=push_batch_size)
+        push_loop = PushLoop(
+            REGISTRY,
+            pusher_cls(push_url, push_job, push_labels, logger, max_retries),
+            push_interval,
+            logger,
+        )
+        REGISTRY.register(push_loop)
+        if push_interval <= 0:
+            # One-shot, e.g. at the end of a CI job
+            pushed = push_loop.push_once()
+            metrics.stop()
+            sys.exit(0 if pushed else 1)
+        logger.info(
+            f"Pushing metrics to {push_url} ({push_protocol}) every {push_interval}s"
+        )
+        try:
+            # A push replaces the pushed group, so never push before the
+            # background refresh has collected Prefect data.
+            while not metrics.wait_for_snapshot(push_interval):
+                logger.warning("No metrics collected yet, delaying the first push")
+            push_loop.run()
+        except KeyboardInterrupt:
+            logger.info("Shutting down...")
+            metrics.stop()
+        return
+
+    # Render the exposition once per refresh instead of on every scrape
+    exposition_cache = None
+    if enable_exposition_cache:
+        exposition_cache = ExpositionCache(
+            REGISTRY,
+            metrics.exposition_version,
+            refresh_interval if refresh_interval > 0 else coalesce_window,
+        )
+        REGISTRY.register(exposition_cache)
+        logger.info("Exposition cache is enabled")
 
     # Start the HTTP server to expose Prometheus metrics
-    start_http_server(metrics_port, metrics_addr)
+    start_metrics_server(
+        metrics_port, metrics_addr, scrape_timeout_margin, cache=exposition_cache
+    )
     logger.info(f"Exporter listening on {metrics_addr}:{metrics_port}")
 
     # Keep the process alive
@@ -102,6 +329,7 @@ def metrics():
         threading.Event().wait()
     except KeyboardInterrupt:
         logger.info("Shutting down...")
+        metrics.stop()
 
 
 if __name__ == "__main__":
@@ -1,8 +1,11 @@
 import time
+from contextlib import nullcontext
 from typing import Optional
 
 import requests
 
+from metrics.deadline import DeadlineExceeded
+from metrics.instrumentation import ExporterStats
 from metrics.retry_after import detect_retry_after, log_retry_after
 
 
@@ -11,6 +14,14 @@ class PrefectApiMetric:
     PrefectDeployments class for interacting with Prefect's endpoints
     """
 
+    # (timestamp field, ascending sort) used for keyset pagination, or None if
+    # the resource only supports offset pagination.
+    KEYSET = None
+
+    # CompactRecord subclass each item is projected onto as pages arrive, or
+    # None to keep the decoded JSON items as they are.
+    RECORD = None
+
     def __init__(
         self,
         url,
@@ -20,6 +31,11 @@ class PrefectApiMetric:
         enable_pagination,
         pagination_limit,
         uri,
+        limiter=None,
+        session=None,
+        pagination_mode="offset",
+        stats=None,
+        deadline=None,
     ) -> None:
         """
         Initialize the PrefectDeployments instance.
@@ -32,6 +48,11 @@ class PrefectApiMetric:
             uri (str, optional): The URI path for the intended endpoint.
             enable_pagination (bool): Whether to use pagination or not.
             pagination_limit (int): The limit for pagination.
+            limiter (obj, optional): Context manager bounding concurrent HTTP requests, shared across collectors. Default is None.
+            session (requests.Session, optional): Shared pooled session. Default is the module-level requests API.
+            pagination_mode (str, optional): "offset" or "keyset". Keyset only applies to collectors defining KEYSET. Default is "offset".
+            stats (ExporterStats, optional): Records request latency, retries, pages and bytes, shared across collectors. Default is a private instance.
+            deadline (Deadline, optional): Fetching stops with DeadlineExceeded once it passes, and requests time out at it. Default is None.
         """
         self.headers = headers
         self.uri = uri
@@ -40,63 +61,221 @@ class PrefectApiMetric:
         self.logger = logger
         self.enable_pagination = enable_pagination
         self.pagination_limit = pagination_limit
+        self.limiter = limiter if limiter is not None else nullcontext()
+        self.session = session if session is not None else requests
+        self.pagination_mode = pagination_mode
+        self.stats = stats if stats is not None else ExporterStats()
+        self.deadline = deadline
 
     def _get_with_pagination(self, base_data: Optional[dict] = None) -> list:
         """
         Fetch all items from the endpoint with pagination.
 
+        Uses keyset pagination when ``pagination_mode`` is "keyset" and the
+        collector defines a keyset (see KeysetCursor), offset pagination otherwise.
+
         Returns:
             list: All items from the endpoint, or an empty list on failure.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before the last page.
         """
         endpoint = f"{self.url}/{self.uri}/filter"
         enable_pagination = self.enable_pagination
         limit = self.pagination_limit
         offset = 0
         all_items = []
+        cursor = None
+        if enable_pagination and self.pagination_mode == "keyset" and self.KEYSET:
+            cursor = KeysetCursor(self.uri, *self.KEYSET)
 
         # Run the loop until the current page is empty
         while True:
-            resp = None
-
-            for retry in range(self.max_retries):
+            if cursor is not None:
+                data = cursor.page_data(base_data, limit)
+            else:
                 data = {
                     **(base_data or {}),
                     "limit": limit,
                     "offset": offset,
                 }
 
-                try:
-                    resp = requests.post(endpoint, headers=self.headers, json=data)
-                    resp.raise_for_status()
-                    break
-                except requests.exceptions.RequestException as err:
-                    signal = detect_retry_after(err.response)
-                    if signal is not None:
-                        log_retry_after(self.logger, endpoint, signal)
-                        return all_items
-                    self.logger.error(err)
-                    if retry < self.max_retries - 1:
-                        time.sleep(2**retry)
-                    else:
-                        self.logger.error(
-                            "Max retries reached for %s, returning partial results",
-                            endpoint,
-                        )
-                        return all_items
-
-            curr_page_items = resp.json()
+            self._check_deadline(endpoint)
+            curr_page_items = self._post_json(endpoint, data)
+
+            # The request failed or the server asked us to back off
+            if curr_page_items is None:
+                return all_items
 
             # If the current page is empty, break the loop
             if not curr_page_items:
                 break
 
-            # The page has items. Extend the item set.
+            self.stats.observe_page(self._endpoint_label(endpoint))
+
+            # The page has items. Extend the item set, keeping only the fields
+            # the metrics read so the raw page can be freed right away.
+            if self.RECORD is not None:
+                curr_page_items = [
+                    self.RECORD.from_json(item) for item in curr_page_items
+                ]
             all_items.extend(curr_page_items)
 
             # If pagination is not used, break the loop
             if not enable_pagination:
                 break
 
-            offset += limit
+            if cursor is not None:
+                # A short page is the last one; there is nothing left to seek to.
+                if len(curr_page_items) < limit:
+                    break
+                cursor.advance(curr_page_items)
+            else:
+                offset += limit
 
         return all_items
+
+    def _count(self, base_data: Optional[dict] = None) -> Optional[int]:
+        """
+        Count matching items server-side, without transferring them.
+
+        Returns:
+            int: The number of items matching ``base_data``, or None on failure.
+        """
+        return self._post_json(f"{self.url}/{self.uri}/count", base_data or {})
+
+    def _post_json(self, endpoint: str, data: dict):
+        """
+        POST a request, retrying with exponential backoff.
+
+        Returns:
+            The decoded JSON response, or None if retries were exhausted or
+            the server sent Retry-After.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before a response arrives.
+        """
+        label = self._endpoint_label(endpoint)
+        for retry in range(self.max_retries):
+            try:
+                with self.limiter:
+                    started = time.perf_counter()
+                    resp = self.session.post(
+                        endpoint,
+                        headers=self.headers,
+                        json=data,
+                        **self._timeout(endpoint),
+                    )
+                    self.stats.observe_request(
+                        label, time.perf_counter() - started, len(resp.content)
+                    )
+                resp.raise_for_status()
+                return resp.json()
+            except requests.exceptions.RequestException as err:
+                signal = detect_retry_after(err.response)
+                if signal is not None:
+                    log_retry_after(self.logger, endpoint, signal)
+                    self.stats.observe_retry_after_abort(label)
+                    return None
+                self.logger.error(err)
+                if retry < self.max_retries - 1:
+                    self._check_deadline(endpoint, backoff=2**retry)
+                    self.stats.observe_retry(label)
+                    time.sleep(2**retry)
+                else:
+                    self.logger.error(
+                        "Max retries reached for %s, returning partial results",
+                        endpoint,
+                    )
+                    return None
+
+        return None
+
+    def _endpoint_label(self, endpoint: str) -> str:
+        # Path relative to the API URL, e.g. "flow_runs/filter".
+        return endpoint.removeprefix(f"{self.url}/")
+
+    def _check_deadline(self, endpoint: str, backoff: float = 0) -> None:
+        """
+        Raise DeadlineExceeded if the deadline passes before ``backoff`` seconds from now.
+        """
+        if self.deadline is not None and self.deadline.remaining() <= backoff:
+            raise DeadlineExceeded(f"Deadline exceeded fetching {endpoint}")
+
+    def _timeout(self, endpoint: str) -> dict:
+        # Requests are only bounded when there is a deadline, as before.
+        if self.deadline is None:
+            return {}
+        self._check_deadline(endpoint)
+        return {"timeout": self.deadline.remaining()}
+
+
+class KeysetCursor:
+    """
+    KeysetCursor class for seeking through a result set by a stable sort key.
+
+    Offset pagination makes the server re-scan every earlier row for each page
+    and can skip or repeat rows that shift between pages. Instead, each page
+    here is sorted ascending by a timestamp field and filtered to rows at or
+    after the last timestamp seen, excluding the ids already returned at that
+    exact timestamp. Total cost stays linear in the number of rows.
+
+    Rows with a null ``field`` never satisfy the seek bound. They are returned
+    only if the database sorts nulls first (SQLite) and skipped if it sorts
+    them last (PostgreSQL).
+    """
+
+    def __init__(self, resource: str, field: str, sort: str) -> None:
+        """
+        Initialize the KeysetCursor instance.
+
+        Args:
+            resource (str): Filter key of the paginated resource, e.g. "flow_runs".
+            field (str): Timestamp field to seek on. Its filter must support ``after_`` (inclusive).
+            sort (str): Sort order ascending by ``field``.
+        """
+        self.resource = resource
+        self.field = field
+        self.sort = sort
+        self.after = None
+        self.seen_at_after = set()
+
+    def page_data(self, base_data: Optional[dict], limit: int) -> dict:
+        """
+        Build the request body for the next page.
+
+        Args:
+            base_data (dict, optional): The query's own filters.
+            limit (int): Page size.
+
+        Returns:
+            dict: ``base_data`` with the keyset sort and seek filters applied.
+        """
+        data = dict(base_data or {})
+        filters = dict(data.get(self.resource, {}))
+        if self.after is not None:
+            filters[self.field] = {**filters.get(self.field, {}), "after_": self.after}
+        if self.seen_at_after:
+            filters["id"] = {
+                **filters.get("id", {}),
+                "not_any_": sorted(self.seen_at_after),
+            }
+        data[self.resource] = filters
+        data["sort"] = self.sort
+        data["limit"] = limit
+        return data
+
+    def advance(self, page: list) -> None:
+        """
+        Move the cursor past ``page``.
+
+        Args:
+            page (list): Items of the page just returned, in sort order.
+        """
+        last = page[-1].get(self.field)
+        if last != self.after:
+            self.after = last
+            self.seen_at_after = set()
+        self.seen_at_after.update(
+            item.get("id") for item in page if item.get(self.field) == last
+        )
@@ -0,0 +1,660 @@
+"""Asyncio + HTTP/2 API engine, an alternative to the requests-based collectors."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from functools import partial
+from typing import Optional
+
+import httpx
+from prefect.client.schemas.objects import CsrfToken
+
+from metrics.api_metric import KeysetCursor
+from metrics.deadline import DeadlineExceeded
+from metrics.flow_runs import FlowRunQueries
+from metrics.instrumentation import ExporterStats
+from metrics.metrics import PrefectMetrics
+from metrics.retry_after import detect_retry_after, log_retry_after
+from metrics.work_queues import WorkQueueStatusCache, owned_queue_ids
+
+
+class AsyncPrefectApiMetric:
+    """
+    AsyncPrefectApiMetric class for interacting with Prefect's endpoints over asyncio.
+
+    Mirrors PrefectApiMetric, including Retry-After aborts and partial results,
+    but sends requests through a shared httpx.AsyncClient so many queries are
+    multiplexed over a few HTTP/2 connections from a single event loop.
+    """
+
+    KEYSET = None
+
+    # CompactRecord subclass each item is projected onto as pages arrive, or
+    # None to keep the decoded JSON items as they are.
+    RECORD = None
+
+    def __init__(
+        self,
+        url,
+        headers,
+        max_retries,
+        logger,
+        enable_pagination,
+        pagination_limit,
+        uri,
+        client,
+        semaphore=None,
+        pagination_mode="offset",
+        stats=None,
+        deadline=None,
+    ) -> None:
+        """
+        Initialize the AsyncPrefectApiMetric instance.
+
+        Args:
+            url (str): The URL of the Prefect instance.
+            headers (dict): Headers to be included in HTTP requests.
+            max_retries (int): The maximum number of retries for HTTP requests.
+            logger (obj): The logger object.
+            enable_pagination (bool): Whether to use pagination or not.
+            pagination_limit (int): The limit for pagination.
+            uri (str): The URI path for the intended endpoint.
+            client (httpx.AsyncClient): Shared async HTTP client.
+            semaphore (asyncio.Semaphore, optional): Bounds concurrent requests across collectors. Default is None.
+            pagination_mode (str, optional): "offset" or "keyset". Default is "offset".
+            stats (ExporterStats, optional): Records request latency, retries, pages and bytes, shared across collectors. Default is a private instance.
+            deadline (Deadline, optional): Fetching stops with DeadlineExceeded once it passes, and requests time out at it. Default is None.
+        """
+        self.headers = headers
+        self.uri = uri
+        self.url = url
+        self.max_retries = max_retries
+        self.logger = logger
+        self.enable_pagination = enable_pagination
+        self.pagination_limit = pagination_limit
+        self.client = client
+        self.semaphore = semaphore if semaphore is not None else nullcontext()
+        self.pagination_mode = pagination_mode
+        self.stats = stats if stats is not None else ExporterStats()
+        self.deadline = deadline
+
+    async def _get_with_pagination(self, base_data: Optional[dict] = None) -> list:
+        """
+        Fetch all items from the endpoint with pagination.
+
+        Returns:
+            list: All items from the endpoint, or an empty list on failure.
+        """
+        endpoint = f"{self.url}/{self.uri}/filter"
+        limit = self.pagination_limit
+        offset = 0
+        all_items = []
+        cursor = None
+        if self.enable_pagination and self.pagination_mode == "keyset" and self.KEYSET:
+            cursor = KeysetCursor(self.uri, *self.KEYSET)
+
+        # Run the loop until the current page is empty
+        while True:
+            if cursor is not None:
+                data = cursor.page_data(base_data, limit)
+            else:
+                data = {
+                    **(base_data or {}),
+                    "limit": limit,
+                    "offset": offset,
+                }
+
+            self._check_deadline(endpoint)
+            curr_page_items = await self._post_json(endpoint, data)
+
+            # The request failed or the server asked us to back off
+            if curr_page_items is None:
+                return all_items
+
+            # If the current page is empty, break the loop
+            if not curr_page_items:
+                break
+
+            self.stats.observe_page(self._endpoint_label(endpoint))
+
+            # The page has items. Extend the item set, keeping only the fields
+            # the metrics read so the raw page can be freed right away.
+            if self.RECORD is not None:
+                curr_page_items = [
+                    self.RECORD.from_json(item) for item in curr_page_items
+                ]
+            all_items.extend(curr_page_items)
+
+            # If pagination is not used, break the loop
+            if not self.enable_pagination:
+                break
+
+            if cursor is not None:
+                if len(curr_page_items) < limit:
+                    break
+                cursor.advance(curr_page_items)
+            else:
+                offset += limit
+
+        return all_items
+
+    async def _count(self, base_data: Optional[dict] = None) -> Optional[int]:
+        """
+        Count matching items server-side, without transferring them.
+
+        Returns:
+            int: The number of items matching ``base_data``, or None on failure.
+        """
+        return await self._post_json(f"{self.url}/{self.uri}/count", base_data or {})
+
+    async def _post_json(self, endpoint: str, data: dict):
+        """
+        POST a request, retrying with exponential backoff.
+
+        Returns:
+            The decoded JSON response, or None if retries were exhausted or
+            the server sent Retry-After.
+        """
+        label = self._endpoint_label(endpoint)
+        for retry in range(self.max_retries):
+            try:
+                async with self.semaphore:
+                    started = time.perf_counter()
+                    resp = await self.client.post(
+                        endpoint,
+                        headers=self.headers,
+                        json=data,
+                        **self._timeout(endpoint),
+                    )
+                    self.stats.observe_request(
+                        label, time.perf_counter() - started, len(resp.content)
+                    )
+                resp.raise_for_status()
+                return resp.json()
+            # ValueError: an undecodable body, retried like the requests engine does.
+            except (httpx.HTTPError, ValueError) as err:
+                signal = detect_retry_after(getattr(err, "response", None))
+                if signal is not None:
+                    log_retry_after(self.logger, endpoint, signal)
+                    self.stats.observe_retry_after_abort(label)
+                    return None
+                self.logger.error(err)
+                if retry < self.max_retries - 1:
+                    self._check_deadline(endpoint, backoff=2**retry)
+                    self.stats.observe_retry(label)
+                    await asyncio.sleep(2**retry)
+                else:
+                    self.logger.error(
+                        "Max retries reached for %s, returning partial results",
+                        endpoint,
+                    )
+                    return None
+
+        return None
+
+    def _endpoint_label(self, endpoint: str) -> str:
+        # Path relative to the API URL, e.g. "flow_runs/filter".
+        return endpoint.removeprefix(f"{self.url}/")
+
+    def _check_deadline(self, endpoint: str, backoff: float = 0) -> None:
+        """
+        Raise DeadlineExceeded if the deadline passes before ``backoff`` seconds from now.
+        """
+        if self.deadline is not None and self.deadline.remaining() <= backoff:
+            raise DeadlineExceeded(f"Deadline exceeded fetching {endpoint}")
+
+    def _timeout(self, endpoint: str) -> dict:
+        # Without a deadline, the client's own timeout (none) applies, as before.
+        if self.deadline is None:
+            return {}
+        self._check_deadline(endpoint)
+        return {"timeout": self.deadline.remaining()}
+
+
+class AsyncPrefectFlowRuns(FlowRunQueries, AsyncPrefectApiMetric):
+    """
+    AsyncPrefectFlowRuns class for interacting with Prefect's flow runs endpoints over asyncio.
+    """
+
+    def __init__(
+        self,
+        url,
+        headers,
+        max_retries,
+        offset_minutes,
+        logger,
+        enable_pagination,
+        pagination_limit,
+        client,
+        uri="flow_runs",
+        semaphore=None,
+        pagination_mode="offset",
+        stats=None,
+        deadline=None,
+        shard=None,
+    ) -> None:
+        """
+        Initialize the AsyncPrefectFlowRuns instance.
+
+        Args:
+            url (str): The URL of the Prefect instance.
+            headers (dict): Headers to be included in HTTP requests.
+            max_retries (int): The maximum number of retries for HTTP requests.
+            offset_minutes (int): Time offset in minutes.
+            logger (obj): The logger object.
+            client (httpx.AsyncClient): Shared async HTTP client.
+            uri (str, optional): The URI path for flow runs endpoints. Default is "flow_runs".
+            semaphore (asyncio.Semaphore, optional): Bounds concurrent requests across collectors. Default is None.
+            pagination_mode (str, optional): "offset" or "keyset". Default is "offset".
+            stats (ExporterStats, optional): Shared API call instrumentation. Default is None.
+            deadline (Deadline, optional): Fetching stops with DeadlineExceeded once it passes. Default is None.
+            shard (Shard, optional): Only query the flow runs of this shard. Default is every flow run.
+        """
+        super().__init__(
+            url=url,
+            headers=headers,
+            max_retries=max_retries,
+            logger=logger,
+            enable_pagination=enable_pagination,
+            pagination_limit=pagination_limit,
+            uri=uri,
+            client=client,
+            semaphore=semaphore,
+            pagination_mode=pagination_mode,
+            stats=stats,
+            deadline=deadline,
+        )
+
+        self.after_data_fmt = self._format_after(offset_minutes)
+        self.shard = shard
+
+    async def get_flow_runs_info(self) -> list:
+        """
+        Get flow runs within the time range, querying every state type at once.
+
+        Returns:
+            list: Flow runs across all state types, de-duplicated by run id.
+        """
+        state_results = await asyncio.gather(
+            *(
+                self._get_with_pagination(
+                    base_data=self._flow_runs_by_state_filter(state_type)
+                )
+                for state_type in self.STATE_TYPES
+            )
+        )
+
+        return self._merge_by_id(state_results)
+
+    async def get_all_flow_runs_info(self) -> list:
+        return await self._get_with_pagination(base_data=self._all_flow_runs_filter())
+
+    async def count_all_flow_runs(self):
+        return await self._count(base_data=self._all_flow_runs_filter(sharded=False))
+
+    async def get_ongoing_flow_runs_info(self) -> list:
+        return await self._get_with_pagination(
+            base_data=self._ongoing_flow_runs_filter()
+        )
+
+    async def get_failed_flow_runs_info(self, limit: int) -> dict:
+        all_failed = await self._get_with_pagination(
+            base_data=self._failed_flow_runs_filter()
+        )
+
+        return self._group_failed(all_failed, limit)
+
+
+class AsyncPrefectWorkQueues(AsyncPrefectApiMetric):
+    """
+    AsyncPrefectWorkQueues class for interacting with Prefect's work queues endpoints over asyncio.
+    """
+
+    def __init__(
+        self, *args, status_cache=None, status_concurrency=1, shard=None, **kwargs
+    ):
+        """
+        Initialize the AsyncPrefectWorkQueues instance.
+
+        Accepts every AsyncPrefectApiMetric argument, plus:
+
+        Args:
+            status_cache (WorkQueueStatusCache, optional): Status cache kept across cycles. Default is a new cache that refreshes every status.
+            status_concurrency (int, optional): Maximum status requests in flight. Default is 1.
+            shard (Shard, optional): Only fetch the statuses of this shard's queues. Default is every queue.
+        """
+        super().__init__(*args, **kwargs)
+        self.status_cache = (
+            status_cache if status_cache is not None else WorkQueueStatusCache()
+        )
+        self.status_concurrency = status_concurrency
+        self.shard = shard
+
+    async def get_work_queues_info(self) -> list:
+        """
+        Get work queues, fetching the due queue statuses concurrently.
+
+        Returns:
+            list: Work queues, each with a ``status_info`` dict.
+        """
+        work_queues_info = await self._get_with_pagination()
+
+        due = self.status_cache.due(owned_queue_ids(work_queues_info, self.shard))
+        status_limit = asyncio.Semaphore(max(1, self.status_concurrency))
+
+        async def fetch(queue_id):
+            async with status_limit:
+                return await self.get_work_queue_status_info(queue_id)
+
+        statuses = await asyncio.gather(*(fetch(queue_id) for queue_id in due))
+        self.status_cache.update(dict(zip(due, statuses)))
+
+        for queue_info in work_queues_info:
+            queue_info["status_info"] = self.status_cache.get(queue_info["id"])
+
+        return work_queues_info
+
+    async def get_work_queue_status_info(self, work_queue_id: uuid.UUID) -> dict:
+        """
+        Get status information for a specific work queue.
+
+        Args:
+            work_queue_id (uuid.UUID): The UUID of the work queue.
+
+        Returns:
+            dict: Work queue status information, or an empty dict on failure.
+        """
+        endpoint = f"{self.url}/{self.uri}/{work_queue_id}/status"
+        # One label for every queue, not one per queue id.
+        label = f"{self.uri}/status"
+
+        for retry in range(self.max_retries):
+            try:
+                async with self.semaphore:
+                    started = time.perf_counter()
+                    resp = await self.client.get(
+                        endpoint, headers=self.headers, **self._timeout(endpoint)
+                    )
+                    self.stats.observe_request(
+                        label, time.perf_counter() - started, len(resp.content)
+                    )
+                resp.raise_for_status()
+                return resp.json()
+            except (httpx.HTTPError, ValueError) as err:
+                signal = detect_retry_after(getattr(err, "response", None))
+                if signal is not None:
+                    log_retry_after(self.logger, endpoint, signal)
+                    self.stats.observe_retry_after_abort(label)
+                    return {}
+                self.logger.error(err)
+                if retry < self.max_retries - 1:
+                    self._check_deadline(endpoint, backoff=2**retry)
+                    self.stats.observe_retry(label)
+                    await asyncio.sleep(2**retry)
+                else:
+                    self.logger.error(
+                        "Max retries reached for %s, returning empty status",
+                        endpoint,
+                    )
+                    return {}
+
+
+async def _no_failed_flow_runs() -> dict:
+    return {}
+
+
+class AsyncPrefectMetrics(PrefectMetrics):
+    """
+    AsyncPrefectMetrics class for collecting Prefect metrics through the async engine.
+
+    Builds the same metric families as PrefectMetrics. Only the fetch stage
+    differs: every query of a cycle runs as a coroutine on one event loop,
+    owned by a dedicated thread, and shares one HTTP/2 client.
+    """
+
+    def __init__(
+        self,
+        *args,
+        http_pool_size=10,
+        request_concurrency=64,
+        transport=None,
+        **kwargs,
+    ) -> None:
+        """
+        Initialize the AsyncPrefectMetrics instance.
+
+        Accepts every PrefectMetrics argument, plus:
+
+        Args:
+            http_pool_size (int): Maximum connections held open by the HTTP/2 client.
+            request_concurrency (int): Maximum requests in flight across the cycle's coroutines. Replaces fetch_concurrency, which bounds the requests engine's threads; requests here are multiplexed over the HTTP/2 connections, so it can be much higher.
+            transport (httpx.AsyncBaseTransport, optional): Custom transport, mainly for tests. Default is None.
+        """
+        super().__init__(*args, **kwargs)
+        if self.flow_run_index is not None:
+            self.logger.warning(
+                "Incremental flow run sync is not supported by the async engine, "
+                "fetching the full flow run window every cycle"
+            )
+            self.flow_run_index = None
+        self.http_pool_size = http_pool_size
+        self.request_concurrency = request_concurrency
+        self.transport = transport
+        self._client = None
+        self._semaphore = None
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever, name="prefect-async-engine", daemon=True
+        )
+        self._loop_thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop background refreshing, close the HTTP client and the event loop.
+        """
+        super().stop()
+        if self._client is not None:
+            self._run(self._client.aclose())
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+
+    def _run(self, coro):
+        """Run ``coro`` on the engine's event loop and block for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily. Neither binds to an event loop until first awaited,
+        # which only happens on the engine's loop thread.
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=self.http_pool_size,
+                    max_keepalive_connections=self.http_pool_size,
+                ),
+                # Match the requests engine, which sets no timeout.
+                timeout=None,
+                transport=self.transport,
+            )
+            self._semaphore = asyncio.Semaphore(max(1, self.request_concurrency))
+        return self._client
+
+    def get_csrf_token(self) -> CsrfToken:
+        """
+        Pull CSRF Token from CSRF Endpoint.
+
+        Raises:
+            httpx.HTTPError: If all retries are exhausted.
+            ValueError: If the last response was not a valid CSRF token.
+        """
+        return self._run(self._get_csrf_token())
+
+    async def _get_csrf_token(self) -> CsrfToken:
+        client = self._get_client()
+        endpoint = f"{self.url}/csrf-token?client={self.client_id}"
+
+        for retry in range(self.max_retries):
+            try:
+                resp = await client.get(endpoint, headers=self.headers)
+                resp.raise_for_status()
+                return CsrfToken.model_validate(resp.json())
+            except (httpx.HTTPError, ValueError) as err:
+                signal = detect_retry_after(getattr(err, "response", None))
+                if signal is not None:
+                    log_retry_after(self.logger, endpoint, signal)
+                    raise
+                self.logger.error(err)
+                if retry < self.max_retries - 1:
+                    await asyncio.sleep(2**retry)
+                else:
+                    raise
+
+    def _resource_fetches(self, deadline=None) -> dict:
+        """
+        Build the fetch tasks of one collection cycle as coroutine functions.
+
+        Args:
+            deadline (Deadline, optional): Deadline the fetches stop at. Default is None.
+
+        Returns:
+            dict: Mapping of resource name -> zero-argument coroutine function, run by _run_fetches().
+        """
+        client = self._get_client()
+        common = {
+            "url": self.url,
+            "headers": self.headers,
+            "max_retries": self.max_retries,
+            "logger": self.logger,
+            "enable_pagination": self.enable_pagination,
+            "pagination_limit": self.pagination_limit,
+            "client": client,
+            "semaphore": self._semaphore,
+            "stats": self.stats,
+            "deadline": deadline,
+        }
+        deployments = AsyncPrefectApiMetric(uri="deployments", **common)
+        flows = AsyncPrefectApiMetric(uri="flows", **common)
+        flow_runs = AsyncPrefectFlowRuns(
+            offset_minutes=self.offset_minutes,
+            pagination_mode=self.pagination_mode,
+            shard=self.shard,
+            **common,
+        )
+        work_pools = AsyncPrefectApiMetric(uri="work_pools", **common)
+
+        fetches = {
+            "deployments": deployments._get_with_pagination,
+            "flows": flows._get_with_pagination,
+            "flow_runs": flow_runs.get_flow_runs_info,
+            "all_flow_runs": flow_runs.get_all_flow_runs_info,
+            "ongoing_flow_runs": flow_runs.get_ongoing_flow_runs_info,
+            "work_pools": work_pools._get_with_pagination,
+            "work_queues": AsyncPrefectWorkQueues(
+                uri="work_queues",
+                status_cache=self.work_queue_status_cache,
+                status_concurrency=self.work_queue_status_concurrency,
+                shard=self.shard,
+                **common,
+            ).get_work_queues_info,
+            "failed_flow_runs": _no_failed_flow_runs,
+        }
+        if self.event_store is not None:
+            for name in ("flow_runs", "all_flow_runs", "ongoing_flow_runs"):
+                del fetches[name]
+            fetches["flow_run_window"] = partial(
+                self._event_flow_run_window_async, flow_runs
+            )
+        if self.enable_count_queries and self._emits_totals():
+            fetches["deployments_count"] = deployments._count
+            fetches["flows_count"] = flows._count
+            fetches["all_flow_runs_count"] = flow_runs.count_all_flow_runs
+            fetches["work_pools_count"] = work_pools._count
+        if self.shard is not None and self.shard.designated:
+            fetches["all_flow_runs_count"] = flow_runs.count_all_flow_runs
+        if self.failed_runs_offset_minutes != 0:
+            fetches["failed_flow_runs"] = partial(
+                AsyncPrefectFlowRuns(
+                    offset_minutes=self.failed_runs_offset_minutes,
+                    pagination_mode=self.pagination_mode,
+                    shard=self.shard,
+                    **common,
+                ).get_failed_flow_runs_info,
+                limit=self.failed_runs_limit,
+            )
+
+        return fetches
+
+    async def _event_flow_run_window_async(self, flow_runs) -> dict:
+        """
+        Serve the flow run lists from the event store, reconciling it first when due.
+
+        Args:
+            flow_runs (AsyncPrefectFlowRuns): Collector running the reconciliation queries.
+
+        Returns:
+            dict: "flow_runs", "all_flow_runs" and "ongoing_flow_runs".
+        """
+        if self.event_store.needs_reconcile():
+            polled_at = datetime.now(timezone.utc)
+            results = await asyncio.gather(
+                flow_runs.get_flow_runs_info(),
+                flow_runs.get_all_flow_runs_info(),
+                flow_runs.get_ongoing_flow_runs_info(),
+            )
+            self.event_store.reconcile(
+                [flow_run for result in results for flow_run in result], polled_at
+            )
+
+        return self.event_store.window(datetime.now(timezone.utc))
+
+    def _run_fetches(self, fetches: dict, deadline=None) -> dict:
+        """
+        Run the fetch tasks concurrently on the event loop.
+
+        Args:
+            fetches (dict): Mapping of resource name -> zero-argument coroutine function.
+            deadline (Deadline, optional): Tasks not done when it passes are
+                cancelled, and tasks raising DeadlineExceeded are dropped. Default is None.
+
+        Returns:
+            dict: Mapping of resource name -> fetched result, for the tasks that completed.
+        """
+        return self._run(self._profiled_gather(fetches, deadline))
+
+    async def _profiled_gather(self, fetches: dict, deadline) -> dict:
+        # Profiles the event loop thread, where every fetch of the cycle runs.
+        if self.profiler is None:
+            return await self._gather(fetches, deadline)
+        with self.profiler.thread():
+            return await self._gather(fetches, deadline)
+
+    @staticmethod
+    async def _gather(fetches: dict, deadline=None) -> dict:
+        if deadline is None:
+            results = await asyncio.gather(*(fetch() for fetch in fetches.values()))
+            return dict(zip(fetches, results))
+
+        tasks = {
+            name: asyncio.ensure_future(fetch()) for name, fetch in fetches.items()
+        }
+        _, pending = await asyncio.wait(tasks.values(), timeout=deadline.remaining())
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+        results = {}
+        for name, task in tasks.items():
+            if task in pending:
+                continue
+            try:
+                results[name] = task.result()
+            except DeadlineExceeded:
+                pass
+        return results
@@ -0,0 +1,81 @@
+from prometheus_client.core import GaugeMetricFamily
+
+OTHER = "other"
+
+
+class CardinalityGovernor:
+    """
+    CardinalityGovernor class enforcing per-family series budgets before emission.
+
+    A family over its budget keeps its top ``budget - 1`` series by value
+    (e.g. the longest-running runs) and folds the remainder into a single
+    series whose labels are all "other", so the family never exceeds its
+    budget. How many series were folded is reported per family. One
+    governor is used per collection cycle.
+    """
+
+    def __init__(self, budgets: dict) -> None:
+        """
+        Initialize the CardinalityGovernor instance.
+
+        Args:
+            budgets (dict): Mapping of family name -> maximum series. Families not listed are unlimited.
+        """
+        self.budgets = budgets
+        self.dropped = {}
+
+    def limit(self, family: str, samples: list, fold=sum) -> list:
+        """
+        Apply the family's budget to its samples.
+
+        Args:
+            family (str): Metric family name.
+            samples (list): (label values, value) pairs.
+            fold (callable, optional): Combines the folded values into the "other" value. Default is sum.
+
+        Returns:
+            list: The samples to emit.
+        """
+        budget = self.budgets.get(family)
+        if budget is None or len(samples) <= budget:
+            if budget is not None:
+                self.dropped[family] = 0
+            return samples
+
+        budget = max(1, budget)
+        # sorted() is stable, so ties keep their input order.
+        ranked = sorted(samples, key=lambda sample: sample[1], reverse=True)
+        kept, folded = ranked[: budget - 1], ranked[budget - 1 :]
+        self.dropped[family] = len(folded)
+        other_labels = [OTHER] * len(folded[0][0])
+        return kept + [(other_labels, fold(value for _, value in folded))]
+
+    def family(self):
+        """
+        Build the dropped-series gauge for the families with a budget.
+        """
+        dropped = GaugeMetricFamily(
+            "prefect_exporter_cardinality_dropped_series",
+            "Series folded into the 'other' series by the family's series budget in the last collection",
+            labels=["family"],
+        )
+        for family, count in sorted(self.dropped.items()):
+            dropped.add_metric([family], count)
+        return dropped
+
+
+def parse_series_budgets(value: str) -> dict:
+    """
+    Parse "family=budget,family=budget" into a budgets dict.
+
+    Args:
+        value (str): Comma-separated family=budget pairs. Empty means no budgets.
+
+    Returns:
+        dict: Mapping of family name -> maximum series.
+    """
+    budgets = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        family, _, budget = item.partition("=")
+        budgets[family.strip()] = int(budget)
+    return budgets
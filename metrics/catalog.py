@@ -0,0 +1,169 @@
+import threading
+import time
+
+
+class Catalog:
+    """
+    Catalog class indexing one cycle's deployments and flows by id.
+
+    Built once per collection cycle and shared by every metric family, so
+    resolving the deployment or flow of N runs costs O(N) dict lookups
+    instead of a scan of every deployment and flow per run.
+    """
+
+    def __init__(self, deployments, flows) -> None:
+        """
+        Initialize the Catalog instance.
+
+        Args:
+            deployments (list): Deployments, indexed by id.
+            flows (list): Flows, indexed by id.
+        """
+        self.deployments = self._index(deployments, "id")
+        self.flows = self._index(flows, "id")
+
+    @classmethod
+    def from_resources(cls, resources: dict) -> "Catalog":
+        return cls(resources["deployments"], resources["flows"])
+
+    @staticmethod
+    def _index(items, key: str) -> dict:
+        # The first item wins on duplicate keys, like the linear scans this replaces.
+        index = {}
+        for item in items:
+            value = item.get(key)
+            if value is not None:
+                index.setdefault(value, item)
+        return index
+
+    def deployment_name(self, deployment_id):
+        """Name of the deployment with ``deployment_id``, or "null" if unknown."""
+        return self._name(self.deployments, deployment_id)
+
+    def flow_name(self, flow_id):
+        """Name of the flow with ``flow_id``, or "null" if unknown."""
+        return self._name(self.flows, flow_id)
+
+    @staticmethod
+    def _name(index: dict, item_id):
+        item = index.get(item_id)
+        return "null" if item is None else item.get("name")
+
+
+class CatalogCache:
+    """
+    CatalogCache class keeping the slowly-changing catalog resources between cycles.
+
+    Deployments, flows and work pools (and their server-side counts) change a
+    few times a day, so each is reused for ``ttl`` seconds instead of being
+    re-fetched every cycle. A flow run that references a deployment or flow
+    missing from a cached list refreshes that list early; each unknown id
+    triggers at most one such refresh per TTL period, so runs of a deleted
+    deployment do not cause a refresh every cycle.
+    """
+
+    RESOURCES = (
+        "deployments",
+        "flows",
+        "work_pools",
+        "deployments_count",
+        "flows_count",
+        "work_pools_count",
+    )
+
+    # Catalog list -> (flow run field referencing it, failed_flow_runs key position).
+    REFERENCES = {
+        "deployments": ("deployment_id", 0),
+        "flows": ("flow_id", 1),
+    }
+
+    def __init__(self, ttl) -> None:
+        """
+        Initialize the CatalogCache instance.
+
+        Args:
+            ttl (float): Seconds a cached resource is reused before it is fetched again.
+        """
+        self.ttl = ttl
+        self.entries = {}
+        self.unresolved = {name: set() for name in self.REFERENCES}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, names) -> dict:
+        """
+        Return the cached resources among ``names`` that are still fresh.
+
+        Expired entries are evicted. Names outside RESOURCES are ignored.
+
+        Args:
+            names (iterable): Resource names a cycle needs.
+
+        Returns:
+            dict: Mapping of resource name -> cached value.
+        """
+        now = time.monotonic()
+        fresh = {}
+        with self.lock:
+            for name in names:
+                if name not in self.RESOURCES:
+                    continue
+                entry = self.entries.get(name)
+                if entry is not None and now - entry[1] >= self.ttl:
+                    del self.entries[name]
+                    self.evictions += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    # A full refresh gives previously unresolved ids another chance.
+                    self.unresolved.get(name, set()).clear()
+                else:
+                    self.hits += 1
+                    fresh[name] = entry[0]
+        return fresh
+
+    def store(self, resources: dict) -> None:
+        """
+        Cache the catalog resources among freshly fetched ``resources``.
+
+        Args:
+            resources (dict): Mapping of resource name -> fetched value.
+        """
+        now = time.monotonic()
+        with self.lock:
+            for name in self.RESOURCES:
+                if name in resources:
+                    self.entries[name] = (resources[name], now)
+
+    def unknown_references(self, resources: dict, cached: dict) -> set:
+        """
+        Find the cached resources to refresh because a flow run references an id they lack.
+
+        Args:
+            resources (dict): The cycle's resources, cached and fetched.
+            cached (dict): The resources served from the cache this cycle.
+
+        Returns:
+            set: Resource names to re-fetch, including their counts when cached.
+        """
+        stale = set()
+        with self.lock:
+            for name, (field, position) in self.REFERENCES.items():
+                referenced = {
+                    flow_run.get(field)
+                    for key in ("flow_runs", "all_flow_runs", "ongoing_flow_runs")
+                    for flow_run in resources.get(key, ())
+                }
+                referenced.update(
+                    group[position] for group in resources.get("failed_flow_runs", {})
+                )
+                known = {item.get("id") for item in resources[name]}
+                unknown = referenced - known - self.unresolved[name] - {None}
+                # Ids still unknown after this are not looked for again until the TTL expires.
+                self.unresolved[name] |= unknown
+                if unknown and name in cached:
+                    stale.update(n for n in (name, f"{name}_count") if n in cached)
+            self.misses += len(stale)
+        return stale
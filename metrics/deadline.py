@@ -0,0 +1,105 @@
+import contextvars
+import time
+from typing import Optional
+
+# Deadline of the scrape being served on the current thread, set by the
+# metrics server from Prometheus' X-Prometheus-Scrape-Timeout-Seconds header.
+scrape_deadline = contextvars.ContextVar("scrape_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised by a fetch that ran out of time before completing."""
+
+
+class Deadline:
+    """
+    Deadline class bounding the time a collection cycle may spend fetching.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        """
+        Initialize the Deadline instance.
+
+        Args:
+            seconds (float): Seconds from now until the deadline.
+        """
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def from_scrape_timeout(cls, header: Optional[str], margin: float):
+        """
+        Build the deadline of a scrape from its X-Prometheus-Scrape-Timeout-Seconds header.
+
+        Args:
+            header (str, optional): The header value, in seconds.
+            margin (float): Seconds kept back to encode and send the response.
+
+        Returns:
+            Deadline: The deadline, or None if the header is missing or invalid.
+        """
+        try:
+            timeout = float(header)
+        except (TypeError, ValueError):
+            return None
+        return cls(max(0.0, timeout - margin))
+
+    def remaining(self) -> float:
+        """Seconds left, 0 once expired."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    @staticmethod
+    def earliest(*deadlines):
+        """The earliest of ``deadlines``, ignoring None; None if all are None."""
+        deadlines = [deadline for deadline in deadlines if deadline is not None]
+        return min(deadlines, key=lambda d: d.expires_at, default=None)
+
+
+class StaleFallback:
+    """
+    StaleFallback class serving the last complete result of fetches cut short by a deadline.
+
+    Every fetch that completes replaces its resource's entry. A fetch that
+    did not complete in time is served from the entry instead, and its age
+    is reported so dashboards can tell the data is stale. A resource never
+    fetched completely is served empty.
+    """
+
+    def __init__(self) -> None:
+        self.entries = {}
+
+    def fill(self, names, resources: dict) -> dict:
+        """
+        Record the completed fetches and fill in the unfinished ones.
+
+        Args:
+            names (iterable): Resource names fetched this cycle.
+            resources (dict): Completed fetch results; updated in place.
+
+        Returns:
+            dict: Mapping of resource name -> age in seconds of the data served,
+                0 for this cycle's data. Resources with no data are omitted.
+        """
+        now = time.monotonic()
+        ages = {}
+        for name in names:
+            if name in resources:
+                self.entries[name] = (resources[name], now)
+                ages[name] = 0.0
+            elif name in self.entries:
+                value, fetched_at = self.entries[name]
+                resources[name] = value
+                ages[name] = now - fetched_at
+            else:
+                resources[name] = self._empty(name)
+        return ages
+
+    @staticmethod
+    def _empty(name: str):
+        if name.endswith("_count"):
+            return None
+        if name in ("failed_flow_runs", "flow_run_window"):
+            return {}
+        return []
@@ -15,6 +15,10 @@ class PrefectDeployments(PrefectApiMetric):
         enable_pagination,
         pagination_limit,
         uri="deployments",
+        limiter=None,
+        session=None,
+        stats=None,
+        deadline=None,
     ) -> None:
         """
         Initialize the PrefectDeployments instance.
@@ -25,6 +29,10 @@ class PrefectDeployments(PrefectApiMetric):
             max_retries (int): The maximum number of retries for HTTP requests.
             logger (obj): The logger object.
             uri (str, optional): The URI path for deployments endpoints. Default is "deployments".
+            limiter (obj, optional): Context manager bounding concurrent HTTP requests. Default is None.
+            session (requests.Session, optional): Shared pooled session. Default is None.
+            stats (ExporterStats, optional): Shared API call instrumentation. Default is None.
+            deadline (Deadline, optional): Fetching stops with DeadlineExceeded once it passes. Default is None.
             pagination_limit (int): The maximum number of pages to fetch.
         """
         super().__init__(
@@ -35,6 +43,10 @@ class PrefectDeployments(PrefectApiMetric):
             enable_pagination=enable_pagination,
             pagination_limit=pagination_limit,
             uri=uri,
+            limiter=limiter,
+            session=session,
+            stats=stats,
+            deadline=deadline,
         )
 
     def get_deployments_info(self) -> list:
@@ -48,3 +60,13 @@ class PrefectDeployments(PrefectApiMetric):
         all_deployments = self._get_with_pagination()
 
         return all_deployments
+
+    def count_deployments(self):
+        """
+        Count Prefect deployments server-side.
+
+        Returns:
+            int: Number of deployments, or None on failure.
+
+        """
+        return self._count()
@@ -0,0 +1,337 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from metrics.records import FlowRunRecord
+
+FLOW_RUN_RESOURCE_PREFIX = "prefect.flow-run."
+
+
+class FlowRunEventStore:
+    """
+    FlowRunEventStore class holding flow runs kept up to date by state-change events.
+
+    Serves the same three flow run lists the polling queries return
+    (started in the window, ended in the window, and ongoing) from memory.
+    Events only update runs that change while the exporter is listening, so
+    the store is rebuilt from the polling queries every ``reconcile_interval``
+    seconds, and whenever the stream (re)connects, to pick up anything missed.
+    """
+
+    # State types the ongoing flow runs query selects.
+    ONGOING_STATE_TYPES = ("RUNNING", "PENDING", "SCHEDULED")
+    TERMINAL_STATE_TYPES = ("COMPLETED", "FAILED", "CANCELLED", "CRASHED")
+
+    def __init__(self, offset_minutes, reconcile_interval) -> None:
+        """
+        Initialize the FlowRunEventStore instance.
+
+        Args:
+            offset_minutes (int): Time offset in minutes of the flow run window.
+            reconcile_interval (float): Seconds between reconciliations with the polling queries.
+        """
+        self.offset_minutes = offset_minutes
+        self.reconcile_interval = reconcile_interval
+        self.runs_by_id = {}
+        self.state_times = {}
+        self.reconciled_at = None
+        self.events_applied = 0
+        self.lock = threading.Lock()
+
+    def needs_reconcile(self) -> bool:
+        with self.lock:
+            return (
+                self.reconciled_at is None
+                or time.monotonic() - self.reconciled_at >= self.reconcile_interval
+            )
+
+    def mark_stale(self) -> None:
+        """Force a reconciliation on the next cycle, e.g. after events may have been missed."""
+        with self.lock:
+            self.reconciled_at = None
+
+    def reconcile(self, flow_runs, polled_at: datetime) -> None:
+        """
+        Replace the store with the result of the polling queries.
+
+        Runs changed by an event received after ``polled_at`` keep the event's
+        version, since the poll may have read them before the change.
+
+        Args:
+            flow_runs (list): Runs returned by the window and ongoing queries.
+            polled_at (datetime): When the polling queries started.
+        """
+        with self.lock:
+            runs_by_id = {flow_run.get("id"): flow_run for flow_run in flow_runs}
+            state_times = {}
+            for run_id, state_time in self.state_times.items():
+                if state_time >= polled_at and run_id in self.runs_by_id:
+                    runs_by_id[run_id] = self.runs_by_id[run_id]
+                    state_times[run_id] = state_time
+            self.runs_by_id = runs_by_id
+            self.state_times = state_times
+            self.reconciled_at = time.monotonic()
+
+    def apply(self, event) -> bool:
+        """
+        Update the run a flow run state-change event refers to.
+
+        Args:
+            event (prefect.events.Event): A "prefect.flow-run.*" event.
+
+        Returns:
+            bool: Whether the event changed the store. Events for other
+                resources, and events older than the run's last applied
+                state change, are ignored.
+        """
+        resource = event.resource
+        if not resource.id.startswith(FLOW_RUN_RESOURCE_PREFIX):
+            return False
+        state_type = resource.get("prefect.state-type")
+        if state_type is None:
+            return False
+
+        run_id = resource.id[len(FLOW_RUN_RESOURCE_PREFIX) :]
+        state_time = self._parse_time(resource.get("prefect.state-timestamp"))
+        if state_time is None:
+            state_time = event.occurred
+
+        with self.lock:
+            last_state_time = self.state_times.get(run_id)
+            if last_state_time is not None and state_time < last_state_time:
+                return False
+
+            current = self.runs_by_id.get(run_id)
+            flow_run = {"id": run_id}
+            if current is not None:
+                flow_run.update(
+                    (field, current.get(field))
+                    for field in FlowRunRecord.__slots__
+                    if field in current
+                )
+            flow_run["name"] = resource.get(
+                "prefect.resource.name", flow_run.get("name")
+            )
+            flow_run["state_type"] = state_type
+            flow_run["state_name"] = resource.get(
+                "prefect.state-name", flow_run.get("state_name")
+            )
+            for related in event.related:
+                role = related.role
+                if role == "flow":
+                    flow_run["flow_id"] = related.id.rsplit(".", 1)[-1]
+                elif role == "deployment":
+                    flow_run["deployment_id"] = related.id.rsplit(".", 1)[-1]
+                elif role == "work-queue":
+                    flow_run["work_queue_name"] = related.get("prefect.resource.name")
+
+            timestamp = state_time.isoformat()
+            if state_type == "RUNNING" and not flow_run.get("start_time"):
+                flow_run["start_time"] = timestamp
+            if state_type in self.TERMINAL_STATE_TYPES:
+                flow_run["end_time"] = timestamp
+                started = self._parse_time(flow_run.get("start_time"))
+                # Approximate until the next reconciliation, which reads the
+                # server's value (excluding time spent paused).
+                flow_run["total_run_time"] = (
+                    max(0.0, (state_time - started).total_seconds()) if started else 0.0
+                )
+            else:
+                flow_run["end_time"] = None
+
+            self.runs_by_id[run_id] = FlowRunRecord.from_json(flow_run)
+            self.state_times[run_id] = state_time
+            self.events_applied += 1
+        return True
+
+    def window(self, now: datetime) -> dict:
+        """
+        Expire runs that are neither in the window nor ongoing, and split the rest like the queries.
+
+        Args:
+            now (datetime): Current time.
+
+        Returns:
+            dict: "flow_runs", "all_flow_runs" and "ongoing_flow_runs", as
+                get_flow_runs_info(), get_all_flow_runs_info() and
+                get_ongoing_flow_runs_info() would return them.
+        """
+        cutoff = now - timedelta(minutes=self.offset_minutes)
+        flow_runs = []
+        all_flow_runs = []
+        ongoing_flow_runs = []
+        with self.lock:
+            for run_id, flow_run in list(self.runs_by_id.items()):
+                started = self._parse_time(flow_run.get("start_time"))
+                ended = self._parse_time(flow_run.get("end_time"))
+                in_started = started is not None and started >= cutoff
+                in_ended = ended is not None and ended >= cutoff
+                ongoing = (
+                    ended is None
+                    and str(flow_run.get("state_type")) in self.ONGOING_STATE_TYPES
+                )
+                if in_started:
+                    flow_runs.append(flow_run)
+                if in_ended:
+                    all_flow_runs.append(flow_run)
+                if ongoing:
+                    ongoing_flow_runs.append(flow_run)
+                if not (in_started or in_ended or ongoing):
+                    del self.runs_by_id[run_id]
+                    self.state_times.pop(run_id, None)
+
+        return {
+            "flow_runs": flow_runs,
+            "all_flow_runs": all_flow_runs,
+            "ongoing_flow_runs": ongoing_flow_runs,
+        }
+
+    @staticmethod
+    def _parse_time(value) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed
+
+
+class FlowRunEventListener:
+    """
+    FlowRunEventListener class feeding flow run state-change events into a FlowRunEventStore.
+
+    Subscribes to the Prefect events websocket (``/events/out``) on a
+    dedicated thread and event loop. Prefect's own subscriber handles the
+    auth handshake, event filter, de-duplication and short reconnects; if it
+    gives up, the listener waits and subscribes again, marking the store
+    stale so the next cycle reconciles.
+    """
+
+    # Seconds to wait before subscribing again after the subscriber gave up.
+    RESUBSCRIBE_DELAY = 5
+
+    def __init__(
+        self,
+        url,
+        store,
+        logger,
+        reconnection_attempts=10,
+        api_key="",
+        api_auth_string="",
+    ) -> None:
+        """
+        Initialize the FlowRunEventListener instance.
+
+        Args:
+            url (str): The URL of the Prefect API.
+            store (FlowRunEventStore): Store the events are applied to.
+            logger (obj): The logger object.
+            reconnection_attempts (int, optional): Reconnects Prefect's subscriber tries before giving up. Default is 10.
+            api_key (str, optional): Prefect Cloud API key to authenticate with. Default is PREFECT_API_KEY's setting.
+            api_auth_string (str, optional): "user:password" to authenticate with on a self-hosted server. Default is PREFECT_API_AUTH_STRING's setting.
+        """
+        self.url = url
+        self.store = store
+        self.logger = logger
+        self.reconnection_attempts = reconnection_attempts
+        self.api_key = api_key
+        self.api_auth_string = api_auth_string
+        self.connected = threading.Event()
+        self._loop = None
+        self._task = None
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Start listening on a daemon thread.
+        """
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self._listen())
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name="prefect-event-listener",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout=None) -> None:
+        """
+        Stop listening and wait for the thread to exit.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the thread. Default is None.
+        """
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join(timeout)
+        self._loop.close()
+        self._thread = None
+
+    def _run_loop(self) -> None:
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+
+    def _subscriber(self):
+        from prefect.events.clients import (
+            PrefectCloudEventSubscriber,
+            PrefectEventSubscriber,
+        )
+        from prefect.events.filters import EventFilter, EventNameFilter
+        from prefect.settings import (
+            PREFECT_API_AUTH_STRING,
+            PREFECT_CLOUD_API_URL,
+            temporary_settings,
+        )
+
+        event_filter = EventFilter(
+            event=EventNameFilter(prefix=[FLOW_RUN_RESOURCE_PREFIX])
+        )
+        if self.url.startswith(PREFECT_CLOUD_API_URL.value()):
+            return PrefectCloudEventSubscriber(
+                api_url=self.url,
+                api_key=self.api_key or None,
+                filter=event_filter,
+                reconnection_attempts=self.reconnection_attempts,
+            )
+        # The self-hosted subscriber reads its auth string from the settings
+        # when built, so each workspace's is applied around construction.
+        updates = {}
+        if self.api_auth_string:
+            updates[PREFECT_API_AUTH_STRING] = self.api_auth_string
+        with temporary_settings(updates=updates):
+            return PrefectEventSubscriber(
+                api_url=self.url,
+                filter=event_filter,
+                reconnection_attempts=self.reconnection_attempts,
+            )
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self._subscriber() as subscriber:
+                    self.connected.set()
+                    # Events may have been missed while disconnected.
+                    self.store.mark_stale()
+                    self.logger.info("Subscribed to the Prefect flow run event stream")
+                    async for event in subscriber:
+                        self.store.apply(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.logger.exception(
+                    "Prefect event stream failed, subscribing again in %ss",
+                    self.RESUBSCRIBE_DELAY,
+                )
+            self.connected.clear()
+            self.store.mark_stale()
+            await asyncio.sleep(self.RESUBSCRIBE_DELAY)
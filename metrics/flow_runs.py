@@ -1,12 +1,19 @@
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 from metrics.api_metric import PrefectApiMetric
+from metrics.records import FlowRunRecord
 
 
-class PrefectFlowRuns(PrefectApiMetric):
+class FlowRunQueries:
     """
-    PrefectFlowRuns class for interacting with Prefect's flow runs endpoints.
+    FlowRunQueries mixin holding the flow run filter bodies and result shaping.
+
+    Shared by the requests-based and asyncio-based flow run collectors so both
+    engines issue identical queries. Expects ``after_data_fmt`` on the instance.
     """
 
     # All terminal/non-terminal state types Prefect can report. get_flow_runs_info()
@@ -26,6 +33,263 @@ class PrefectFlowRuns(PrefectApiMetric):
         "CRASHED",
     ]
 
+    # States a run can leave without its start_time or end_time changing, e.g.
+    # RUNNING -> PAUSED. Incremental sync re-polls runs in these states.
+    NON_TERMINAL_STATE_TYPES = [
+        "SCHEDULED",
+        "PENDING",
+        "RUNNING",
+        "PAUSED",
+        "CANCELLING",
+    ]
+
+    # Keyset pagination seeks on expected_start_time, which Prefect sets on a
+    # run's first state (unlike start_time, which is null until a run starts).
+    # Runs without it may be skipped, see KeysetCursor; the filters here all
+    # select runs that have a state, hence a timestamp.
+    KEYSET = ("expected_start_time", "EXPECTED_START_TIME_ASC")
+
+    # Flow run windows can hold tens of thousands of runs; keep only the fields
+    # the metrics read.
+    RECORD = FlowRunRecord
+
+    # Shard whose flow runs the queries select; None selects every run.
+    shard = None
+
+    @staticmethod
+    def _format_after(offset_minutes) -> str:
+        """
+        Format the start of the lookup window as a Prefect API timestamp.
+
+        Args:
+            offset_minutes (int): Time offset in minutes.
+
+        Returns:
+            str: UTC timestamp ``offset_minutes`` ago.
+        """
+        after_data = datetime.now(timezone.utc) - timedelta(minutes=offset_minutes)
+        return after_data.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+    def _sharded(self, body: dict) -> dict:
+        """Restrict a flow run filter body to the runs of ``shard``, if any."""
+        if self.shard is not None:
+            body["flow_runs"]["deployment_id"] = self.shard.deployment_filter()
+        return body
+
+    def _flow_runs_by_state_filter(self, state_type: str) -> dict:
+        return self._sharded(
+            {
+                "flow_runs": {
+                    "operator": "and_",
+                    "start_time": {"after_": f"{self.after_data_fmt}"},
+                    "state": {"type": {"any_": [state_type]}},
+                }
+            }
+        )
+
+    def _all_flow_runs_filter(self, sharded: bool = True) -> dict:
+        body = {
+            "flow_runs": {
+                "operator": "and_",
+                "end_time": {"after_": f"{self.after_data_fmt}"},
+            }
+        }
+        return self._sharded(body) if sharded else body
+
+    def _started_since_filter(self, after: str) -> dict:
+        return self._sharded(
+            {
+                "flow_runs": {
+                    "operator": "and_",
+                    "start_time": {"after_": after},
+                }
+            }
+        )
+
+    def _ended_since_filter(self, after: str) -> dict:
+        return self._sharded(
+            {
+                "flow_runs": {
+                    "operator": "and_",
+                    "end_time": {"after_": after},
+                }
+            }
+        )
+
+    def _ongoing_flow_runs_filter(self) -> dict:
+        return self._sharded(
+            {
+                "flow_runs": {
+                    "operator": "and_",
+                    "end_time": {"is_null_": True},
+                    "state": {"type": {"any_": ["RUNNING", "PENDING", "SCHEDULED"]}},
+                }
+            }
+        )
+
+    def _failed_flow_runs_filter(self) -> dict:
+        deployment_id = {"is_null_": False}
+        if self.shard is not None:
+            deployment_id = self.shard.deployment_filter(include_adhoc=False)
+        return {
+            "flow_runs": {
+                "operator": "and_",
+                "state": {"type": {"any_": ["FAILED", "CRASHED"]}},
+                "start_time": {"after_": f"{self.after_data_fmt}"},
+                "deployment_id": deployment_id,
+            },
+            "sort": "START_TIME_DESC",
+        }
+
+    @staticmethod
+    def _merge_by_id(state_results) -> list:
+        """
+        Merge per-state results in order, de-duplicated by run id.
+
+        Args:
+            state_results (list): One list of flow runs per state type.
+
+        Returns:
+            list: Flow runs across all state types.
+        """
+        flow_runs_by_id = {}
+        for state_flow_runs in state_results:
+            for flow_run in state_flow_runs:
+                # A run can only hold one state, but de-dupe by id defensively so a
+                # run observed transitioning between queries is never double-counted.
+                flow_runs_by_id[flow_run.get("id")] = flow_run
+
+        return list(flow_runs_by_id.values())
+
+    @staticmethod
+    def _group_failed(all_failed, limit: int) -> dict:
+        """
+        Keep the ``limit`` most recent failed run ids per (deployment_id, flow_id, state_name).
+
+        Args:
+            all_failed (list): Failed flow runs, in any order.
+            limit (int): Maximum number of run ids to keep per key.
+
+        Returns:
+            dict: Mapping of (deployment_id, flow_id, state_name) -> [run_id, ...]
+        """
+        # Offset pagination already returns START_TIME_DESC; keyset pagination
+        # returns runs in keyset order, so order by start_time here (stable).
+        all_failed = sorted(
+            all_failed, key=lambda run: run.get("start_time") or "", reverse=True
+        )
+
+        result = defaultdict(list)
+        for flow_run in all_failed:
+            key = (
+                flow_run.get("deployment_id"),
+                flow_run.get("flow_id"),
+                flow_run.get("state_name"),
+            )
+            if len(result[key]) < limit:
+                result[key].append(str(flow_run.get("id", "null")))
+
+        return result
+
+
+class FlowRunIndex:
+    """
+    FlowRunIndex class for incrementally synchronizing the flow run window.
+
+    Holds every run whose start_time or end_time falls inside the
+    ``offset_minutes`` window, keyed by id, across collection cycles. The
+    Prefect API cannot filter flow runs by an updated timestamp, so a run's
+    changes are detected through the timestamps that move when it changes:
+    runs that started or ended after the last watermark, plus the runs in
+    non-terminal states, which can change state without either timestamp
+    moving. Every ``full_sync_every`` cycles the index is rebuilt from scratch
+    to drop deleted runs and correct any drift.
+    """
+
+    # Overlap between consecutive incremental queries, absorbing clock skew and
+    # runs committed slightly after their timestamp. Upserts make it harmless.
+    WATERMARK_OVERLAP = timedelta(minutes=1)
+
+    def __init__(self, offset_minutes, full_sync_every) -> None:
+        """
+        Initialize the FlowRunIndex instance.
+
+        Args:
+            offset_minutes (int): Time offset in minutes of the flow run window.
+            full_sync_every (int): Rebuild the index from scratch every N syncs.
+        """
+        self.offset_minutes = offset_minutes
+        self.full_sync_every = full_sync_every
+        self.runs_by_id = {}
+        self.watermark = None
+        self.syncs_since_full = 0
+        self.lock = threading.Lock()
+
+    def needs_full_sync(self) -> bool:
+        return self.watermark is None or self.syncs_since_full >= self.full_sync_every
+
+    def watermark_fmt(self) -> str:
+        """Start of the next incremental query, in Prefect API format."""
+        after = self.watermark - self.WATERMARK_OVERLAP
+        return after.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+    def replace(self, flow_runs, synced_at: datetime) -> None:
+        self.runs_by_id = {flow_run.get("id"): flow_run for flow_run in flow_runs}
+        self.watermark = synced_at
+        self.syncs_since_full = 0
+
+    def upsert(self, flow_runs, synced_at: datetime) -> None:
+        for flow_run in flow_runs:
+            self.runs_by_id[flow_run.get("id")] = flow_run
+        self.watermark = synced_at
+        self.syncs_since_full += 1
+
+    def window(self, now: datetime) -> dict:
+        """
+        Expire runs that left the window and split the rest like the full queries.
+
+        Args:
+            now (datetime): Current time.
+
+        Returns:
+            dict: "flow_runs" (started in the window, as get_flow_runs_info()) and
+                "all_flow_runs" (ended in the window, as get_all_flow_runs_info()).
+        """
+        cutoff = now - timedelta(minutes=self.offset_minutes)
+        flow_runs = []
+        all_flow_runs = []
+        for run_id, flow_run in list(self.runs_by_id.items()):
+            started = self._parse_time(flow_run.get("start_time"))
+            ended = self._parse_time(flow_run.get("end_time"))
+            in_started = started is not None and started >= cutoff
+            in_ended = ended is not None and ended >= cutoff
+            if in_started:
+                flow_runs.append(flow_run)
+            if in_ended:
+                all_flow_runs.append(flow_run)
+            if not in_started and not in_ended:
+                del self.runs_by_id[run_id]
+
+        return {"flow_runs": flow_runs, "all_flow_runs": all_flow_runs}
+
+    @staticmethod
+    def _parse_time(value) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed
+
+
+class PrefectFlowRuns(FlowRunQueries, PrefectApiMetric):
+    """
+    PrefectFlowRuns class for interacting with Prefect's flow runs endpoints.
+    """
+
     def __init__(
         self,
         url,
@@ -36,6 +300,13 @@ class PrefectFlowRuns(PrefectApiMetric):
         enable_pagination,
         pagination_limit,
         uri="flow_runs",
+        max_concurrency=1,
+        limiter=None,
+        session=None,
+        stats=None,
+        deadline=None,
+        pagination_mode="offset",
+        shard=None,
     ) -> None:
         """
         Initialize the PrefectFlowRuns instance.
@@ -47,6 +318,13 @@ class PrefectFlowRuns(PrefectApiMetric):
             max_retries (int): The maximum number of retries for HTTP requests.
             logger (obj): The logger object.
             uri (str, optional): The URI path for flow runs endpoints. Default is "flow_runs".
+            max_concurrency (int, optional): Maximum per-state queries in flight in get_flow_runs_info(). Default is 1.
+            limiter (obj, optional): Context manager bounding concurrent HTTP requests. Default is None.
+            session (requests.Session, optional): Shared pooled session. Default is None.
+            stats (ExporterStats, optional): Shared API call instrumentation. Default is None.
+            deadline (Deadline, optional): Fetching stops with DeadlineExceeded once it passes. Default is None.
+            pagination_mode (str, optional): "offset" or "keyset". Default is "offset".
+            shard (Shard, optional): Only query the flow runs of this shard. Default is every flow run.
 
         """
         super().__init__(
@@ -57,11 +335,17 @@ class PrefectFlowRuns(PrefectApiMetric):
             enable_pagination=enable_pagination,
             pagination_limit=pagination_limit,
             uri=uri,
+            limiter=limiter,
+            session=session,
+            stats=stats,
+            deadline=deadline,
+            pagination_mode=pagination_mode,
         )
 
         # Calculate timestamps for before and after data
-        after_data = datetime.now(timezone.utc) - timedelta(minutes=offset_minutes)
-        self.after_data_fmt = after_data.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        self.after_data_fmt = self._format_after(offset_minutes)
+        self.max_concurrency = max_concurrency
+        self.shard = shard
 
     def get_flow_runs_info(self) -> list:
         """
@@ -74,26 +358,80 @@ class PrefectFlowRuns(PrefectApiMetric):
         ``prefect_info_flow_runs``. Splitting per state bounds each query by that
         state's own volume, so no state is silently truncated.
 
+        The per-state queries are independent, so up to ``max_concurrency`` of
+        them run at once. Results are merged in STATE_TYPES order regardless of
+        completion order, so the output matches the serial path.
+
         Returns:
             list: Flow runs across all state types, de-duplicated by run id.
 
         """
-        flow_runs_by_id = {}
-        for state_type in self.STATE_TYPES:
-            for flow_run in self._get_with_pagination(
-                base_data={
-                    "flow_runs": {
-                        "operator": "and_",
-                        "start_time": {"after_": f"{self.after_data_fmt}"},
-                        "state": {"type": {"any_": [state_type]}},
-                    }
-                }
-            ):
-                # A run can only hold one state, but de-dupe by id defensively so a
-                # run observed transitioning between queries is never double-counted.
-                flow_runs_by_id[flow_run.get("id")] = flow_run
+        if self.max_concurrency <= 1:
+            state_results = [
+                self._get_flow_runs_by_state(state_type)
+                for state_type in self.STATE_TYPES
+            ]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_concurrency, len(self.STATE_TYPES)),
+                thread_name_prefix="prefect-flow-runs",
+            ) as pool:
+                state_results = list(
+                    pool.map(self._get_flow_runs_by_state, self.STATE_TYPES)
+                )
 
-        return list(flow_runs_by_id.values())
+        return self._merge_by_id(state_results)
+
+    def sync_flow_run_index(self, index: FlowRunIndex) -> dict:
+        """
+        Bring ``index`` up to date and return the flow run window from it.
+
+        The first sync, and every ``index.full_sync_every`` syncs after it,
+        runs the full window queries. The others only fetch runs that started
+        or ended since the watermark, plus the non-terminal runs in the window,
+        so per-cycle API cost follows the number of changes, not window size.
+
+        Args:
+            index (FlowRunIndex): Index kept across collection cycles.
+
+        Returns:
+            dict: "flow_runs" and "all_flow_runs", as get_flow_runs_info() and
+                get_all_flow_runs_info() would return them.
+        """
+        with index.lock:
+            synced_at = datetime.now(timezone.utc)
+            if index.needs_full_sync():
+                index.replace(
+                    self.get_flow_runs_info() + self.get_all_flow_runs_info(),
+                    synced_at,
+                )
+            else:
+                after = index.watermark_fmt()
+                changed = self._get_with_pagination(
+                    base_data=self._started_since_filter(after)
+                )
+                changed += self._get_with_pagination(
+                    base_data=self._ended_since_filter(after)
+                )
+                for state_type in self.NON_TERMINAL_STATE_TYPES:
+                    changed += self._get_flow_runs_by_state(state_type)
+                index.upsert(changed, synced_at)
+
+            return index.window(datetime.now(timezone.utc))
+
+    def _get_flow_runs_by_state(self, state_type: str) -> list:
+        """
+        Get flow runs of a single state type within the time range.
+
+        Args:
+            state_type (str): One of STATE_TYPES.
+
+        Returns:
+            list: Flow runs currently in ``state_type``.
+        """
+        return self._get_with_pagination(
+            base_data=self._flow_runs_by_state_filter(state_type)
+        )
 
     def get_all_flow_runs_info(self) -> list:
         """
@@ -103,16 +441,23 @@ class PrefectFlowRuns(PrefectApiMetric):
             dict: JSON response containing flow runs information.
         """
         all_flow_runs = self._get_with_pagination(
-            base_data={
-                "flow_runs": {
-                    "operator": "and_",
-                    "end_time": {"after_": f"{self.after_data_fmt}"},
-                }
-            }
+            base_data=self._all_flow_runs_filter()
         )
 
         return all_flow_runs
 
+    def count_all_flow_runs(self):
+        """
+        Count the flow runs get_all_flow_runs_info() returns, server-side.
+
+        The count covers every shard, since it backs the workspace-wide
+        prefect_flow_runs_total.
+
+        Returns:
+            int: Number of flow runs, or None on failure.
+        """
+        return self._count(base_data=self._all_flow_runs_filter(sharded=False))
+
     def get_ongoing_flow_runs_info(self) -> list:
         """
         Get information about ongoing flow runs
@@ -121,13 +466,7 @@ class PrefectFlowRuns(PrefectApiMetric):
             dict: JSON response containing ongoing flow runs information.
         """
         ongoing_flow_runs = self._get_with_pagination(
-            base_data={
-                "flow_runs": {
-                    "operator": "and_",
-                    "end_time": {"is_null_": True},
-                    "state": {"type": {"any_": ["RUNNING", "PENDING", "SCHEDULED"]}},
-                }
-            }
+            base_data=self._ongoing_flow_runs_filter()
         )
 
         return ongoing_flow_runs
@@ -143,25 +482,7 @@ class PrefectFlowRuns(PrefectApiMetric):
             dict: Mapping of (deployment_id, flow_id, state_name) -> [run_id, ...]
         """
         all_failed = self._get_with_pagination(
-            base_data={
-                "flow_runs": {
-                    "operator": "and_",
-                    "state": {"type": {"any_": ["FAILED", "CRASHED"]}},
-                    "start_time": {"after_": f"{self.after_data_fmt}"},
-                    "deployment_id": {"is_null_": False},
-                },
-                "sort": "START_TIME_DESC",
-            }
+            base_data=self._failed_flow_runs_filter()
         )
 
-        result = defaultdict(list)
-        for flow_run in all_failed:
-            key = (
-                flow_run.get("deployment_id"),
-                flow_run.get("flow_id"),
-                flow_run.get("state_name"),
-            )
-            if len(result[key]) < limit:
-                result[key].append(str(flow_run.get("id", "null")))
-
-        return result
+        return self._group_failed(all_failed, limit)
@@ -15,6 +15,10 @@ class PrefectFlows(PrefectApiMetric):
         enable_pagination,
         pagination_limit,
         uri="flows",
+        limiter=None,
+        session=None,
+        stats=None,
+        deadline=None,
     ) -> None:
         """
         Initialize the PrefectFlows instance.
@@ -25,6 +29,10 @@ class PrefectFlows(PrefectApiMetric):
             max_retries (int): The maximum number of retries for HTTP requests.
             logger (obj): The logger object.
             uri (str, optional): The URI path for administrative endpoints. Default is "flows".
+            limiter (obj, optional): Context manager bounding concurrent HTTP requests. Default is None.
+            session (requests.Session, optional): Shared pooled session. Default is None.
+            stats (ExporterStats, optional): Shared API call instrumentation. Default is None.
+            deadline (Deadline, optional): Fetching stops with DeadlineExceeded once it passes. Default is None.
 
         """
         super().__init__(
@@ -35,6 +43,10 @@ class PrefectFlows(PrefectApiMetric):
             enable_pagination=enable_pagination,
             pagination_limit=pagination_limit,
             uri=uri,
+            limiter=limiter,
+            session=session,
+            stats=stats,
+            deadline=deadline,
         )
 
     def get_flows_info(self) -> list:
@@ -48,3 +60,13 @@ class PrefectFlows(PrefectApiMetric):
         all_flows = self._get_with_pagination()
 
         return all_flows
+
+    def count_flows(self):
+        """
+        Count Prefect flows server-side.
+
+        Returns:
+            int: Number of flows, or None on failure.
+
+        """
+        return self._count()
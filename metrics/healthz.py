@@ -9,7 +9,9 @@ class PrefectHealthz:
     PrefectHealthz class for interacting with Prefect's health endpoints.
     """
 
-    def __init__(self, url, headers, max_retries, logger, uri=None) -> None:
+    def __init__(
+        self, url, headers, max_retries, logger, uri=None, session=None
+    ) -> None:
         """
         Initialize the PrefectHealthz instance.
 
@@ -19,6 +21,7 @@ class PrefectHealthz:
             max_retries (int): The maximum number of retries for HTTP requests.
             logger (obj): The logger object.
             uri (str, optional): The URI path for health endpoint. Default is None.
+            session (requests.Session, optional): Shared pooled session. Default is the module-level requests API.
 
         """
         self.headers = headers
@@ -26,6 +29,7 @@ class PrefectHealthz:
         self.url = url
         self.max_retries = max_retries
         self.logger = logger
+        self.session = session if session is not None else requests
 
     def get_health_check(self) -> None:
         """
@@ -39,7 +43,7 @@ class PrefectHealthz:
 
         for retry in range(self.max_retries):
             try:
-                resp = requests.get(endpoint, headers=self.headers)
+                resp = self.session.get(endpoint, headers=self.headers)
                 resp.raise_for_status()
                 self.logger.info(
                     f"Prefect health check: {resp.status_code} - {resp.reason}"
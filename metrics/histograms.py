@@ -0,0 +1,80 @@
+from bisect import bisect_left
+
+from prometheus_client.core import HistogramMetricFamily
+
+# Flow run durations span seconds to days; upper bounds in seconds.
+DEFAULT_RUN_TIME_BUCKETS = (
+    1,
+    5,
+    15,
+    30,
+    60,
+    300,
+    900,
+    1800,
+    3600,
+    7200,
+    21600,
+    43200,
+    86400,
+)
+
+
+class HistogramAggregator:
+    """
+    HistogramAggregator class building histogram series in a single pass over observations.
+
+    Each observation adds to one bucket of its label set, with a binary
+    search over the upper bounds. Cumulative bucket counts are only computed
+    when the family is built, so the cost is O(observations x log(buckets))
+    and the exposition holds one series per label set, however many
+    observations there are.
+    """
+
+    def __init__(self, buckets=DEFAULT_RUN_TIME_BUCKETS) -> None:
+        """
+        Initialize the HistogramAggregator instance.
+
+        Args:
+            buckets (iterable): Bucket upper bounds. +Inf is added implicitly.
+        """
+        self.buckets = sorted(float(bound) for bound in buckets)
+        self.series = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        """
+        Record one observation.
+
+        Args:
+            labels (tuple): Label values of the series.
+            value (float): Observed value.
+        """
+        series = self.series.get(labels)
+        if series is None:
+            # One count per bucket plus +Inf, then the sum.
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def family(self, name: str, documentation: str, labels: list):
+        """
+        Build the histogram family from the recorded observations.
+
+        Args:
+            name (str): Metric name.
+            documentation (str): Metric help text.
+            labels (list): Label names, in the order of the observed label tuples.
+
+        Returns:
+            HistogramMetricFamily: The family, with one series per label set.
+        """
+        family = HistogramMetricFamily(name, documentation, labels=labels)
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        for label_values, series in self.series.items():
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(bounds, series[:-1]):
+                cumulative += count
+                buckets.append((bound, cumulative))
+            family.add_metric(list(label_values), buckets, series[-1])
+        return family
@@ -0,0 +1,173 @@
+import threading
+from collections import defaultdict
+
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from metrics.histograms import HistogramAggregator
+
+# Upper bounds in seconds of the API request latency histogram.
+REQUEST_DURATION_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+)
+
+
+class ExporterStats:
+    """
+    ExporterStats class recording the exporter's own API traffic and collection timings.
+
+    Shared by every collector and updated from the fetch threads, so each
+    update takes a lock; updates are a few dict operations and a binary search,
+    negligible next to the HTTP request they describe. Endpoints are labeled
+    by their path template relative to the API URL, e.g. "flow_runs/filter".
+    """
+
+    def __init__(self) -> None:
+        self.request_durations = HistogramAggregator(REQUEST_DURATION_BUCKETS)
+        self.retries = defaultdict(int)
+        self.retry_after_aborts = defaultdict(int)
+        self.pages = defaultdict(int)
+        self.response_bytes = defaultdict(int)
+        self.family_build_seconds = {}
+        self.fetch_duration = None
+        self.cycle_duration = None
+        self.lock = threading.Lock()
+
+    def observe_request(self, endpoint: str, seconds: float, size: int) -> None:
+        """
+        Record one HTTP response.
+
+        Args:
+            endpoint (str): Endpoint path template.
+            seconds (float): Time until the response was received.
+            size (int): Response body size in bytes.
+        """
+        with self.lock:
+            self.request_durations.observe((endpoint,), seconds)
+            self.response_bytes[endpoint] += size
+
+    def observe_retry(self, endpoint: str) -> None:
+        with self.lock:
+            self.retries[endpoint] += 1
+
+    def observe_retry_after_abort(self, endpoint: str) -> None:
+        with self.lock:
+            self.retry_after_aborts[endpoint] += 1
+
+    def observe_page(self, endpoint: str) -> None:
+        with self.lock:
+            self.pages[endpoint] += 1
+
+    def observe_cycle(
+        self, fetch_seconds: float, family_build_seconds: dict, total_seconds: float
+    ) -> None:
+        """
+        Record the timings of a completed collection cycle.
+
+        Args:
+            fetch_seconds (float): Time spent fetching resources.
+            family_build_seconds (dict): Mapping of family name -> time spent building it.
+            total_seconds (float): Duration of the whole cycle.
+        """
+        with self.lock:
+            self.fetch_duration = fetch_seconds
+            self.family_build_seconds = family_build_seconds
+            self.cycle_duration = total_seconds
+
+
+class PrefectExporterMetrics:
+    """
+    PrefectExporterMetrics collector exposing ExporterStats.
+    """
+
+    def __init__(self, stats: ExporterStats) -> None:
+        """
+        Initialize the PrefectExporterMetrics instance.
+
+        Args:
+            stats (ExporterStats): Stats shared with the collectors.
+        """
+        self.stats = stats
+
+    def collect(self):
+        # Build the families under the lock, but yield them after releasing it:
+        # the consumer may be a slow encoder or client, and the fetch threads
+        # recording their requests must not wait on it.
+        with self.stats.lock:
+            families = self._families()
+        yield from families
+
+    def _families(self) -> list:
+        stats = self.stats
+        families = [
+            stats.request_durations.family(
+                "prefect_exporter_api_request_duration_seconds",
+                "Latency of Prefect API requests, per endpoint",
+                ["endpoint"],
+            )
+        ]
+        for name, documentation, values in (
+            (
+                "prefect_exporter_api_retries",
+                "Prefect API requests retried after an error",
+                stats.retries,
+            ),
+            (
+                "prefect_exporter_api_retry_after_aborts",
+                "Prefect API requests abandoned because the server sent Retry-After",
+                stats.retry_after_aborts,
+            ),
+            (
+                "prefect_exporter_api_pages",
+                "Result pages fetched from Prefect API filter endpoints",
+                stats.pages,
+            ),
+            (
+                "prefect_exporter_api_response_bytes",
+                "Bytes received in Prefect API response bodies",
+                stats.response_bytes,
+            ),
+        ):
+            counter = CounterMetricFamily(name, documentation, labels=["endpoint"])
+            for endpoint, value in sorted(values.items()):
+                counter.add_metric([endpoint], value)
+            families.append(counter)
+
+        if stats.cycle_duration is None:
+            return families
+
+        fetch_duration = GaugeMetricFamily(
+            "prefect_exporter_fetch_duration_seconds",
+            "Time the last collection cycle spent fetching from the Prefect API",
+            labels=[],
+        )
+        fetch_duration.add_metric([], stats.fetch_duration)
+        families.append(fetch_duration)
+
+        family_build = GaugeMetricFamily(
+            "prefect_exporter_family_build_seconds",
+            "Time the last collection cycle spent building each metric family",
+            labels=["family"],
+        )
+        for family, seconds in sorted(stats.family_build_seconds.items()):
+            family_build.add_metric([family], seconds)
+        families.append(family_build)
+
+        cycle_duration = GaugeMetricFamily(
+            "prefect_exporter_cycle_duration_seconds",
+            "Duration of the last collection cycle, fetching and building",
+            labels=[],
+        )
+        cycle_duration.add_metric([], stats.cycle_duration)
+        families.append(cycle_duration)
+        return families
@@ -1,17 +1,28 @@
+import threading
 import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone
+from functools import partial
 
 import requests
 from prefect.client.schemas.objects import CsrfToken
-from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
 
+from metrics.cardinality import CardinalityGovernor
+from metrics.catalog import Catalog, CatalogCache
+from metrics.deadline import Deadline, DeadlineExceeded, StaleFallback, scrape_deadline
 from metrics.deployments import PrefectDeployments
-from metrics.flow_runs import PrefectFlowRuns
+from metrics.events import FlowRunEventListener, FlowRunEventStore
+from metrics.flow_runs import FlowRunIndex, PrefectFlowRuns
 from metrics.flows import PrefectFlows
+from metrics.histograms import DEFAULT_RUN_TIME_BUCKETS, HistogramAggregator
+from metrics.instrumentation import ExporterStats
 from metrics.retry_after import detect_retry_after, log_retry_after
+from metrics.schedule import RefreshSchedule
+from metrics.snapshot import SingleFlight, SnapshotRefresher
 from metrics.work_pools import PrefectWorkPools
-from metrics.work_queues import PrefectWorkQueues
+from metrics.work_queues import PrefectWorkQueues, WorkQueueStatusCache
 
 
 class PrefectMetrics(object):
@@ -19,6 +30,17 @@ class PrefectMetrics(object):
     PrefectMetrics class for collecting and exposing Prometheus metrics related to Prefect.
     """
 
+    # Workspace-wide families, emitted by the designated shard only when sharding.
+    TOTAL_FAMILIES = frozenset(
+        {
+            "prefect_deployments_total",
+            "prefect_flows_total",
+            "prefect_flow_runs_total",
+            "prefect_work_pools_total",
+            "prefect_work_queues_total",
+        }
+    )
+
     def __init__(
         self,
         url,
@@ -33,6 +55,30 @@ class PrefectMetrics(object):
         enable_pagination,
         pagination_limit,
         enable_flow_run_name_label=False,
+        refresh_interval=0,
+        fetch_concurrency=1,
+        session=None,
+        pagination_mode="offset",
+        enable_count_queries=False,
+        enable_incremental_flow_runs=False,
+        incremental_full_sync_every=30,
+        catalog_ttl=0,
+        work_queue_status_concurrency=1,
+        work_queue_status_ttl=0,
+        work_queue_status_batch_size=0,
+        enable_event_stream=False,
+        event_reconcile_interval=300,
+        enable_run_time_histogram=False,
+        run_time_buckets=DEFAULT_RUN_TIME_BUCKETS,
+        series_budgets=None,
+        stats=None,
+        profiler=None,
+        coalesce_window=0,
+        deadline_budget=0,
+        shard=None,
+        refresh_schedule=None,
+        api_key="",
+        api_auth_string="",
     ) -> None:
         """
         Initialize the PrefectMetrics instance.
@@ -50,6 +96,30 @@ class PrefectMetrics(object):
             enable_pagination (bool): Whether pagination is enabled.
             pagination_limit (int): The pagination limit.
             enable_flow_run_name_label (bool): Whether to include flow_run_name in prefect_info_flow_runs and prefect_flow_runs_ongoing_run_time.
+            refresh_interval (float): Seconds between background refreshes. 0 collects synchronously on every scrape.
+            fetch_concurrency (int): Maximum resource queries in flight per collection cycle, and per-state flow run queries within get_flow_runs_info(). 1 fetches serially.
+            session (requests.Session, optional): Shared pooled session used by every collector. Default is the module-level requests API.
+            pagination_mode (str): "offset" or "keyset" pagination for flow run queries.
+            enable_count_queries (bool): Whether *_total metrics use server-side /count queries.
+            enable_incremental_flow_runs (bool): Whether to keep the flow run window in an index synchronized incrementally.
+            incremental_full_sync_every (int): Rebuild the incremental index from scratch every N cycles.
+            catalog_ttl (float): Seconds deployments, flows and work pools are cached between cycles. 0 fetches them every cycle.
+            work_queue_status_concurrency (int): Maximum work queue status requests in flight.
+            work_queue_status_ttl (float): Seconds a work queue status is reused between cycles.
+            work_queue_status_batch_size (int): Maximum expired work queue statuses refreshed per cycle. 0 refreshes all of them.
+            enable_event_stream (bool): Whether to keep flow runs up to date from the Prefect events websocket instead of polling them every cycle.
+            event_reconcile_interval (float): Seconds between polls that reconcile the event-driven flow runs.
+            enable_run_time_histogram (bool): Whether to replace the per-run prefect_flow_runs_total_run_time gauge with a per-deployment/flow histogram.
+            run_time_buckets (iterable): Upper bounds in seconds of the run time histogram buckets.
+            series_budgets (dict, optional): Mapping of metric family name -> maximum series emitted. Default is no limits.
+            stats (ExporterStats, optional): Records API calls and collection timings, exposed by PrefectExporterMetrics. Default is a private instance.
+            profiler (CycleProfiler, optional): Profiles collection cycles when armed. Default is None.
+            coalesce_window (float): Without background refreshing, seconds a finished collection is reused by later scrapes. Concurrent scrapes always share the in-flight collection.
+            deadline_budget (float): Seconds a collection cycle may spend fetching, on top of any scrape timeout sent by Prometheus. 0 means no budget.
+            shard (Shard, optional): Only query and emit the resources owned by this shard; the workspace-wide *_total families are emitted by the designated shard. Default is no sharding.
+            refresh_schedule (dict, optional): Mapping of refresh group (see REFRESH_GROUPS) -> seconds between refreshes of its resources. Default refreshes everything every cycle.
+            api_key (str, optional): Prefect Cloud API key the event stream authenticates with. Default is PREFECT_API_KEY's setting.
+            api_auth_string (str, optional): "user:password" the event stream of a self-hosted server authenticates with. Default is PREFECT_API_AUTH_STRING's setting.
         """
 
         self.headers = headers
@@ -66,26 +136,573 @@ class PrefectMetrics(object):
         self.enable_flow_run_name_label = enable_flow_run_name_label
         self.csrf_token = None
         self.csrf_token_expiration = None
+        self.refresh_interval = refresh_interval
+        self.fetch_concurrency = fetch_concurrency
+        self.session = session if session is not None else requests
+        self.pagination_mode = pagination_mode
+        self.enable_count_queries = enable_count_queries
+        self.flow_run_index = None
+        if enable_incremental_flow_runs:
+            self.flow_run_index = FlowRunIndex(
+                offset_minutes, incremental_full_sync_every
+            )
+        self.catalog_cache = CatalogCache(catalog_ttl) if catalog_ttl > 0 else None
+        self.enable_run_time_histogram = enable_run_time_histogram
+        self.run_time_buckets = run_time_buckets
+        self.series_budgets = series_budgets or {}
+        self.stats = stats if stats is not None else ExporterStats()
+        self.profiler = profiler
+        self.deadline_budget = deadline_budget
+        self.stale_fallback = StaleFallback()
+        self.resource_staleness = {}
+        self.deadline_exceeded = 0
+        self.shard = shard
+        self.refresh_schedule = (
+            RefreshSchedule(refresh_schedule) if refresh_schedule else None
+        )
+        self.event_store = None
+        self.event_listener = None
+        if enable_event_stream:
+            if self.flow_run_index is not None:
+                logger.warning(
+                    "Incremental flow run sync is ignored when the event stream is enabled"
+                )
+                self.flow_run_index = None
+            self.event_store = FlowRunEventStore(
+                offset_minutes, event_reconcile_interval
+            )
+            self.event_listener = FlowRunEventListener(
+                url,
+                self.event_store,
+                logger,
+                api_key=api_key,
+                api_auth_string=api_auth_string,
+            )
+        self.work_queue_status_concurrency = work_queue_status_concurrency
+        self.work_queue_status_cache = WorkQueueStatusCache(
+            work_queue_status_ttl, work_queue_status_batch_size
+        )
+        # Shared by every collector so nested fan-out (e.g. per-state flow run
+        # queries inside a concurrent fetch) never exceeds fetch_concurrency.
+        self.request_limiter = threading.BoundedSemaphore(max(1, fetch_concurrency))
+        self.refresher = None
+        self.single_flight = None
+        if refresh_interval > 0:
+            self.refresher = SnapshotRefresher(
+                self._collect_metrics, refresh_interval, logger
+            )
+        else:
+            self.single_flight = SingleFlight(self._collect_metrics, coalesce_window)
+
+    def start(self) -> None:
+        """
+        Start background refreshing and the event stream listener, if configured.
+        """
+        if self.event_listener is not None:
+            self.event_listener.start()
+        if self.refresher is not None:
+            self.refresher.start()
+
+    def stop(self) -> None:
+        """
+        Stop background refreshing and the event stream listener.
+        """
+        if self.refresher is not None:
+            self.refresher.stop()
+        if self.event_listener is not None:
+            self.event_listener.stop()
 
     def collect(self):
         """
         Collect all Prefect metrics for a single Prometheus scrape.
 
-        On failure, logs the error and yields no metrics. The exporter stays
+        With background refreshing enabled, yields the families of the latest
+        snapshot without touching the Prefect API. Otherwise collects inline,
+        sharing one collection among concurrent scrapes (see SingleFlight);
+        on failure, logs the error and yields no metrics. The exporter stays
         alive so subsequent scrapes can succeed.
         """
+        if self.refresher is not None:
+            snapshot = self.refresher.snapshot
+            if snapshot is not None:
+                yield from snapshot.families
+            yield from self._snapshot_metrics(snapshot)
+            return
+
         try:
-            yield from self._collect_metrics()
+            yield from self.single_flight.collect()
         except Exception:
             self.logger.exception("Failed to collect metrics, skipping this scrape")
 
+        coalesced_scrapes = CounterMetricFamily(
+            "prefect_exporter_coalesced_scrapes",
+            "Scrapes served by another scrape's collection instead of their own",
+            labels=[],
+        )
+        coalesced_scrapes.add_metric([], self.single_flight.coalesced)
+        yield coalesced_scrapes
+
+    def wait_for_snapshot(self, timeout=None) -> bool:
+        """
+        Wait until collect() serves Prefect data, i.e. the first background refresh finished.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait. Default is no limit.
+
+        Returns:
+            bool: Whether it does. Always True without background refreshing,
+            since collect() then collects synchronously.
+        """
+        if self.refresher is None:
+            return True
+        return self.refresher.wait_for_snapshot(timeout)
+
+    def exposition_version(self):
+        """
+        Identify the data collect() would serve right now, see ExpositionCache.
+
+        Returns:
+            int: Changes whenever new data is collected, or None when the next
+            scrape collects anew (no snapshot yet, or the coalescing window elapsed).
+        """
+        if self.refresher is not None:
+            if self.refresher.snapshot is None:
+                return None
+            return self.refresher.generation
+        last = self.single_flight.last
+        if last is None or last.age() >= self.single_flight.window:
+            return None
+        return self.single_flight.generation
+
+    def _snapshot_metrics(self, snapshot):
+        """
+        Build the staleness metrics describing the snapshot being served.
+
+        Args:
+            snapshot (MetricsSnapshot): The current snapshot, or None before the first refresh.
+        """
+        if snapshot is not None:
+            snapshot_age = GaugeMetricFamily(
+                "prefect_exporter_snapshot_age_seconds",
+                "Seconds since the served metrics snapshot was built",
+                labels=[],
+            )
+            snapshot_age.add_metric([], snapshot.age())
+            yield snapshot_age
+
+            refresh_duration = GaugeMetricFamily(
+                "prefect_exporter_refresh_duration_seconds",
+                "Duration of the collection cycle that built the served snapshot",
+                labels=[],
+            )
+            refresh_duration.add_metric([], snapshot.refresh_duration)
+            yield refresh_duration
+
+        refresh_failures = CounterMetricFamily(
+            "prefect_exporter_refresh_failures",
+            "Background collection cycles that failed and kept the previous snapshot",
+            labels=[],
+        )
+        refresh_failures.add_metric([], self.refresher.refresh_failures)
+        yield refresh_failures
+
     def _collect_metrics(self):
         """
         Internal method that performs the actual metric collection.
+
+        When the profiler is armed, the cycle runs to completion under the
+        profiler before its families are yielded, so the profile excludes
+        the consumer's work.
+        """
+        profile = self.profiler.next_cycle() if self.profiler is not None else None
+        if profile is None:
+            yield from self._timed_cycle()
+            return
+        with profile:
+            families = list(self._timed_cycle())
+        yield from families
+
+    def _timed_cycle(self):
+        """
+        Fetch and build one cycle's families.
+
+        Times the fetch, each family's build (excluding the time the consumer
+        holds it between yields) and the whole cycle into ``stats``.
+        """
+        started = time.perf_counter()
+        resources = self._fetch_resources()
+        fetched = time.perf_counter()
+        build_seconds = defaultdict(float)
+        mark = fetched
+        for family in self._families(resources):
+            build_seconds[family.name] += time.perf_counter() - mark
+            yield family
+            mark = time.perf_counter()
+        self.stats.observe_cycle(
+            fetched - started, dict(build_seconds), time.perf_counter() - started
+        )
+
+    def _families(self, resources: dict):
+        for family in self._build_metrics(resources):
+            if family.name in self.TOTAL_FAMILIES and not self._emits_totals():
+                continue
+            yield family
+        if self.deadline_budget > 0 or self.resource_staleness:
+            yield from self._deadline_metrics()
+        if self.catalog_cache is not None:
+            yield from self._catalog_cache_metrics()
+        if self.event_store is not None:
+            yield from self._event_stream_metrics()
+        if self.shard is not None:
+            yield from self._shard_metrics(resources)
+        if self.refresh_schedule is not None:
+            yield from self._refresh_schedule_metrics()
+
+    def _deadline_metrics(self):
+        """
+        Build the metrics reporting cycles cut short by their deadline.
+        """
+        staleness = GaugeMetricFamily(
+            "prefect_exporter_resource_staleness_seconds",
+            "Age of the data served for each resource; non-zero when its fetch missed the deadline and earlier data was served",
+            labels=["resource"],
+        )
+        for resource, age in sorted(self.resource_staleness.items()):
+            staleness.add_metric([resource], age)
+        yield staleness
+
+        deadline_exceeded = CounterMetricFamily(
+            "prefect_exporter_deadline_exceeded",
+            "Collection cycles that served earlier data for fetches unfinished at the deadline",
+            labels=[],
+        )
+        deadline_exceeded.add_metric([], self.deadline_exceeded)
+        yield deadline_exceeded
+
+    def _shard_metrics(self, resources: dict):
+        """
+        Build the metric reporting how many resources this shard owns.
+
+        Args:
+            resources (dict): Output of _fetch_resources().
+        """
+        owned = GaugeMetricFamily(
+            "prefect_exporter_shard_owned_resources",
+            "Resources owned by this exporter's shard",
+            labels=["resource", "shard"],
+        )
+        shard = f"{self.shard.index}/{self.shard.count}"
+        for name in ("deployments", "flows", "work_pools", "work_queues"):
+            count = sum(1 for item in resources[name] if self.shard.owns(item["id"]))
+            owned.add_metric([name, shard], count)
+        yield owned
+
+    def _refresh_schedule_metrics(self):
+        """
+        Build the metric reporting the age of each scheduled group's data.
+        """
+        group_age = GaugeMetricFamily(
+            "prefect_exporter_refresh_group_age_seconds",
+            "Seconds since the data served for each scheduled refresh group was fetched",
+            labels=["group"],
+        )
+        for group, age in sorted(self.refresh_schedule.ages().items()):
+            group_age.add_metric([group], age)
+        yield group_age
+
+    def _event_stream_metrics(self):
+        """
+        Build the event stream connection and applied-events metrics.
+        """
+        connected = GaugeMetricFamily(
+            "prefect_exporter_event_stream_connected",
+            "Whether the exporter is subscribed to the Prefect event stream",
+            labels=[],
+        )
+        connected.add_metric([], int(self.event_listener.connected.is_set()))
+        yield connected
+
+        events_applied = CounterMetricFamily(
+            "prefect_exporter_flow_run_events_applied",
+            "Flow run state-change events applied to the in-memory flow runs",
+            labels=[],
+        )
+        events_applied.add_metric([], self.event_store.events_applied)
+        yield events_applied
+
+    def _catalog_cache_metrics(self):
+        """
+        Build the hit, miss and eviction counters of the catalog cache.
+        """
+        for name, documentation, value in (
+            (
+                "prefect_exporter_catalog_cache_hits",
+                "Catalog resources served from the cache",
+                self.catalog_cache.hits,
+            ),
+            (
+                "prefect_exporter_catalog_cache_misses",
+                "Catalog resources fetched because they were not cached or lacked a referenced id",
+                self.catalog_cache.misses,
+            ),
+            (
+                "prefect_exporter_catalog_cache_evictions",
+                "Catalog resources dropped from the cache after their TTL expired",
+                self.catalog_cache.evictions,
+            ),
+        ):
+            counter = CounterMetricFamily(name, documentation, labels=[])
+            counter.add_metric([], value)
+            yield counter
+
+    def _fetch_resources(self) -> dict:
+        """
+        Fetch every Prefect resource a collection cycle needs.
+
+        With the catalog cache enabled, deployments, flows and work pools are
+        served from it until their TTL expires, or until a flow run references
+        a deployment or flow the cached list does not have.
+
+        With a refresh schedule, the resources of groups whose interval has
+        not elapsed are served from their latest fetch.
+
+        With a deadline (see _cycle_deadline()), fetches still running when
+        it passes are abandoned and served from their last complete result.
+
+        With sharding, deployments are resolved before the other fetches,
+        since the flow run queries select the runs of the owned deployments.
+
+        Returns:
+            dict: Resource lists keyed by name, consumed by _build_metrics().
+        """
+        deadline = self._cycle_deadline()
+        self._refresh_csrf_token()
+        fetches = self._resource_fetches(deadline)
+
+        cached = {}
+        if self.catalog_cache is not None:
+            cached = self.catalog_cache.lookup(fetches)
+        scheduled = {}
+        if self.refresh_schedule is not None:
+            scheduled = self.refresh_schedule.lookup(
+                name for name in fetches if name not in cached
+            )
+        requested = [
+            name for name in fetches if name not in cached and name not in scheduled
+        ]
+        resources, pending = {}, requested
+        if self.shard is not None:
+            resources = self._assign_shard(
+                fetches, requested, {**cached, **scheduled}, deadline
+            )
+            pending = [name for name in requested if name != "deployments"]
+        resources.update(
+            self._run_fetches({name: fetches[name] for name in pending}, deadline)
+        )
+        # Before the fallback fills in old data, which must not look fresh.
+        if self.catalog_cache is not None:
+            self.catalog_cache.store(resources)
+        if self.refresh_schedule is not None:
+            self.refresh_schedule.store(resources, requested)
+        if deadline is not None:
+            unfinished = len(requested) - len(resources)
+            self.resource_staleness = self.stale_fallback.fill(requested, resources)
+            if unfinished:
+                self.deadline_exceeded += 1
+                self.logger.warning(
+                    "Collection deadline exceeded, serving %s resource(s) from earlier cycles",
+                    unfinished,
+                )
+        else:
+            self.resource_staleness = {}
+        resources.update(scheduled)
+        resources.update(resources.pop("flow_run_window", {}))
+        # A window never fetched completely leaves its lists empty, not missing.
+        for name in ("flow_runs", "all_flow_runs", "ongoing_flow_runs"):
+            resources.setdefault(name, [])
+
+        if self.catalog_cache is not None:
+            resources.update(cached)
+            stale = self.catalog_cache.unknown_references(resources, cached)
+            if stale:
+                refreshed = self._run_fetches(
+                    {name: fetches[name] for name in stale}, deadline
+                )
+                self.catalog_cache.store(refreshed)
+                resources.update(refreshed)
+
+        return resources
+
+    def _assign_shard(self, fetches, requested, cached, deadline) -> dict:
+        """
+        Resolve this cycle's deployments and assign the owned ones to the shard.
+
+        If they could not be fetched in time, the previous assignment is kept.
+
+        Args:
+            fetches (dict): Output of _resource_fetches().
+            requested (list): Resource names not served from the catalog cache.
+            cached (dict): Resources served from the catalog cache.
+            deadline (Deadline, optional): Deadline of the cycle.
+
+        Returns:
+            dict: The fetched deployments, if they were requested and completed.
+        """
+        resources = {}
+        if "deployments" in requested:
+            resources = self._run_fetches(
+                {"deployments": fetches["deployments"]}, deadline
+            )
+        deployments = resources.get("deployments", cached.get("deployments"))
+        if deployments is not None:
+            self.shard.assign_deployments(deployments)
+        return resources
+
+    def _cycle_deadline(self):
+        """
+        The deadline of the current cycle: the earliest of the scrape's and the configured budget.
+
+        Returns:
+            Deadline: The deadline, or None if there is neither.
+        """
+        budget = None
+        if self.deadline_budget > 0:
+            budget = Deadline(self.deadline_budget)
+        return Deadline.earliest(scrape_deadline.get(), budget)
+
+    def _resource_fetches(self, deadline=None) -> dict:
+        """
+        Build the fetch tasks of one collection cycle.
+
+        Args:
+            deadline (Deadline, optional): Deadline the fetches stop at. Default is None.
+
+        Returns:
+            dict: Mapping of resource name -> zero-argument callable, run by _run_fetches().
         """
         ##
-        # PREFECT GET CSRF TOKEN IF ENABLED
+        # PREFECT GET RESOURCES
         #
+        common = {
+            "url": self.url,
+            "headers": self.headers,
+            "max_retries": self.max_retries,
+            "logger": self.logger,
+            "enable_pagination": self.enable_pagination,
+            "pagination_limit": self.pagination_limit,
+            "limiter": self.request_limiter,
+            "session": self.session,
+            "stats": self.stats,
+            "deadline": deadline,
+        }
+        deployments = PrefectDeployments(**common)
+        flows = PrefectFlows(**common)
+        flow_runs = PrefectFlowRuns(
+            offset_minutes=self.offset_minutes,
+            max_concurrency=self.fetch_concurrency,
+            pagination_mode=self.pagination_mode,
+            shard=self.shard,
+            **common,
+        )
+        work_pools = PrefectWorkPools(**common)
+        work_queues = PrefectWorkQueues(
+            status_cache=self.work_queue_status_cache,
+            status_concurrency=self.work_queue_status_concurrency,
+            shard=self.shard,
+            **common,
+        )
+
+        # Every resource query is independent, so each is a separate fetch task.
+        fetches = {
+            "deployments": deployments.get_deployments_info,
+            "flows": flows.get_flows_info,
+            "ongoing_flow_runs": flow_runs.get_ongoing_flow_runs_info,
+            "work_pools": work_pools.get_work_pools_info,
+            "work_queues": work_queues.get_work_queues_info,
+        }
+        if self.event_store is not None:
+            # One task serves every flow run list from the event-driven store.
+            del fetches["ongoing_flow_runs"]
+            fetches["flow_run_window"] = partial(self._event_flow_run_window, flow_runs)
+        elif self.flow_run_index is None:
+            fetches["flow_runs"] = flow_runs.get_flow_runs_info
+            fetches["all_flow_runs"] = flow_runs.get_all_flow_runs_info
+        else:
+            # One task brings both windowed lists up to date from the index.
+            fetches["flow_run_window"] = partial(
+                flow_runs.sync_flow_run_index, self.flow_run_index
+            )
+        if self.failed_runs_offset_minutes == 0:
+            fetches["failed_flow_runs"] = dict
+        else:
+            fetches["failed_flow_runs"] = partial(
+                PrefectFlowRuns(
+                    offset_minutes=self.failed_runs_offset_minutes,
+                    pagination_mode=self.pagination_mode,
+                    shard=self.shard,
+                    **common,
+                ).get_failed_flow_runs_info,
+                limit=self.failed_runs_limit,
+            )
+        if self.enable_count_queries and self._emits_totals():
+            # Work queues have no count endpoint; their total stays len()-based.
+            fetches["deployments_count"] = deployments.count_deployments
+            fetches["flows_count"] = flows.count_flows
+            fetches["all_flow_runs_count"] = flow_runs.count_all_flow_runs
+            fetches["work_pools_count"] = work_pools.count_work_pools
+        if self.shard is not None and self.shard.designated:
+            # The flow run lists only hold this shard's runs, so the
+            # workspace-wide total is always counted server-side.
+            fetches["all_flow_runs_count"] = flow_runs.count_all_flow_runs
+
+        return fetches
+
+    def _event_flow_run_window(self, flow_runs) -> dict:
+        """
+        Serve the flow run lists from the event store, reconciling it first when due.
+
+        Args:
+            flow_runs (PrefectFlowRuns): Collector running the reconciliation queries.
+
+        Returns:
+            dict: "flow_runs", "all_flow_runs" and "ongoing_flow_runs".
+        """
+        if self.event_store.needs_reconcile():
+            polled_at = datetime.now(timezone.utc)
+            self.event_store.reconcile(
+                flow_runs.get_flow_runs_info()
+                + flow_runs.get_all_flow_runs_info()
+                + flow_runs.get_ongoing_flow_runs_info(),
+                polled_at,
+            )
+
+        return self.event_store.window(datetime.now(timezone.utc))
+
+    def _emits_totals(self) -> bool:
+        """Whether this exporter emits the workspace-wide *_total families."""
+        return self.shard is None or self.shard.designated
+
+    @staticmethod
+    def _total(resources: dict, name: str) -> int:
+        """
+        Total for a *_total metric: the server-side count if one was fetched, else len().
+
+        Counts are exact even when pagination is disabled or a list fetch was
+        cut short, since they are not bounded by the page limit.
+
+        Args:
+            resources (dict): Output of _fetch_resources().
+            name (str): Resource list name.
+        """
+        count = resources.get(f"{name}_count")
+        if count is not None:
+            return count
+        return len(resources[name])
+
+    def _refresh_csrf_token(self) -> None:
+        """
+        Fetch a CSRF token if enabled and missing or expired, and set the CSRF headers.
+        """
         if self.csrf_enabled:
             if not self.csrf_token or (
                 self.csrf_token_expiration is not None
@@ -100,84 +717,101 @@ class PrefectMetrics(object):
             self.headers["Prefect-Csrf-Token"] = self.csrf_token
             self.headers["Prefect-Csrf-Client"] = self.client_id
 
-        ##
-        # PREFECT GET RESOURCES
-        #
-        deployments = PrefectDeployments(
-            self.url,
-            self.headers,
-            self.max_retries,
-            self.logger,
-            self.enable_pagination,
-            self.pagination_limit,
-        ).get_deployments_info()
-        flows = PrefectFlows(
-            self.url,
-            self.headers,
-            self.max_retries,
-            self.logger,
-            self.enable_pagination,
-            self.pagination_limit,
-        ).get_flows_info()
-        flow_runs = PrefectFlowRuns(
-            self.url,
-            self.headers,
-            self.max_retries,
-            self.offset_minutes,
-            self.logger,
-            self.enable_pagination,
-            self.pagination_limit,
-        ).get_flow_runs_info()
-        all_flow_runs = PrefectFlowRuns(
-            self.url,
-            self.headers,
-            self.max_retries,
-            self.offset_minutes,
-            self.logger,
-            self.enable_pagination,
-            self.pagination_limit,
-        ).get_all_flow_runs_info()
-        ongoing_flow_runs = PrefectFlowRuns(
-            self.url,
-            self.headers,
-            self.max_retries,
-            self.offset_minutes,
-            self.logger,
-            self.enable_pagination,
-            self.pagination_limit,
-        ).get_ongoing_flow_runs_info()
-        if self.failed_runs_offset_minutes == 0:
-            failed_flow_runs = {}
-        else:
-            failed_flow_runs = PrefectFlowRuns(
-                self.url,
-                self.headers,
-                self.max_retries,
-                self.failed_runs_offset_minutes,
-                self.logger,
-                self.enable_pagination,
-                self.pagination_limit,
-            ).get_failed_flow_runs_info(limit=self.failed_runs_limit)
-        work_pools = PrefectWorkPools(
-            self.url,
-            self.headers,
-            self.max_retries,
-            self.logger,
-            self.enable_pagination,
-            self.pagination_limit,
-        ).get_work_pools_info()
-        work_queues = PrefectWorkQueues(
-            self.url,
-            self.headers,
-            self.max_retries,
-            self.logger,
-            self.enable_pagination,
-            self.pagination_limit,
-        ).get_work_queues_info()
-
-        # O(1) id -> name lookups reused across the flow-run metric loops below.
-        deployments_by_id = {d["id"]: d["name"] for d in deployments if d.get("id")}
-        flows_by_id = {f["id"]: f["name"] for f in flows if f.get("id")}
+    def _run_fetches(self, fetches: dict, deadline=None) -> dict:
+        """
+        Run independent fetch tasks with at most fetch_concurrency in flight.
+
+        Cycle time approaches the slowest single query rather than the sum of
+        all of them. An exception from any task propagates to the caller, as
+        it would have from the serial path.
+
+        Args:
+            fetches (dict): Mapping of resource name -> zero-argument callable.
+            deadline (Deadline, optional): Tasks not done when it passes are
+                abandoned, and tasks raising DeadlineExceeded are dropped. Default is None.
+
+        Returns:
+            dict: Mapping of resource name -> fetched result, for the tasks that completed.
+        """
+        if self.fetch_concurrency <= 1:
+            results = {}
+            for name, fetch in fetches.items():
+                try:
+                    results[name] = fetch()
+                except DeadlineExceeded:
+                    pass
+            return results
+
+        pool = ThreadPoolExecutor(
+            max_workers=min(self.fetch_concurrency, len(fetches)),
+            thread_name_prefix="prefect-fetch",
+        )
+        try:
+            futures = {
+                name: pool.submit(self._profiled_fetch, fetch)
+                for name, fetch in fetches.items()
+            }
+            timeout = deadline.remaining() if deadline is not None else None
+            done, _ = wait(futures.values(), timeout=timeout)
+        finally:
+            # Abandoned tasks stop at their next deadline check.
+            pool.shutdown(wait=deadline is None, cancel_futures=True)
+
+        results = {}
+        for name, future in futures.items():
+            if future not in done:
+                continue
+            try:
+                results[name] = future.result()
+            except DeadlineExceeded:
+                pass
+        return results
+
+    def _profiled_fetch(self, fetch):
+        # Fetch threads are invisible to the cycle's profiler unless profiled themselves.
+        if self.profiler is None:
+            return fetch()
+        with self.profiler.thread():
+            return fetch()
+
+    def _build_metrics(self, resources: dict):
+        """
+        Build the metric families from the resources of one collection cycle.
+
+        Args:
+            resources (dict): Output of _fetch_resources().
+        """
+        deployments = resources["deployments"]
+        flows = resources["flows"]
+        flow_runs = resources["flow_runs"]
+        all_flow_runs = resources["all_flow_runs"]
+        ongoing_flow_runs = resources["ongoing_flow_runs"]
+        failed_flow_runs = resources["failed_flow_runs"]
+        work_pools = resources["work_pools"]
+        work_queues = resources["work_queues"]
+
+        # O(1) id -> name lookups shared by every metric family below.
+        catalog = Catalog.from_resources(resources)
+        # Caps the series of the high-cardinality families below.
+        governor = CardinalityGovernor(self.series_budgets)
+
+        if self.shard is not None:
+            # Only the owned resources' series are emitted; the catalog above
+            # still resolves the names of every resource.
+            owns = self.shard.owns
+            deployments = [item for item in deployments if owns(item.get("id"))]
+            flows = [item for item in flows if owns(item.get("id"))]
+            work_pools = [item for item in work_pools if owns(item.get("id"))]
+            work_queues = [item for item in work_queues if owns(item.get("id"))]
+            flow_runs, all_flow_runs, ongoing_flow_runs = (
+                [run for run in runs if self.shard.owns_flow_run(run)]
+                for runs in (flow_runs, all_flow_runs, ongoing_flow_runs)
+            )
+            failed_flow_runs = {
+                key: run_ids
+                for key, run_ids in failed_flow_runs.items()
+                if owns(key[0])
+            }
 
         ##
         # PREFECT DEPLOYMENTS METRICS
@@ -187,7 +821,7 @@ class PrefectMetrics(object):
         prefect_deployments = GaugeMetricFamily(
             "prefect_deployments_total", "Prefect total deployments", labels=[]
         )
-        prefect_deployments.add_metric([], len(deployments))
+        prefect_deployments.add_metric([], self._total(resources, "deployments"))
         yield prefect_deployments
 
         # prefect_info_deployments metric
@@ -209,17 +843,7 @@ class PrefectMetrics(object):
 
         for deployment in deployments:
             # get flow name
-            if deployment.get("flow_id") is None:
-                flow_name = "null"
-            else:
-                flow_name = next(
-                    (
-                        flow.get("name")
-                        for flow in flows
-                        if flow.get("id") == deployment.get("flow_id")
-                    ),
-                    "null",
-                )
+            flow_name = catalog.flow_name(deployment.get("flow_id"))
 
             # The "is_schedule_active" field is deprecated, and always returns
             # "null". For backward compatibility, we will populate the value of
@@ -259,7 +883,7 @@ class PrefectMetrics(object):
         prefect_flows = GaugeMetricFamily(
             "prefect_flows_total", "Prefect total flows", labels=[]
         )
-        prefect_flows.add_metric([], len(flows))
+        prefect_flows.add_metric([], self._total(resources, "flows"))
         yield prefect_flows
 
         # prefect_info_flows metric
@@ -287,51 +911,51 @@ class PrefectMetrics(object):
         prefect_flow_runs = GaugeMetricFamily(
             "prefect_flow_runs_total", "Prefect total flow runs", labels=[]
         )
-        prefect_flow_runs.add_metric([], len(all_flow_runs))
+        prefect_flow_runs.add_metric([], self._total(resources, "all_flow_runs"))
         yield prefect_flow_runs
 
-        # prefect_flow_runs_total_run_time metric
-        prefect_flow_runs_total_run_time = GaugeMetricFamily(
-            "prefect_flow_runs_total_run_time",
-            "Prefect flow-run total run time in seconds",
-            labels=["flow_name"],
-        )
+        if self.enable_run_time_histogram:
+            # prefect_flow_runs_run_time_seconds metric: one series per
+            # deployment/flow instead of one sample per run.
+            run_times = HistogramAggregator(self.run_time_buckets)
 
-        for flow_run in all_flow_runs:
-            # get deployment name
-            if flow_run.get("deployment_id") is None:
-                deployment_name = "null"
-            else:
-                deployment_name = next(
-                    (
-                        deployment.get("name")
-                        for deployment in deployments
-                        if flow_run.get("deployment_id") == deployment.get("id")
-                    ),
-                    "null",
-                )
-
-            # get flow name
-            if flow_run.get("flow_id") is None:
-                flow_name = "null"
-            else:
-                flow_name = next(
+            for flow_run in all_flow_runs:
+                total_run_time = flow_run.get("total_run_time")
+                if not isinstance(total_run_time, (int, float)):
+                    continue
+                run_times.observe(
                     (
-                        flow.get("name")
-                        for flow in flows
-                        if flow.get("id") == flow_run.get("flow_id")
+                        str(catalog.deployment_name(flow_run.get("deployment_id"))),
+                        str(catalog.flow_name(flow_run.get("flow_id"))),
                     ),
-                    "null",
+                    total_run_time,
                 )
 
-            prefect_flow_runs_total_run_time.add_metric(
-                [
-                    str(flow_name),
-                ],
-                flow_run.get("total_run_time", "null"),
+            yield run_times.family(
+                "prefect_flow_runs_run_time_seconds",
+                "Run time in seconds of the flow runs that ended within the OFFSET_MINUTES window",
+                ["deployment_name", "flow_name"],
+            )
+        else:
+            # prefect_flow_runs_total_run_time metric
+            prefect_flow_runs_total_run_time = GaugeMetricFamily(
+                "prefect_flow_runs_total_run_time",
+                "Prefect flow-run total run time in seconds",
+                labels=["flow_name"],
             )
 
-        yield prefect_flow_runs_total_run_time
+            for flow_run in all_flow_runs:
+                # get flow name
+                flow_name = catalog.flow_name(flow_run.get("flow_id"))
+
+                prefect_flow_runs_total_run_time.add_metric(
+                    [
+                        str(flow_name),
+                    ],
+                    flow_run.get("total_run_time", "null"),
+                )
+
+            yield prefect_flow_runs_total_run_time
 
         # flow_run_id keeps each ongoing run a distinct timeseries. Without it,
         # multiple runs of the same flow/deployment/state collapse to identical
@@ -353,12 +977,11 @@ class PrefectMetrics(object):
         )
 
         current_time = datetime.now(timezone.utc)
+        ongoing_samples = []
 
         for flow_run in ongoing_flow_runs:
-            deployment_name = deployments_by_id.get(
-                flow_run.get("deployment_id"), "null"
-            )
-            flow_name = flows_by_id.get(flow_run.get("flow_id"), "null")
+            deployment_name = catalog.deployment_name(flow_run.get("deployment_id"))
+            flow_name = catalog.flow_name(flow_run.get("flow_id"))
 
             # A run with no start_time (e.g. PENDING/SCHEDULED) has no meaningful
             # ongoing duration; skip it rather than report a misleading 0.
@@ -396,10 +1019,14 @@ class PrefectMetrics(object):
             if self.enable_flow_run_name_label:
                 label_keys.append(str(flow_run.get("name", "null")))
 
-            prefect_flow_runs_ongoing_run_time.add_metric(
-                label_keys,
-                run_time,
-            )
+            ongoing_samples.append((label_keys, run_time))
+
+        # Over budget, the longest-running runs are kept and the rest folded
+        # into one "other" series holding the longest folded run time.
+        for label_keys, run_time in governor.limit(
+            "prefect_flow_runs_ongoing_run_time", ongoing_samples, fold=max
+        ):
+            prefect_flow_runs_ongoing_run_time.add_metric(label_keys, run_time)
 
         yield prefect_flow_runs_ongoing_run_time
 
@@ -422,31 +1049,9 @@ class PrefectMetrics(object):
         state_counts = defaultdict(int)
 
         for flow_run in flow_runs:
-            # get deployment name
-            if flow_run.get("deployment_id") is None:
-                deployment_name = "null"
-            else:
-                deployment_name = next(
-                    (
-                        deployment.get("name")
-                        for deployment in deployments
-                        if flow_run.get("deployment_id") == deployment.get("id")
-                    ),
-                    "null",
-                )
-
-            # get flow name
-            if flow_run.get("flow_id") is None:
-                flow_name = "null"
-            else:
-                flow_name = next(
-                    (
-                        flow.get("name")
-                        for flow in flows
-                        if flow.get("id") == flow_run.get("flow_id")
-                    ),
-                    "null",
-                )
+            # get deployment and flow names
+            deployment_name = catalog.deployment_name(flow_run.get("deployment_id"))
+            flow_name = catalog.flow_name(flow_run.get("flow_id"))
 
             label_key = (
                 str(deployment_name),
@@ -458,8 +1063,11 @@ class PrefectMetrics(object):
                 label_key += (str(flow_run.get("name", "null")),)
             state_counts[label_key] += 1
 
-        for label_key, count in state_counts.items():
-            prefect_info_flow_runs.add_metric(list(label_key), count)
+        for label_key, count in governor.limit(
+            "prefect_info_flow_runs",
+            [(list(label_key), count) for label_key, count in state_counts.items()],
+        ):
+            prefect_info_flow_runs.add_metric(label_key, count)
 
         yield prefect_info_flow_runs
 
@@ -470,14 +1078,20 @@ class PrefectMetrics(object):
             labels=["deployment_name", "flow_name", "last_failed_run_id", "state_name"],
         )
 
+        failed_samples = []
         for (deployment_id, flow_id, state_name), run_ids in failed_flow_runs.items():
-            deployment_name = deployments_by_id.get(deployment_id, "null")
-            flow_name = flows_by_id.get(flow_id, "null")
+            deployment_name = catalog.deployment_name(deployment_id)
+            flow_name = catalog.flow_name(flow_id)
             for run_id in run_ids:
-                prefect_deployment_failed_flow_runs.add_metric(
-                    [deployment_name, flow_name, run_id, state_name], 1
+                failed_samples.append(
+                    ([deployment_name, flow_name, run_id, state_name], 1)
                 )
 
+        for label_keys, value in governor.limit(
+            "prefect_deployment_failed_flow_runs", failed_samples
+        ):
+            prefect_deployment_failed_flow_runs.add_metric(label_keys, value)
+
         yield prefect_deployment_failed_flow_runs
 
         ##
@@ -488,7 +1102,7 @@ class PrefectMetrics(object):
         prefect_work_pools = GaugeMetricFamily(
             "prefect_work_pools_total", "Prefect total work pools", labels=[]
         )
-        prefect_work_pools.add_metric([], len(work_pools))
+        prefect_work_pools.add_metric([], self._total(resources, "work_pools"))
         yield prefect_work_pools
 
         # prefect_info_work_pools metric
@@ -525,7 +1139,7 @@ class PrefectMetrics(object):
         prefect_work_queues = GaugeMetricFamily(
             "prefect_work_queues_total", "Prefect total work queues", labels=[]
         )
-        prefect_work_queues.add_metric([], len(work_queues))
+        prefect_work_queues.add_metric([], len(resources["work_queues"]))
         yield prefect_work_queues
 
         # prefect_info_work_queues metric
@@ -607,6 +1221,9 @@ class PrefectMetrics(object):
 
         yield prefect_work_queues_late_runs_count
 
+        if self.series_budgets:
+            yield governor.family()
+
     def get_csrf_token(self) -> CsrfToken:
         """
         Pull CSRF Token from CSRF Endpoint.
@@ -618,7 +1235,7 @@ class PrefectMetrics(object):
 
         for retry in range(self.max_retries):
             try:
-                resp = requests.get(endpoint, headers=self.headers)
+                resp = self.session.get(endpoint, headers=self.headers)
                 resp.raise_for_status()
                 return CsrfToken.model_validate(resp.json())
             except requests.exceptions.RequestException as err:
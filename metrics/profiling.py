@@ -0,0 +1,188 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+# From Python 3.12, cProfile is built on sys.monitoring: one profiler sees
+# every thread, and enabling a second one at the same time raises.
+PROFILER_SEES_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+class CycleProfiler:
+    """
+    CycleProfiler class capturing cProfile and tracemalloc data for upcoming collection cycles.
+
+    Idle until armed, then each of the next N cycles is profiled and written
+    to ``directory`` as:
+
+    - ``<cycle>.pstats``: cProfile stats, for ``python -m pstats`` or snakeviz.
+    - ``<cycle>-top.txt``: the top functions by cumulative and own time.
+    - ``<cycle>-allocations.txt``: the top allocation sites still alive at
+      the end of the cycle, and the peak traced memory.
+
+    Before Python 3.12, cProfile only sees the thread it runs on, so the fetch
+    threads (or the async engine's event loop) are profiled separately through
+    thread() and merged into the cycle's stats. From 3.12 the cycle's profiler
+    sees them already and thread() does nothing.
+    """
+
+    # Entries listed in the text reports.
+    TOP = 50
+
+    def __init__(self, directory: str, logger) -> None:
+        """
+        Initialize the CycleProfiler instance.
+
+        Args:
+            directory (str): Directory the reports are written to. Created if missing.
+            logger (obj): The logger object.
+        """
+        self.directory = directory
+        self.logger = logger
+        self.remaining = 0
+        self.active = None
+        self.lock = threading.Lock()
+
+    def arm(self, cycles: int) -> None:
+        """
+        Profile the next ``cycles`` collection cycles.
+
+        Safe to call from a signal handler.
+
+        Args:
+            cycles (int): Number of cycles to profile.
+        """
+        self.remaining += cycles
+        self.logger.info("Profiling the next %s collection cycle(s)", self.remaining)
+
+    def next_cycle(self) -> Optional["CycleProfile"]:
+        """
+        Start profiling a cycle if armed.
+
+        Returns:
+            CycleProfile: Context manager profiling the cycle, or None if not
+                armed or another cycle is being profiled.
+        """
+        with self.lock:
+            if self.remaining <= 0 or self.active is not None:
+                return None
+            self.remaining -= 1
+            self.active = CycleProfile(self)
+            return self.active
+
+    def thread(self):
+        """
+        Profile the calling thread into the active cycle, if any.
+
+        Returns:
+            A context manager; a no-op when no cycle is being profiled.
+        """
+        active = self.active
+        if active is None:
+            return _idle()
+        return active.thread()
+
+    def _finished(self, profile: "CycleProfile") -> None:
+        with self.lock:
+            if self.active is profile:
+                self.active = None
+
+
+@contextmanager
+def _idle():
+    yield
+
+
+class CycleProfile:
+    """
+    CycleProfile class profiling one collection cycle, see CycleProfiler.
+    """
+
+    def __init__(self, profiler: CycleProfiler) -> None:
+        self.profiler = profiler
+        self.profiles = []
+        self.lock = threading.Lock()
+        self._started_tracemalloc = False
+
+    def thread(self):
+        """
+        Profile the calling thread for the duration of the block.
+
+        Returns:
+            A context manager; a no-op when the cycle's profiler already sees every thread.
+        """
+        if PROFILER_SEES_ALL_THREADS and self.profiles:
+            return _idle()
+        return self._profile_thread()
+
+    @contextmanager
+    def _profile_thread(self):
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles.append(profile)
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+
+    def __enter__(self) -> "CycleProfile":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._thread = self.thread()
+        self._thread.__enter__()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._thread.__exit__(*exc_info)
+        try:
+            self._write()
+        except Exception:
+            self.profiler.logger.exception("Failed to write the cycle profile")
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            self.profiler._finished(self)
+
+    def _write(self) -> None:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+
+        directory = self.profiler.directory
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%fZ")
+        prefix = os.path.join(directory, f"cycle-{stamp}")
+
+        with self.lock:
+            profiles = list(self.profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(f"{prefix}.pstats")
+
+        top = io.StringIO()
+        stats.stream = top
+        for sort in ("cumulative", "tottime"):
+            top.write(f"Top {self.profiler.TOP} by {sort} time\n")
+            stats.sort_stats(sort).print_stats(self.profiler.TOP)
+        with open(f"{prefix}-top.txt", "w") as f:
+            f.write(top.getvalue())
+
+        with open(f"{prefix}-allocations.txt", "w") as f:
+            f.write(
+                f"Traced memory at end of cycle: {current / 1024 / 1024:.1f} MiB, "
+                f"peak: {peak / 1024 / 1024:.1f} MiB\n"
+                f"Top {self.profiler.TOP} allocation sites by size\n"
+            )
+            for statistic in snapshot.statistics("lineno")[: self.profiler.TOP]:
+                f.write(f"{statistic}\n")
+
+        self.profiler.logger.info("Wrote the cycle profile to %s.*", prefix)
@@ -0,0 +1,414 @@
+"""Pushing collected metric families to a Pushgateway or a remote-write receiver."""
+
+import abc
+import base64
+import gzip
+import struct
+import threading
+import time
+from urllib.parse import quote
+
+import requests
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.exposition import CONTENT_TYPE_LATEST, generate_latest
+
+PUSH_PROTOCOLS = ("pushgateway", "remote_write")
+
+
+def parse_push_labels(value: str) -> dict:
+    """
+    Parse "name=value,name=value" into the labels identifying pushed metrics.
+
+    Args:
+        value (str): Comma-separated name=value pairs. Empty means no labels.
+
+    Returns:
+        dict: Mapping of label name -> value.
+
+    Raises:
+        ValueError: If a pair has no "=".
+    """
+    labels = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, sep, label_value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid push label {item!r}, expected name=value")
+        labels[name.strip()] = label_value.strip()
+    return labels
+
+
+class _Families:
+    """Already collected families, in the shape generate_latest() expects."""
+
+    def __init__(self, families) -> None:
+        self.families = families
+
+    def collect(self):
+        return self.families
+
+
+class MetricsPusher(abc.ABC):
+    """
+    MetricsPusher class sending payloads to a push receiver with retries.
+
+    Connection errors, 429 and 5xx responses are retried with exponential
+    backoff; other 4xx responses mean the payload was rejected and are not.
+    Subclasses encode the families in push().
+    """
+
+    def __init__(
+        self,
+        url: str,
+        job: str,
+        labels: dict,
+        logger,
+        max_retries: int = 3,
+        session=None,
+    ) -> None:
+        """
+        Initialize the MetricsPusher instance.
+
+        Args:
+            url (str): Base URL of the receiver.
+            job (str): Job the pushed metrics belong to.
+            labels (dict): Extra labels identifying this exporter's metrics, e.g. an instance.
+            logger (obj): The logger object.
+            max_retries (int, optional): Attempts per payload. Default is 3.
+            session (requests.Session, optional): Session to send with. Default is a new one.
+        """
+        self.url = url.rstrip("/")
+        self.job = job
+        self.labels = labels
+        self.logger = logger
+        self.max_retries = max(1, max_retries)
+        self.session = session or requests.Session()
+        self.bytes_sent = 0
+
+    @abc.abstractmethod
+    def push(self, families) -> None:
+        """
+        Push one collection's families.
+
+        Args:
+            families (list): The metric families to push.
+
+        Raises:
+            requests.exceptions.RequestException: If the receiver did not accept them.
+        """
+
+    def _send(self, method: str, url: str, body: bytes, headers: dict) -> None:
+        for retry in range(self.max_retries):
+            try:
+                resp = self.session.request(method, url, data=body, headers=headers)
+                resp.raise_for_status()
+                self.bytes_sent += len(body)
+                return
+            except requests.exceptions.RequestException as err:
+                status = err.response.status_code if err.response is not None else None
+                retryable = status is None or status == 429 or status >= 500
+                if not retryable or retry == self.max_retries - 1:
+                    raise
+                self.logger.warning(f"Push to {url} failed, retrying: {err}")
+                time.sleep(2**retry)
+
+
+class PushgatewayPusher(MetricsPusher):
+    """
+    PushgatewayPusher class replacing this exporter's group on a Pushgateway.
+
+    Every collection is sent as one gzip-compressed PUT of the text exposition
+    to /metrics/job/<job>/<label>/<value>..., so series that disappeared from
+    the collection also disappear from the gateway.
+    """
+
+    def push(self, families) -> None:
+        body = gzip.compress(generate_latest(_Families(families)))
+        headers = {"Content-Type": CONTENT_TYPE_LATEST, "Content-Encoding": "gzip"}
+        self._send("PUT", self.group_url(), body, headers)
+
+    def group_url(self) -> str:
+        """
+        URL of this exporter's grouping key.
+
+        Returns:
+            str: The URL, with values containing "/" base64-encoded as the Pushgateway expects.
+        """
+        path = [("job", self.job), *self.labels.items()]
+        parts = []
+        for name, value in path:
+            if "/" in value or not value:
+                encoded = base64.urlsafe_b64encode(value.encode()).decode()
+                parts.append(f"{name}@base64/{encoded or '='}")
+            else:
+                parts.append(f"{name}/{quote(value, safe='')}")
+        return f"{self.url}/metrics/" + "/".join(parts)
+
+
+class RemoteWritePusher(MetricsPusher):
+    """
+    RemoteWritePusher class sending samples with the Prometheus remote-write protocol.
+
+    Every sample becomes a time series labeled with its name, its labels, the
+    job and the extra labels, timestamped with the push time. Series are sent
+    ``batch_size`` at a time as snappy-compressed WriteRequest protobufs.
+    """
+
+    def __init__(self, *args, batch_size: int = 2000, **kwargs) -> None:
+        """
+        Initialize the RemoteWritePusher instance.
+
+        Args:
+            batch_size (int, optional): Maximum time series per request. Default is 2000.
+            *args, **kwargs: See MetricsPusher.
+        """
+        super().__init__(*args, **kwargs)
+        self.batch_size = max(1, batch_size)
+
+    def push(self, families) -> None:
+        timestamp_ms = int(time.time() * 1000)
+        extra = {"job": self.job, **self.labels}
+        series = [
+            (
+                sorted({**extra, **sample.labels, "__name__": sample.name}.items()),
+                sample.value,
+            )
+            for family in families
+            for sample in family.samples
+        ]
+        headers = {
+            "Content-Type": "application/x-protobuf",
+            "Content-Encoding": "snappy",
+            "X-Prometheus-Remote-Write-Version": "0.1.0",
+        }
+        for start in range(0, len(series), self.batch_size):
+            batch = series[start : start + self.batch_size]
+            body = snappy_compress(encode_write_request(batch, timestamp_ms))
+            self._send("POST", self.url, body, headers)
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _field(number: int, payload: bytes) -> bytes:
+    # Length-delimited protobuf field (wire type 2).
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+
+def encode_write_request(series, timestamp_ms: int) -> bytes:
+    """
+    Encode time series as a remote-write WriteRequest protobuf.
+
+    Args:
+        series (list): (labels, value) pairs; labels are (name, value) pairs sorted by name.
+        timestamp_ms (int): Timestamp of every sample, in milliseconds since the epoch.
+
+    Returns:
+        bytes: The serialized WriteRequest.
+    """
+    timestamp = b"\x10" + _varint(timestamp_ms)
+    out = bytearray()
+    for labels, value in series:
+        timeseries = bytearray()
+        for name, label_value in labels:
+            timeseries += _field(
+                1, _field(1, name.encode()) + _field(2, str(label_value).encode())
+            )
+        timeseries += _field(2, b"\x09" + struct.pack("<d", value) + timestamp)
+        out += _field(1, bytes(timeseries))
+    return bytes(out)
+
+
+def _snappy_literal(out: bytearray, literal: bytes) -> None:
+    if not literal:
+        return
+    length = len(literal) - 1
+    if length < 60:
+        out.append(length << 2)
+    else:
+        size = (length.bit_length() + 7) // 8
+        out.append((59 + size) << 2)
+        out += length.to_bytes(size, "little")
+    out += literal
+
+
+def snappy_compress(data: bytes) -> bytes:
+    """
+    Compress ``data`` in the snappy block format used by remote-write.
+
+    A greedy matcher emitting back-references to the last occurrence of each
+    4-byte sequence; the text-heavy label sets of a WriteRequest compress well.
+
+    Args:
+        data (bytes): The data to compress.
+
+    Returns:
+        bytes: The compressed block.
+    """
+    out = bytearray(_varint(len(data)))
+    last_seen = {}
+    literal_start = position = 0
+    end = len(data)
+    while position + 4 <= end:
+        key = data[position : position + 4]
+        candidate = last_seen.get(key)
+        last_seen[key] = position
+        if candidate is None or position - candidate > 0xFFFF:
+            position += 1
+            continue
+        length = 4
+        while (
+            length < 64
+            and position + length < end
+            and data[candidate + length] == data[position + length]
+        ):
+            length += 1
+        _snappy_literal(out, data[literal_start:position])
+        # Copy with a 2-byte offset: tag 0b10, length - 1 in the upper 6 bits.
+        out.append((length - 1) << 2 | 2)
+        out += (position - candidate).to_bytes(2, "little")
+        position += length
+        literal_start = position
+    _snappy_literal(out, data[literal_start:])
+    return bytes(out)
+
+
+def snappy_decompress(block: bytes) -> bytes:
+    """
+    Decompress a snappy block, e.g. one received by a test receiver.
+
+    Args:
+        block (bytes): The compressed block.
+
+    Returns:
+        bytes: The original data.
+    """
+    length, shift, position = 0, 0, 0
+    while True:
+        byte = block[position]
+        position += 1
+        length |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            break
+    out = bytearray()
+    while position < len(block):
+        tag = block[position]
+        position += 1
+        kind = tag & 3
+        if kind == 0:
+            size = (tag >> 2) + 1
+            if size > 60:
+                extra = size - 60
+                size = int.from_bytes(block[position : position + extra], "little") + 1
+                position += extra
+            out += block[position : position + size]
+            position += size
+            continue
+        if kind == 1:
+            size = ((tag >> 2) & 7) + 4
+            offset = (tag >> 5) << 8 | block[position]
+            position += 1
+        else:
+            width = 2 if kind == 2 else 4
+            size = (tag >> 2) + 1
+            offset = int.from_bytes(block[position : position + width], "little")
+            position += width
+        for _ in range(size):
+            out.append(out[-offset])
+    if len(out) != length:
+        raise ValueError("Corrupt snappy block")
+    return bytes(out)
+
+
+class PushLoop:
+    """
+    PushLoop class periodically collecting a registry and pushing the result.
+
+    Used instead of the HTTP server where the exporter cannot be scraped. A
+    failed push is logged and counted; the next cycle pushes fresh data.
+    """
+
+    def __init__(self, registry, pusher: MetricsPusher, interval: float, logger):
+        """
+        Initialize the PushLoop instance.
+
+        Args:
+            registry (CollectorRegistry): Registry to collect, including this loop.
+            pusher (MetricsPusher): Where to push.
+            interval (float): Seconds between the start of consecutive pushes.
+            logger (obj): The logger object.
+        """
+        self.registry = registry
+        self.pusher = pusher
+        self.interval = interval
+        self.logger = logger
+        self.pushes = {"success": 0, "failure": 0}
+        self.last_duration = None
+        self._stop = threading.Event()
+
+    def push_once(self) -> bool:
+        """
+        Collect the registry and push its families.
+
+        Returns:
+            bool: Whether the push succeeded.
+        """
+        started = time.perf_counter()
+        try:
+            self.pusher.push(list(self.registry.collect()))
+        except Exception:
+            self.pushes["failure"] += 1
+            self.logger.exception("Failed to push metrics")
+            return False
+        finally:
+            self.last_duration = time.perf_counter() - started
+        self.pushes["success"] += 1
+        return True
+
+    def run(self) -> None:
+        """Push every ``interval`` seconds until stop() is called."""
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.push_once()
+            elapsed = time.monotonic() - started
+            self._stop.wait(max(0.0, self.interval - elapsed))
+
+    def stop(self) -> None:
+        """Make run() return after the current push."""
+        self._stop.set()
+
+    def collect(self):
+        """
+        Report the outcome of the previous pushes.
+        """
+        pushes = CounterMetricFamily(
+            "prefect_exporter_pushes",
+            "Pushes of the collected metrics, by outcome",
+            labels=["outcome"],
+        )
+        for outcome, count in self.pushes.items():
+            pushes.add_metric([outcome], count)
+        yield pushes
+
+        pushed_bytes = CounterMetricFamily(
+            "prefect_exporter_pushed_bytes",
+            "Compressed bytes accepted by the push receiver",
+            labels=[],
+        )
+        pushed_bytes.add_metric([], self.pusher.bytes_sent)
+        yield pushed_bytes
+
+        if self.last_duration is not None:
+            duration = GaugeMetricFamily(
+                "prefect_exporter_push_duration_seconds",
+                "Duration of the previous collection and push",
+                labels=[],
+            )
+            duration.add_metric([], self.last_duration)
+            yield duration
@@ -0,0 +1,75 @@
+_MISSING = object()
+
+
+class CompactRecord:
+    """
+    CompactRecord base class for projecting API items onto the fields the exporter reads.
+
+    API items carry many fields no metric uses (parameters, state details,
+    empirical policy, labels, ...). A subclass lists the fields it keeps in
+    ``__slots__``; ``from_json`` copies those and drops the rest, so no
+    per-item dict is kept alive. Lookups follow ``dict.get`` semantics, so
+    metric code reads records and raw items the same way.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_json(cls, item: dict) -> "CompactRecord":
+        """
+        Project a decoded API item onto the record's fields.
+
+        Args:
+            item (dict): One item of an API response.
+
+        Returns:
+            CompactRecord: The record. Fields absent from ``item`` stay absent.
+        """
+        record = cls.__new__(cls)
+        for field in cls.__slots__:
+            setattr(record, field, item.get(field, _MISSING))
+        return record
+
+    def get(self, field: str, default=None):
+        value = getattr(self, field, _MISSING)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, field: str):
+        value = getattr(self, field, _MISSING)
+        if value is _MISSING:
+            raise KeyError(field)
+        return value
+
+    def __contains__(self, field: str) -> bool:
+        return getattr(self, field, _MISSING) is not _MISSING
+
+    def to_dict(self) -> dict:
+        return {field: self[field] for field in self.__slots__ if field in self}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CompactRecord):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class FlowRunRecord(CompactRecord):
+    """
+    FlowRunRecord class holding the flow run fields the metrics and sync code read.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "flow_id",
+        "deployment_id",
+        "work_queue_name",
+        "state_name",
+        "state_type",
+        "start_time",
+        "end_time",
+        "expected_start_time",
+        "total_run_time",
+    )
@@ -0,0 +1,139 @@
+import threading
+import time
+
+# Refresh group -> the fetch tasks (see PrefectMetrics._resource_fetches()) it covers.
+REFRESH_GROUPS = {
+    "catalog": ("deployments", "flows", "deployments_count", "flows_count"),
+    "recent_runs": (
+        "flow_runs",
+        "all_flow_runs",
+        "all_flow_runs_count",
+        "flow_run_window",
+    ),
+    "ongoing_runs": ("ongoing_flow_runs",),
+    "failed_runs": ("failed_flow_runs",),
+    "work_pools": ("work_pools", "work_pools_count"),
+    "work_queues": ("work_queues",),
+}
+
+
+class RefreshSchedule:
+    """
+    RefreshSchedule class refreshing each group of resources on its own interval.
+
+    A collection cycle only fetches the resources of the groups whose
+    interval has elapsed and reuses the latest result of the others, so
+    e.g. ongoing runs can be refreshed every cycle while the failed runs
+    query runs every few minutes. Groups without an interval are fetched
+    every cycle. A group's resources are always fetched together.
+    """
+
+    def __init__(self, intervals: dict) -> None:
+        """
+        Initialize the RefreshSchedule instance.
+
+        Args:
+            intervals (dict): Mapping of group name (see REFRESH_GROUPS) -> seconds between refreshes.
+        """
+        self.intervals = intervals
+        self.group_of = {
+            name: group for group in intervals for name in REFRESH_GROUPS[group]
+        }
+        self.entries = {}
+        self.refreshed_at = {}
+        self.lock = threading.Lock()
+
+    def lookup(self, names) -> dict:
+        """
+        Return the latest results among ``names`` whose group is not due.
+
+        Args:
+            names (iterable): Resource names a cycle needs.
+
+        Returns:
+            dict: Mapping of resource name -> latest result.
+        """
+        now = time.monotonic()
+        names = [name for name in names if name in self.group_of]
+        with self.lock:
+            groups = {self.group_of[name] for name in names}
+            # A group is reused only if every resource it needs this cycle is held.
+            reused = {
+                group
+                for group in groups
+                if now - self.refreshed_at.get(group, -float("inf"))
+                < self.intervals[group]
+                and all(
+                    name in self.entries
+                    for name in names
+                    if self.group_of[name] == group
+                )
+            }
+            return {
+                name: self.entries[name]
+                for name in names
+                if self.group_of[name] in reused
+            }
+
+    def store(self, resources: dict, requested) -> None:
+        """
+        Keep the scheduled resources among freshly fetched ``resources``.
+
+        A group counts as refreshed now only if every one of its ``requested``
+        resources was fetched. A group left incomplete, e.g. by the deadline,
+        keeps its previous refresh time, so the next cycle fetches it again.
+
+        Args:
+            resources (dict): Mapping of resource name -> fetched value.
+            requested (iterable): Names of the resources the cycle fetched.
+        """
+        now = time.monotonic()
+        with self.lock:
+            refreshed, incomplete = set(), set()
+            for name in requested:
+                group = self.group_of.get(name)
+                if group is None:
+                    continue
+                if name in resources:
+                    self.entries[name] = resources[name]
+                    refreshed.add(group)
+                else:
+                    incomplete.add(group)
+            for group in refreshed - incomplete:
+                self.refreshed_at[group] = now
+
+    def ages(self) -> dict:
+        """
+        Seconds since each scheduled group was last refreshed.
+
+        Returns:
+            dict: Mapping of group name -> age, for the groups refreshed at least once.
+        """
+        now = time.monotonic()
+        with self.lock:
+            return {group: now - at for group, at in self.refreshed_at.items()}
+
+
+def parse_refresh_schedule(value: str) -> dict:
+    """
+    Parse "group=seconds,group=seconds" into refresh intervals.
+
+    Args:
+        value (str): Comma-separated group=seconds pairs. Empty means no schedule.
+
+    Returns:
+        dict: Mapping of group name -> seconds between refreshes.
+
+    Raises:
+        ValueError: If a group is not one of REFRESH_GROUPS.
+    """
+    intervals = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        group, _, seconds = item.partition("=")
+        group = group.strip()
+        if group not in REFRESH_GROUPS:
+            raise ValueError(
+                f"Unknown refresh group {group!r}, expected one of {', '.join(REFRESH_GROUPS)}"
+            )
+        intervals[group] = float(seconds)
+    return intervals
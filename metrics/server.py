@@ -0,0 +1,222 @@
+import gzip
+import hashlib
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from prometheus_client import REGISTRY, make_wsgi_app
+from prometheus_client.core import CounterMetricFamily
+from prometheus_client.exposition import (
+    ThreadingWSGIServer,
+    choose_encoder,
+    gzip_accepted,
+)
+
+from metrics.deadline import Deadline, scrape_deadline
+
+
+class _SilentHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        """Do not log every scrape."""
+
+
+def scrape_deadline_app(app, margin: float):
+    """
+    Wrap a WSGI app so collectors see the scrape's deadline.
+
+    Prometheus sends its scrape timeout in the X-Prometheus-Scrape-Timeout-Seconds
+    header; the deadline is that timeout minus ``margin``, published in
+    ``scrape_deadline`` for the duration of the request.
+
+    Args:
+        app (callable): The WSGI app serving the metrics.
+        margin (float): Seconds kept back to encode and send the response.
+
+    Returns:
+        callable: The wrapped WSGI app.
+    """
+
+    def deadline_app(environ, start_response):
+        deadline = Deadline.from_scrape_timeout(
+            environ.get("HTTP_X_PROMETHEUS_SCRAPE_TIMEOUT_SECONDS"), margin
+        )
+        token = scrape_deadline.set(deadline)
+        try:
+            return app(environ, start_response)
+        finally:
+            scrape_deadline.reset(token)
+
+    return deadline_app
+
+
+@dataclass(frozen=True)
+class RenderedExposition:
+    """
+    One rendering of the registry, in both plain and gzip-compressed form.
+    """
+
+    version: object
+    content_type: str
+    body: bytes
+    gzipped: bytes
+    etag: str
+    rendered_at: float
+
+
+class ExpositionCache:
+    """
+    ExpositionCache class rendering the exposition once per data refresh.
+
+    Encoding thousands of series and gzipping them costs CPU on every scrape
+    even when the underlying data has not changed. The cache keeps the
+    rendered bytes, plain and gzipped, of each exposition format and serves
+    them until ``version()`` reports new data or the rendering is older than
+    ``max_age``, which keeps time-based self-metrics such as
+    prefect_exporter_snapshot_age_seconds moving when refreshes fail.
+    Concurrent scrapes needing a new rendering share one.
+    """
+
+    def __init__(self, registry, version, max_age: float) -> None:
+        """
+        Initialize the ExpositionCache instance.
+
+        Args:
+            registry (CollectorRegistry): Registry to render.
+            version (callable): Returns a token identifying the data the registry would serve, or None when it must be collected anew (then nothing is cached).
+            max_age (float): Maximum seconds a rendering is served.
+        """
+        self.registry = registry
+        self.version = version
+        self.max_age = max_age
+        self.entries = {}
+        self.renders = 0
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    def get(self, accept_header):
+        """
+        Return the rendering for a scrape, rendering it if needed.
+
+        Args:
+            accept_header (str): The scrape's Accept header, selecting the exposition format.
+
+        Returns:
+            RenderedExposition: The rendering, or None if the data must be collected anew.
+        """
+        encoder, content_type = choose_encoder(accept_header)
+        with self.lock:
+            version = self.version()
+            if version is None:
+                return None
+            entry = self.entries.get(content_type)
+            if (
+                entry is not None
+                and entry.version == version
+                and time.monotonic() - entry.rendered_at < self.max_age
+            ):
+                self.hits += 1
+                return entry
+            body = encoder(self.registry)
+            # Keyed by the version seen before rendering: if new data arrived
+            # meanwhile, the next scrape renders again.
+            entry = RenderedExposition(
+                version=version,
+                content_type=content_type,
+                body=body,
+                gzipped=gzip.compress(body),
+                etag='"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"',
+                rendered_at=time.monotonic(),
+            )
+            self.entries[content_type] = entry
+            self.renders += 1
+            return entry
+
+    def collect(self):
+        """
+        Report how often scrapes were served from the cache.
+        """
+        renders = CounterMetricFamily(
+            "prefect_exporter_exposition_renders",
+            "Renderings of the exposition stored in the cache",
+            labels=[],
+        )
+        renders.add_metric([], self.renders)
+        yield renders
+
+        hits = CounterMetricFamily(
+            "prefect_exporter_exposition_cache_hits",
+            "Scrapes served an already rendered exposition",
+            labels=[],
+        )
+        hits.add_metric([], self.hits)
+        yield hits
+
+
+def cached_exposition_app(app, cache: ExpositionCache):
+    """
+    Wrap a WSGI app so scrapes are served from an ExpositionCache.
+
+    Responses carry an ETag and a matching If-None-Match is answered with
+    304 Not Modified. Requests the cache cannot serve (``name[]`` filtering,
+    or data to be collected anew) go to ``app``.
+
+    Args:
+        app (callable): The WSGI app serving the metrics.
+        cache (ExpositionCache): Cache of the rendered registry.
+
+    Returns:
+        callable: The wrapped WSGI app.
+    """
+
+    def exposition_app(environ, start_response):
+        if environ.get("QUERY_STRING") or environ.get("PATH_INFO") == "/favicon.ico":
+            return app(environ, start_response)
+        entry = cache.get(environ.get("HTTP_ACCEPT"))
+        if entry is None:
+            return app(environ, start_response)
+
+        headers = [("Content-Type", entry.content_type), ("ETag", entry.etag)]
+        if environ.get("HTTP_IF_NONE_MATCH") == entry.etag:
+            start_response("304 Not Modified", headers)
+            return [b""]
+        body = entry.body
+        if gzip_accepted(environ.get("HTTP_ACCEPT_ENCODING", "")):
+            body = entry.gzipped
+            headers.append(("Content-Encoding", "gzip"))
+        headers.append(("Content-Length", str(len(body))))
+        start_response("200 OK", headers)
+        return [body]
+
+    return exposition_app
+
+
+def start_metrics_server(
+    port: int, addr: str, margin: float, registry=REGISTRY, cache=None
+):
+    """
+    Serve the registry like prometheus_client's start_http_server, with scrape deadlines.
+
+    Args:
+        port (int): Port to listen on.
+        addr (str): Address to listen on.
+        margin (float): Seconds kept back from each scrape's timeout, see scrape_deadline_app().
+        registry (CollectorRegistry, optional): Registry to serve. Default is the global registry.
+        cache (ExpositionCache, optional): Serve scrapes from this cache of the registry, see cached_exposition_app().
+
+    Returns:
+        tuple: The server and its daemon thread.
+    """
+
+    class Server(ThreadingWSGIServer):
+        address_family = socket.AF_INET6 if ":" in addr else socket.AF_INET
+
+    app = make_wsgi_app(registry)
+    if cache is not None:
+        app = cached_exposition_app(app, cache)
+    app = scrape_deadline_app(app, margin)
+    httpd = make_server(addr, port, app, Server, handler_class=_SilentHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    return httpd, thread
@@ -0,0 +1,122 @@
+"""Shared, pooled HTTP session for every Prefect API collector."""
+
+from __future__ import annotations
+
+import threading
+
+import requests
+from prometheus_client.core import CounterMetricFamily
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class ConnectionStats:
+    """
+    ConnectionStats class for counting requests sent and connections opened.
+
+    With keep-alive working, connections_opened stays close to the pool size
+    while requests keeps growing; every extra connection is a TCP (and TLS)
+    handshake.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.connections_opened = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self.connections_opened += 1
+
+
+def _counting_pool(pool_cls, stats: ConnectionStats):
+    """Subclass ``pool_cls`` so every new connection is recorded in ``stats``."""
+
+    def _new_conn(self):
+        stats.record_connection()
+        return pool_cls._new_conn(self)
+
+    return type(pool_cls.__name__, (pool_cls,), {"_new_conn": _new_conn})
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    PooledHTTPAdapter class for a keep-alive connection pool that records reuse.
+    """
+
+    def __init__(self, stats: ConnectionStats, pool_size: int) -> None:
+        """
+        Initialize the PooledHTTPAdapter instance.
+
+        Args:
+            stats (ConnectionStats): Receives request and connection counts.
+            pool_size (int): Maximum idle connections kept alive per host.
+        """
+        self.stats = stats
+        super().__init__(pool_maxsize=pool_size)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.stats),
+            "https": _counting_pool(HTTPSConnectionPool, self.stats),
+        }
+
+    def send(self, request, *args, **kwargs):
+        self.stats.record_request()
+        return super().send(request, *args, **kwargs)
+
+
+def build_session(pool_size: int, stats: ConnectionStats) -> requests.Session:
+    """
+    Build the exporter-wide session shared by every collector.
+
+    Args:
+        pool_size (int): Maximum idle connections kept alive per host. Should be
+            at least the number of concurrent requests.
+        stats (ConnectionStats): Receives request and connection counts.
+
+    Returns:
+        requests.Session: Session with a pooled adapter mounted for http and https.
+    """
+    session = requests.Session()
+    adapter = PooledHTTPAdapter(stats, pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PrefectSessionMetrics:
+    """
+    PrefectSessionMetrics class for exposing connection reuse of the shared session.
+    """
+
+    def __init__(self, stats: ConnectionStats) -> None:
+        """
+        Initialize the PrefectSessionMetrics instance.
+
+        Args:
+            stats (ConnectionStats): Counts recorded by the shared session.
+        """
+        self.stats = stats
+
+    def collect(self):
+        requests_total = CounterMetricFamily(
+            "prefect_exporter_http_requests",
+            "HTTP requests sent to the Prefect API",
+            labels=[],
+        )
+        requests_total.add_metric([], self.stats.requests)
+        yield requests_total
+
+        connections_total = CounterMetricFamily(
+            "prefect_exporter_http_connections_opened",
+            "New TCP connections opened to the Prefect API",
+            labels=[],
+        )
+        connections_total.add_metric([], self.stats.connections_opened)
+        yield connections_total
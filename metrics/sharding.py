@@ -0,0 +1,96 @@
+import hashlib
+
+
+class Shard:
+    """
+    Shard class assigning Prefect resources to one of several exporter replicas.
+
+    Every replica is configured with the same ``count`` and its own
+    ``index``, and owns the resources whose id hashes to it. Rendezvous
+    hashing keeps ownership deterministic across replicas and restarts, and
+    changing ``count`` only moves the resources of the added or removed
+    shards. Shard 0 is the designated shard: it also owns flow runs without
+    a deployment and emits the workspace-wide ``*_total`` families.
+    """
+
+    def __init__(self, index: int, count: int) -> None:
+        """
+        Initialize the Shard instance.
+
+        Args:
+            index (int): This replica's shard, from 0 to count - 1.
+            count (int): Number of shards.
+
+        Raises:
+            ValueError: If index is not a valid shard of count.
+        """
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Shard index {index} is not in [0, {count})")
+        self.index = index
+        self.count = count
+        self.deployment_ids = []
+        self._owners = {}
+
+    @property
+    def designated(self) -> bool:
+        return self.index == 0
+
+    def owner(self, key) -> int:
+        """
+        The shard owning ``key``.
+
+        Args:
+            key: A resource id.
+
+        Returns:
+            int: The index of the owning shard.
+        """
+        key = str(key)
+        owner = self._owners.get(key)
+        if owner is None:
+            owner = max(range(self.count), key=lambda shard: self._weight(shard, key))
+            self._owners[key] = owner
+        return owner
+
+    @staticmethod
+    def _weight(shard: int, key: str) -> int:
+        digest = hashlib.blake2b(f"{shard}:{key}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def owns(self, key) -> bool:
+        return self.owner(key) == self.index
+
+    def owns_flow_run(self, flow_run) -> bool:
+        """Whether the flow run's deployment is owned; runs without one belong to the designated shard."""
+        deployment_id = flow_run.get("deployment_id")
+        if deployment_id is None:
+            return self.designated
+        return self.owns(deployment_id)
+
+    def assign_deployments(self, deployments) -> None:
+        """
+        Record the owned deployments, which flow run queries are filtered on.
+
+        Args:
+            deployments (list): Every deployment of the workspace.
+        """
+        self.deployment_ids = sorted(
+            str(deployment["id"])
+            for deployment in deployments
+            if self.owns(deployment["id"])
+        )
+
+    def deployment_filter(self, include_adhoc: bool = True) -> dict:
+        """
+        Build the flow run ``deployment_id`` filter selecting this shard's runs.
+
+        Args:
+            include_adhoc (bool, optional): Whether the designated shard also
+                selects runs without a deployment. Default is True.
+
+        Returns:
+            dict: The filter.
+        """
+        if include_adhoc and self.designated:
+            return {"operator": "or_", "any_": self.deployment_ids, "is_null_": True}
+        return {"any_": self.deployment_ids}
@@ -0,0 +1,192 @@
+"""Background refresh of pre-built metric families served from a snapshot."""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    families: tuple
+    created_at: float
+    refresh_duration: float
+
+    def age(self) -> float:
+        """Seconds elapsed since this snapshot was built."""
+        return max(0.0, time.monotonic() - self.created_at)
+
+
+class SnapshotRefresher:
+    """
+    SnapshotRefresher class for rebuilding a MetricsSnapshot on a fixed interval.
+
+    A daemon thread calls ``build`` every ``interval`` seconds and atomically
+    swaps in the resulting families. Scrapes only read ``snapshot``, so they
+    never wait on the Prefect API. A failed refresh keeps the previous snapshot
+    in place; its growing age is the staleness signal. ``generation`` counts
+    the snapshots published, and ``wait_for_snapshot()`` waits for the first.
+    """
+
+    def __init__(self, build: Callable[[], Iterable], interval: float, logger) -> None:
+        """
+        Initialize the SnapshotRefresher instance.
+
+        Args:
+            build (callable): Returns the metric families for one collection cycle.
+            interval (float): Seconds between the start of consecutive refreshes.
+            logger (obj): The logger object.
+        """
+        self.build = build
+        self.interval = interval
+        self.logger = logger
+        self.snapshot: Optional[MetricsSnapshot] = None
+        self.generation = 0
+        self.refresh_failures = 0
+        self._published = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh_once(self) -> Optional[MetricsSnapshot]:
+        """
+        Run one collection cycle and publish its families as the new snapshot.
+
+        Returns:
+            MetricsSnapshot: The new snapshot, or None if the cycle failed.
+        """
+        started = time.monotonic()
+        try:
+            families = tuple(self.build())
+        except Exception:
+            self.refresh_failures += 1
+            self.logger.exception("Failed to refresh metrics, keeping last snapshot")
+            return None
+
+        finished = time.monotonic()
+        self.snapshot = MetricsSnapshot(
+            families=families,
+            created_at=finished,
+            refresh_duration=finished - started,
+        )
+        self.generation += 1
+        self._published.set()
+        return self.snapshot
+
+    def wait_for_snapshot(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until a snapshot has been published.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait. Default is no limit.
+
+        Returns:
+            bool: Whether a snapshot is available.
+        """
+        return self._published.wait(timeout)
+
+    def start(self) -> None:
+        """Start the background refresh thread if it is not already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="prefect-metrics-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Signal the refresh thread to exit and wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.refresh_once()
+            elapsed = time.monotonic() - started
+            self._stop.wait(max(0.0, self.interval - elapsed))
+
+
+class _Flight:
+    """One in-progress build and the outcome its waiters receive."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.families: Optional[tuple] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    SingleFlight class sharing one collection cycle among concurrent scrapes.
+
+    The first caller runs ``build``; callers arriving while it runs wait for
+    its families instead of starting their own cycle, and callers arriving
+    within ``window`` seconds after it finished reuse them. A failed build
+    is reported to the callers waiting on it but never reused.
+    ``generation`` counts the successful builds.
+    """
+
+    def __init__(self, build: Callable[[], Iterable], window: float = 0) -> None:
+        """
+        Initialize the SingleFlight instance.
+
+        Args:
+            build (callable): Returns the metric families for one collection cycle.
+            window (float, optional): Seconds a finished cycle is reused for. Default is 0.
+        """
+        self.build = build
+        self.window = window
+        self.last: Optional[MetricsSnapshot] = None
+        self.generation = 0
+        self.coalesced = 0
+        self._flight: Optional[_Flight] = None
+        self._lock = threading.Lock()
+
+    def collect(self) -> tuple:
+        """
+        Return the families of the current or a fresh collection cycle.
+
+        Raises:
+            Exception: Whatever the shared build raised.
+        """
+        with self._lock:
+            last = self.last
+            if last is not None and last.age() < self.window:
+                self.coalesced += 1
+                return last.families
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.families
+
+        started = time.monotonic()
+        try:
+            flight.families = tuple(self.build())
+        except BaseException as err:
+            flight.error = err
+            raise
+        finally:
+            finished = time.monotonic()
+            with self._lock:
+                self._flight = None
+                if flight.error is None:
+                    self.last = MetricsSnapshot(
+                        families=flight.families,
+                        created_at=finished,
+                        refresh_duration=finished - started,
+                    )
+                    self.generation += 1
+            flight.done.set()
+        return flight.families
@@ -15,6 +15,10 @@ class PrefectWorkPools(PrefectApiMetric):
         enable_pagination,
         pagination_limit,
         uri="work_pools",
+        limiter=None,
+        session=None,
+        stats=None,
+        deadline=None,
     ) -> None:
         """
         Initialize the PrefectWorkPools instance.
@@ -25,6 +29,10 @@ class PrefectWorkPools(PrefectApiMetric):
             max_retries (int): The maximum number of retries for HTTP requests.
             logger (obj): The logger object.
             uri (str, optional): The URI path for administrative endpoints. Default is "work_pools".
+            limiter (obj, optional): Context manager bounding concurrent HTTP requests. Default is None.
+            session (requests.Session, optional): Shared pooled session. Default is None.
+            stats (ExporterStats, optional): Shared API call instrumentation. Default is None.
+            deadline (Deadline, optional): Fetching stops with DeadlineExceeded once it passes. Default is None.
 
         """
         super().__init__(
@@ -35,6 +43,10 @@ class PrefectWorkPools(PrefectApiMetric):
             enable_pagination=enable_pagination,
             pagination_limit=pagination_limit,
             uri=uri,
+            limiter=limiter,
+            session=session,
+            stats=stats,
+            deadline=deadline,
         )
 
     def get_work_pools_info(self) -> list:
@@ -48,3 +60,13 @@ class PrefectWorkPools(PrefectApiMetric):
         all_work_pools = self._get_with_pagination()
 
         return all_work_pools
+
+    def count_work_pools(self):
+        """
+        Count Prefect work pools server-side.
+
+        Returns:
+            int: Number of work pools, or None on failure.
+
+        """
+        return self._count()
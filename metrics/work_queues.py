@@ -1,4 +1,6 @@
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 import time
@@ -21,6 +23,13 @@ class PrefectWorkQueues(PrefectApiMetric):
         enable_pagination,
         pagination_limit,
         uri="work_queues",
+        limiter=None,
+        session=None,
+        stats=None,
+        deadline=None,
+        status_cache=None,
+        status_concurrency=1,
+        shard=None,
     ) -> None:
         """
         Initialize the PrefectWorkQueues instance.
@@ -31,6 +40,13 @@ class PrefectWorkQueues(PrefectApiMetric):
             max_retries (int): The maximum number of retries for HTTP requests.
             logger (obj): The logger object.
             uri (str, optional): The URI path for administrative endpoints. Default is "work_queues".
+            limiter (obj, optional): Context manager bounding concurrent HTTP requests. Default is None.
+            session (requests.Session, optional): Shared pooled session. Default is None.
+            stats (ExporterStats, optional): Shared API call instrumentation. Default is None.
+            deadline (Deadline, optional): Fetching stops with DeadlineExceeded once it passes. Default is None.
+            status_cache (WorkQueueStatusCache, optional): Status cache kept across cycles. Default is a new cache that refreshes every status.
+            status_concurrency (int, optional): Maximum status requests in flight, independently of ``limiter``. Default is 1.
+            shard (Shard, optional): Only fetch the statuses of this shard's queues. Default is every queue.
 
         """
         super().__init__(
@@ -41,7 +57,19 @@ class PrefectWorkQueues(PrefectApiMetric):
             enable_pagination=enable_pagination,
             pagination_limit=pagination_limit,
             uri=uri,
+            limiter=limiter,
+            session=session,
+            stats=stats,
+            deadline=deadline,
         )
+        self.status_cache = (
+            status_cache if status_cache is not None else WorkQueueStatusCache()
+        )
+        self.status_concurrency = status_concurrency
+        # Status requests have their own limit rather than the shared limiter,
+        # so the fan-out over many queues is not held to fetch_concurrency.
+        self.status_limiter = threading.BoundedSemaphore(max(1, status_concurrency))
+        self.shard = shard
 
     def get_work_queues_info(self) -> list:
         """
@@ -53,10 +81,19 @@ class PrefectWorkQueues(PrefectApiMetric):
         """
         work_queues_info = self._get_with_pagination()
 
+        due = self.status_cache.due(owned_queue_ids(work_queues_info, self.shard))
+        if self.status_concurrency <= 1 or len(due) <= 1:
+            statuses = [self.get_work_queue_status_info(queue_id) for queue_id in due]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self.status_concurrency, len(due)),
+                thread_name_prefix="prefect-work-queue-status",
+            ) as pool:
+                statuses = list(pool.map(self.get_work_queue_status_info, due))
+        self.status_cache.update(dict(zip(due, statuses)))
+
         for queue_info in work_queues_info:
-            queue_info["status_info"] = self.get_work_queue_status_info(
-                queue_info["id"]
-            )
+            queue_info["status_info"] = self.status_cache.get(queue_info["id"])
 
         return work_queues_info
 
@@ -73,19 +110,31 @@ class PrefectWorkQueues(PrefectApiMetric):
 
         """
         endpoint = f"{self.url}/{self.uri}/{work_queue_id}/status"
+        # One label for every queue, not one per queue id.
+        label = f"{self.uri}/status"
 
         for retry in range(self.max_retries):
             try:
-                resp = requests.get(endpoint, headers=self.headers)
+                with self.status_limiter:
+                    started = time.perf_counter()
+                    resp = self.session.get(
+                        endpoint, headers=self.headers, **self._timeout(endpoint)
+                    )
+                    self.stats.observe_request(
+                        label, time.perf_counter() - started, len(resp.content)
+                    )
                 resp.raise_for_status()
                 return resp.json()
             except requests.exceptions.RequestException as err:
                 signal = detect_retry_after(err.response)
                 if signal is not None:
                     log_retry_after(self.logger, endpoint, signal)
+                    self.stats.observe_retry_after_abort(label)
                     return {}
                 self.logger.error(err)
                 if retry < self.max_retries - 1:
+                    self._check_deadline(endpoint, backoff=2**retry)
+                    self.stats.observe_retry(label)
                     time.sleep(2**retry)
                 else:
                     self.logger.error(
@@ -93,3 +142,100 @@ class PrefectWorkQueues(PrefectApiMetric):
                         endpoint,
                     )
                     return {}
+
+
+def owned_queue_ids(work_queues_info, shard=None) -> list:
+    """
+    Ids of the work queues whose status is fetched: those owned by ``shard``, or all of them.
+
+    Args:
+        work_queues_info (list): Work queues.
+        shard (Shard, optional): Shard the statuses are fetched for. Default is None.
+
+    Returns:
+        list: Work queue ids.
+    """
+    return [
+        queue_info["id"]
+        for queue_info in work_queues_info
+        if shard is None or shard.owns(queue_info["id"])
+    ]
+
+
+class WorkQueueStatusCache:
+    """
+    WorkQueueStatusCache class keeping work queue statuses across collection cycles.
+
+    Each status is reused for ``ttl`` seconds. Once expired, statuses are
+    refreshed in rolling batches: at most ``batch_size`` per cycle, oldest
+    first, so the status requests of a cycle stay bounded however many
+    queues exist. Queues seen for the first time are always fetched. A status
+    is never served past its ``ttl`` on account of a failed refresh: the
+    queue's status becomes unknown (empty) until a refresh succeeds, and it
+    stays first in line for the next cycle. With the defaults every status is
+    refreshed every cycle.
+    """
+
+    def __init__(self, ttl=0, batch_size=0) -> None:
+        """
+        Initialize the WorkQueueStatusCache instance.
+
+        Args:
+            ttl (float, optional): Seconds a status is reused before it is due for refresh. Default is 0.
+            batch_size (int, optional): Maximum expired statuses refreshed per cycle. 0 refreshes all of them. Default is 0.
+        """
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.statuses = {}
+        self.lock = threading.Lock()
+
+    def due(self, queue_ids) -> list:
+        """
+        Select the queues whose status to fetch this cycle, forgetting deleted queues.
+
+        Args:
+            queue_ids (list): Ids of the current work queues.
+
+        Returns:
+            list: Queue ids never fetched, then expired ones oldest first.
+        """
+        now = time.monotonic()
+        with self.lock:
+            current = dict.fromkeys(queue_ids)
+            for queue_id in set(self.statuses) - current.keys():
+                del self.statuses[queue_id]
+            missing = [q for q in current if q not in self.statuses]
+            expired = sorted(
+                (
+                    q
+                    for q in current
+                    if q in self.statuses and now - self.statuses[q][1] >= self.ttl
+                ),
+                key=lambda q: self.statuses[q][1],
+            )
+        if self.batch_size > 0:
+            expired = expired[: self.batch_size]
+        return missing + expired
+
+    def update(self, statuses: dict) -> None:
+        """
+        Store freshly fetched statuses.
+
+        An empty (failed) status replaces the cached one but keeps its fetch
+        time, so the queue is retried first.
+
+        Args:
+            statuses (dict): Mapping of queue id -> status from get_work_queue_status_info().
+        """
+        now = time.monotonic()
+        with self.lock:
+            for queue_id, status in statuses.items():
+                if status:
+                    self.statuses[queue_id] = (status, now)
+                elif queue_id in self.statuses:
+                    self.statuses[queue_id] = ({}, self.statuses[queue_id][1])
+
+    def get(self, queue_id) -> dict:
+        with self.lock:
+            entry = self.statuses.get(queue_id)
+        return entry[0] if entry is not None else {}
@@ -0,0 +1,287 @@
+import base64
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import yaml
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.metrics_core import Metric
+
+from metrics.deadline import scrape_deadline
+
+WORKSPACE_LABEL = "workspace"
+
+
+@dataclass(frozen=True)
+class Workspace:
+    name: str
+    url: str
+    headers: dict
+    # Also authenticate the event stream, which does not use the headers.
+    api_key: str = field(default="", repr=False)
+    api_auth_string: str = field(default="", repr=False)
+
+
+def build_headers(api_key: str = "", api_auth_string: str = "") -> dict:
+    """
+    Build the HTTP headers of requests to a Prefect API.
+
+    Args:
+        api_key (str, optional): Prefect Cloud API key, sent as a Bearer token.
+        api_auth_string (str, optional): "user:password" for a self-hosted server, sent as Basic auth.
+            Ignored when an API key is given.
+
+    Returns:
+        dict: The headers.
+    """
+    headers = {"accept": "application/json", "Content-Type": "application/json"}
+    if api_auth_string:
+        encoded = base64.b64encode(api_auth_string.encode("utf-8")).decode("utf-8")
+        headers["Authorization"] = f"Basic {encoded}"
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    return headers
+
+
+def load_workspaces(path: str) -> list:
+    """
+    Load the workspaces to collect from a YAML (or JSON) config file.
+
+    The file holds a ``workspaces`` list; each entry has a unique ``name``,
+    the ``url`` of its API, and optionally ``api_key`` or ``api_auth_string``.
+    ``api_key_env`` and ``api_auth_string_env`` name environment variables to
+    read those from instead, keeping secrets out of the file::
+
+        workspaces:
+          - name: production
+            url: https://api.prefect.cloud/api/accounts/<id>/workspaces/<id>
+            api_key_env: PREFECT_API_KEY_PRODUCTION
+
+    Args:
+        path (str): Path of the config file.
+
+    Returns:
+        list: The Workspace instances, in file order.
+
+    Raises:
+        ValueError: If the file is malformed or a name is repeated.
+    """
+    with open(path) as config_file:
+        config = yaml.safe_load(config_file) or {}
+
+    entries = config.get("workspaces") if isinstance(config, dict) else None
+    if not entries:
+        raise ValueError(f"{path} does not list any workspaces")
+
+    workspaces = []
+    for entry in entries:
+        if not entry.get("name") or not entry.get("url"):
+            raise ValueError(f"Workspace {entry!r} in {path} needs a name and a url")
+        name = str(entry["name"])
+        if any(workspace.name == name for workspace in workspaces):
+            raise ValueError(f"Workspace {name!r} is listed twice in {path}")
+        credentials = {}
+        for key in ("api_key", "api_auth_string"):
+            value = entry.get(key)
+            if entry.get(f"{key}_env"):
+                value = os.getenv(entry[f"{key}_env"], "")
+            credentials[key] = str(value or "")
+        workspaces.append(
+            Workspace(
+                name=name,
+                url=entry["url"],
+                headers=build_headers(**credentials),
+                **credentials,
+            )
+        )
+    return workspaces
+
+
+def label_families(families, label: str, value: str) -> list:
+    """
+    Copy metric families with one more label on every sample.
+
+    Args:
+        families (iterable): Metric families.
+        label (str): Name of the added label.
+        value (str): Value of the added label.
+
+    Returns:
+        list: The labeled copies.
+    """
+    labeled = []
+    for family in families:
+        copy = Metric(family.name, family.documentation, family.type, family.unit)
+        copy.samples = [
+            sample._replace(labels={label: value, **sample.labels})
+            for sample in family.samples
+        ]
+        labeled.append(copy)
+    return labeled
+
+
+class MultiWorkspaceCollector:
+    """
+    MultiWorkspaceCollector class for serving several Prefect workspaces from one exporter.
+
+    Each workspace keeps its own collectors (its PrefectMetrics and exporter
+    self-metrics), so caches, CSRF tokens and request limiters never mix.
+    On a scrape, every workspace is collected on a shared worker pool; the
+    samples of each are labeled with its name and families of the same name
+    are merged into one. A workspace that has not finished by the scrape's
+    deadline (or ``timeout`` without one) is left out of that scrape rather
+    than delaying the others, and reported down. It is not collected again
+    until that collection finishes, so a slow workspace never occupies more
+    than one worker.
+    """
+
+    def __init__(
+        self, workspaces: dict, logger, concurrency: int = 8, timeout: float = 30
+    ) -> None:
+        """
+        Initialize the MultiWorkspaceCollector instance.
+
+        Args:
+            workspaces (dict): Mapping of workspace name -> list of collectors.
+            logger (obj): The logger object.
+            concurrency (int, optional): Workspaces collected at once. Default is 8.
+            timeout (float, optional): Seconds a scrape waits for the workspaces when it has no deadline. Default is 30.
+        """
+        self.workspaces = workspaces
+        self.logger = logger
+        self.timeout = timeout
+        self.up = {}
+        self.collect_seconds = {}
+        self.in_flight = {}
+        self.pool = ThreadPoolExecutor(
+            max_workers=max(1, min(concurrency, len(workspaces))),
+            thread_name_prefix="prefect-workspace",
+        )
+
+    def start(self) -> None:
+        """Start every workspace's collectors that run in the background."""
+        for collector in self._collectors():
+            if hasattr(collector, "start"):
+                collector.start()
+
+    def stop(self) -> None:
+        """Stop every workspace's collectors and the worker pool."""
+        for collector in self._collectors():
+            if hasattr(collector, "stop"):
+                collector.stop()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def wait_for_snapshot(self, timeout=None) -> bool:
+        """
+        Wait until every workspace's collectors serve data, see PrefectMetrics.wait_for_snapshot().
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait in total. Default is no limit.
+
+        Returns:
+            bool: Whether every workspace does.
+        """
+        until = None if timeout is None else time.monotonic() + timeout
+        for collector in self._collectors():
+            if not hasattr(collector, "wait_for_snapshot"):
+                continue
+            remaining = None if until is None else max(0.0, until - time.monotonic())
+            if not collector.wait_for_snapshot(remaining):
+                return False
+        return True
+
+    def _collectors(self):
+        for collectors in self.workspaces.values():
+            yield from collectors
+
+    def collect(self):
+        """
+        Collect every workspace for a single Prometheus scrape.
+        """
+        futures = {}
+        for name in self.workspaces:
+            previous = self.in_flight.get(name)
+            if previous is not None and not previous.done():
+                self.up[name] = False
+                self.logger.warning(
+                    f"Workspace {name} is still collecting for an earlier scrape, skipping it"
+                )
+                continue
+            # Each task runs in a copy of the scrape's context, so the
+            # workspace's collection sees its deadline.
+            futures[name] = self.in_flight[name] = self.pool.submit(
+                contextvars.copy_context().run, self._collect_workspace, name
+            )
+        deadline = scrape_deadline.get()
+        timeout = deadline.remaining() if deadline is not None else self.timeout
+        done, _ = wait(futures.values(), timeout=timeout)
+
+        merged = {}
+        for name, future in futures.items():
+            self.up[name] = future in done
+            if future not in done:
+                self.logger.warning(
+                    f"Workspace {name} did not finish collecting before the scrape deadline"
+                )
+                continue
+            for family in future.result():
+                if family.name in merged:
+                    merged[family.name].samples.extend(family.samples)
+                else:
+                    merged[family.name] = family
+        yield from merged.values()
+        yield from self._workspace_metrics()
+
+    def exposition_version(self):
+        """
+        Identify the data collect() would serve right now, see ExpositionCache.
+
+        Returns:
+            tuple: Every workspace's PrefectMetrics.exposition_version(), or None
+            when any of them would collect anew.
+        """
+        versions = tuple(
+            collector.exposition_version()
+            for collectors in self.workspaces.values()
+            for collector in collectors
+            if hasattr(collector, "exposition_version")
+        )
+        if any(version is None for version in versions):
+            return None
+        return versions
+
+    def _collect_workspace(self, name: str) -> list:
+        started = time.perf_counter()
+        families = []
+        for collector in self.workspaces[name]:
+            try:
+                families.extend(collector.collect())
+            except Exception:
+                self.logger.exception(f"Failed to collect workspace {name}")
+        self.collect_seconds[name] = time.perf_counter() - started
+        return label_families(families, WORKSPACE_LABEL, name)
+
+    def _workspace_metrics(self):
+        """
+        Build the per-workspace collection status metrics.
+        """
+        up = GaugeMetricFamily(
+            "prefect_exporter_workspace_up",
+            "Whether the workspace was collected before the scrape deadline",
+            labels=[WORKSPACE_LABEL],
+        )
+        for name in self.workspaces:
+            up.add_metric([name], int(self.up.get(name, False)))
+        yield up
+
+        collect_seconds = GaugeMetricFamily(
+            "prefect_exporter_workspace_collect_seconds",
+            "Duration of the workspace's last finished collection",
+            labels=[WORKSPACE_LABEL],
+        )
+        for name in self.workspaces:
+            if name in self.collect_seconds:
+                collect_seconds.add_metric([name], self.collect_seconds[name])
+        yield collect_seconds
@@ -1,3 +1,4 @@
+import json
 import logging
 from unittest.mock import MagicMock
 
@@ -116,3 +117,32 @@ def test_503_without_retry_after_still_retries(monkeypatch):
     assert result == []
     assert len(responses.calls) == 3
     assert sleep_mock.call_count == 2
+
+
+@responses.activate
+def test_count_posts_filter_to_count_endpoint():
+    responses.add(
+        responses.POST, "http://prefect.test/api/flow_runs/count", status=200, json=42
+    )
+
+    api = _make(uri="flow_runs")
+    result = api._count({"flow_runs": {"operator": "and_"}})
+
+    assert result == 42
+    assert json.loads(responses.calls[0].request.body) == {
+        "flow_runs": {"operator": "and_"}
+    }
+
+
+@responses.activate
+def test_count_returns_none_on_retry_after(monkeypatch):
+    monkeypatch.setattr("metrics.api_metric.time.sleep", MagicMock())
+    responses.add(
+        responses.POST,
+        "http://prefect.test/api/deployments/count",
+        status=429,
+        headers={"Retry-After": "5"},
+        json={},
+    )
+
+    assert _make()._count() is None
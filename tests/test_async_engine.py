@@ -0,0 +1,207 @@
+"""Tests for the asyncio + HTTP/2 API engine."""
+
+import asyncio
+import json
+import logging
+import re
+from unittest.mock import AsyncMock
+
+import httpx
+import responses
+
+from metrics.async_engine import AsyncPrefectApiMetric, AsyncPrefectMetrics
+from metrics.metrics import PrefectMetrics
+
+URL = "http://prefect.test/api"
+
+DATA = {
+    "deployments": [{"id": "dep-1", "name": "my-deployment", "flow_id": "flow-1"}],
+    "flows": [{"id": "flow-1", "name": "my-flow"}],
+    "work_pools": [{"name": "pool", "type": "process", "status": "READY"}],
+    "work_queues": [{"id": "wq-1", "name": "default", "work_pool_name": "pool"}],
+}
+FLOW_RUN = {
+    "id": "run-1",
+    "deployment_id": "dep-1",
+    "flow_id": "flow-1",
+    "state_name": "Failed",
+    "total_run_time": 4.0,
+}
+STATUS = {"healthy": True, "late_runs_count": 2, "health_check_policy": {}}
+
+
+def _route(method, path, body):
+    """Answer a request like the Prefect API would for the fixture DATA."""
+    if path.endswith("/status"):
+        return STATUS
+    uri = path[len("/api/") : -len("/filter")]
+    if uri == "flow_runs":
+        state_filter = body["flow_runs"].get("state", {}).get("type", {})
+        return [FLOW_RUN] if "FAILED" in state_filter.get("any_", []) else []
+    return DATA[uri]
+
+
+def _kwargs():
+    return {
+        "url": URL,
+        "headers": {"accept": "application/json"},
+        "offset_minutes": 3,
+        "failed_runs_offset_minutes": 10080,
+        "failed_runs_limit": 10,
+        "max_retries": 1,
+        "client_id": "test-client-id",
+        "csrf_enabled": False,
+        "logger": logging.getLogger("test"),
+        "enable_pagination": False,
+        "pagination_limit": 200,
+        "fetch_concurrency": 4,
+    }
+
+
+def _samples(families):
+    return sorted(
+        (s.name, tuple(sorted(s.labels.items())), s.value)
+        for family in families
+        for s in family.samples
+    )
+
+
+@responses.activate
+def test_async_engine_matches_requests_engine():
+    def callback(request):
+        body = json.loads(request.body) if request.body else {}
+        path = request.path_url.split("?")[0]
+        return (200, {}, json.dumps(_route(request.method, path, body)))
+
+    for method in (responses.GET, responses.POST):
+        responses.add_callback(
+            method,
+            re.compile(f"{URL}/.*"),
+            callback=callback,
+            content_type="application/json",
+        )
+    expected = _samples(PrefectMetrics(**_kwargs()).collect())
+
+    def handler(request):
+        body = json.loads(request.content) if request.content else {}
+        return httpx.Response(200, json=_route(request.method, request.url.path, body))
+
+    metrics = AsyncPrefectMetrics(**_kwargs(), transport=httpx.MockTransport(handler))
+    try:
+        actual = _samples(metrics.collect())
+    finally:
+        metrics.stop()
+
+    assert actual == expected
+    assert any(name == "prefect_deployment_failed_flow_runs" for name, _, _ in actual)
+    assert any(
+        name == "prefect_work_queues_late_runs_count" and value == 2
+        for name, _, value in actual
+    )
+
+
+def test_async_retry_after_aborts_immediately(monkeypatch):
+    sleep_mock = AsyncMock()
+    monkeypatch.setattr("metrics.async_engine.asyncio.sleep", sleep_mock)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(
+            503,
+            headers={"Retry-After": "1200", "Prefect-Maintenance": "true"},
+            json={},
+        )
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await AsyncPrefectApiMetric(
+                URL,
+                {},
+                3,
+                logging.getLogger("test"),
+                True,
+                2,
+                "deployments",
+                client,
+            )._get_with_pagination()
+
+    assert asyncio.run(run()) == []
+    assert len(calls) == 1
+    assert sleep_mock.call_count == 0
+
+
+def test_async_500_retries_then_returns_partial(monkeypatch):
+    sleep_mock = AsyncMock()
+    monkeypatch.setattr("metrics.async_engine.asyncio.sleep", sleep_mock)
+    pages = [httpx.Response(200, json=[{"id": "a"}, {"id": "b"}])] + [
+        httpx.Response(500, json={}) for _ in range(3)
+    ]
+
+    async def run():
+        transport = httpx.MockTransport(lambda request: pages.pop(0))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await AsyncPrefectApiMetric(
+                URL,
+                {},
+                3,
+                logging.getLogger("test"),
+                True,
+                2,
+                "deployments",
+                client,
+            )._get_with_pagination()
+
+    assert asyncio.run(run()) == [{"id": "a"}, {"id": "b"}]
+    assert sleep_mock.call_count == 2
+
+
+def test_async_undecodable_body_is_retried(monkeypatch):
+    sleep_mock = AsyncMock()
+    monkeypatch.setattr("metrics.async_engine.asyncio.sleep", sleep_mock)
+    pages = [
+        httpx.Response(200, text="<html>gateway</html>"),
+        httpx.Response(200, json=[{"id": "a"}]),
+    ]
+
+    async def run():
+        transport = httpx.MockTransport(lambda request: pages.pop(0))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await AsyncPrefectApiMetric(
+                URL,
+                {},
+                3,
+                logging.getLogger("test"),
+                False,
+                2,
+                "deployments",
+                client,
+            )._get_with_pagination()
+
+    assert asyncio.run(run()) == [{"id": "a"}]
+    assert sleep_mock.call_count == 1
+
+
+def test_async_requests_bounded_by_request_concurrency():
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.02)
+        in_flight["now"] -= 1
+        body = json.loads(request.content) if request.content else {}
+        return httpx.Response(200, json=_route(request.method, request.url.path, body))
+
+    metrics = AsyncPrefectMetrics(
+        **{**_kwargs(), "fetch_concurrency": 1},
+        request_concurrency=3,
+        transport=httpx.MockTransport(handler),
+    )
+    try:
+        list(metrics.collect())
+    finally:
+        metrics.stop()
+
+    # Not held to fetch_concurrency, but to its own limit.
+    assert 1 < in_flight["peak"] <= 3
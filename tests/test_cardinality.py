@@ -0,0 +1,78 @@
+"""Tests for the per-family series budgets of the cardinality governor."""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from metrics.cardinality import CardinalityGovernor, parse_series_budgets
+from metrics.metrics import PrefectMetrics
+
+
+def test_over_budget_keeps_top_values_and_folds_rest():
+    governor = CardinalityGovernor({"family": 3})
+    samples = [(["a"], 1), (["b"], 5), (["c"], 3), (["d"], 2)]
+
+    limited = governor.limit("family", samples)
+
+    assert limited == [(["b"], 5), (["c"], 3), (["other"], 3)]
+    assert governor.dropped == {"family": 2}
+
+
+def test_within_budget_and_unbudgeted_families_unchanged():
+    governor = CardinalityGovernor({"family": 3})
+    samples = [(["a"], 1)]
+
+    assert governor.limit("family", samples) is samples
+    assert governor.limit("unlimited", samples * 10) == samples * 10
+    assert governor.dropped == {"family": 0}
+
+
+def test_parse_series_budgets():
+    assert parse_series_budgets("") == {}
+    assert parse_series_budgets("a=10, b = 2,") == {"a": 10, "b": 2}
+
+
+def test_ongoing_runs_keep_longest_running():
+    metrics = PrefectMetrics(
+        url="http://prefect.test/api",
+        headers={},
+        offset_minutes=3,
+        failed_runs_offset_minutes=0,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        series_budgets={"prefect_flow_runs_ongoing_run_time": 3},
+    )
+    now = datetime.now(timezone.utc)
+    ongoing = [
+        {
+            "id": f"run-{minutes}",
+            "state_name": "Running",
+            "start_time": (now - timedelta(minutes=minutes)).isoformat(),
+        }
+        for minutes in (1, 50, 20, 5, 10)
+    ]
+    resources = {
+        "deployments": [],
+        "flows": [],
+        "flow_runs": [],
+        "all_flow_runs": [],
+        "ongoing_flow_runs": ongoing,
+        "failed_flow_runs": {},
+        "work_pools": [],
+        "work_queues": [],
+    }
+
+    families = {family.name: family for family in metrics._build_metrics(resources)}
+
+    run_ids = [
+        s.labels["flow_run_id"]
+        for s in families["prefect_flow_runs_ongoing_run_time"].samples
+    ]
+    assert run_ids == ["run-50", "run-20", "other"]
+    (dropped,) = families["prefect_exporter_cardinality_dropped_series"].samples
+    assert dropped.labels == {"family": "prefect_flow_runs_ongoing_run_time"}
+    assert dropped.value == 3
@@ -0,0 +1,26 @@
+"""Tests for the per-cycle id-indexed Catalog."""
+
+from metrics.catalog import Catalog
+
+
+def _catalog():
+    return Catalog(
+        deployments=[
+            {"id": "dep-1", "name": "first"},
+            {"id": "dep-1", "name": "duplicate"},
+            {"id": "dep-2"},
+            {"name": "no-id"},
+        ],
+        flows=[{"id": "flow-1", "name": "my-flow"}],
+    )
+
+
+def test_resolves_names_like_linear_scan():
+    catalog = _catalog()
+
+    assert catalog.deployment_name("dep-1") == "first"
+    assert catalog.deployment_name("dep-2") is None
+    assert catalog.deployment_name("missing") == "null"
+    assert catalog.deployment_name(None) == "null"
+    assert catalog.flow_name("flow-1") == "my-flow"
+    assert catalog.flow_name(None) == "null"
@@ -0,0 +1,201 @@
+"""Tests for deadline-bounded collection with stale fallback."""
+
+import json
+import logging
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+import responses
+
+from metrics.api_metric import PrefectApiMetric
+from metrics.deadline import Deadline, DeadlineExceeded, StaleFallback, scrape_deadline
+from metrics.metrics import PrefectMetrics
+from metrics.server import scrape_deadline_app
+
+URL = "http://prefect.test/api"
+
+
+def _make(fetch_concurrency=4, deadline_budget=0, **kwargs):
+    return PrefectMetrics(
+        url=URL,
+        headers={},
+        offset_minutes=3,
+        failed_runs_offset_minutes=0,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        fetch_concurrency=fetch_concurrency,
+        deadline_budget=deadline_budget,
+        **kwargs,
+    )
+
+
+def test_deadline_from_scrape_timeout():
+    deadline = Deadline.from_scrape_timeout("10", margin=0.5)
+
+    assert 9 < deadline.remaining() <= 9.5
+    assert Deadline.from_scrape_timeout(None, 0.5) is None
+    assert Deadline.from_scrape_timeout("soon", 0.5) is None
+    assert Deadline.from_scrape_timeout("0.2", 0.5).expired()
+    assert Deadline.earliest(None, deadline, Deadline(1)).remaining() <= 1
+    assert Deadline.earliest(None, None) is None
+
+
+def test_stale_fallback_serves_last_complete_result():
+    fallback = StaleFallback()
+    assert fallback.fill(["flows", "flows_count"], {"flows": [1]}) == {"flows": 0.0}
+
+    resources = {}
+    ages = fallback.fill(["flows", "flows_count", "failed_flow_runs"], resources)
+
+    assert resources == {"flows": [1], "flows_count": None, "failed_flow_runs": {}}
+    assert set(ages) == {"flows"}
+    assert ages["flows"] >= 0
+
+
+@responses.activate
+def test_retry_backoff_past_deadline_is_not_slept(monkeypatch):
+    sleep_mock = MagicMock()
+    monkeypatch.setattr("metrics.api_metric.time.sleep", sleep_mock)
+    responses.add(responses.POST, f"{URL}/flows/filter", status=500)
+    api = PrefectApiMetric(
+        url=URL,
+        headers={},
+        max_retries=3,
+        logger=logging.getLogger("test"),
+        enable_pagination=True,
+        pagination_limit=200,
+        uri="flows",
+        deadline=Deadline(0.5),
+    )
+
+    with pytest.raises(DeadlineExceeded):
+        api._get_with_pagination()
+    assert sleep_mock.call_count == 0
+    assert len(responses.calls) == 1
+
+
+def _register_slow_flows(slow, finished):
+    def flows(request):
+        if not slow:
+            return (200, {}, json.dumps([{"id": "flow-1", "name": "old"}]))
+        time.sleep(0.5)
+        finished.set()
+        return (200, {}, json.dumps([{"id": "flow-2", "name": "new"}]))
+
+    responses.add_callback(responses.POST, f"{URL}/flows/filter", callback=flows)
+    for uri in ("deployments", "flow_runs", "work_pools", "work_queues"):
+        responses.add(responses.POST, f"{URL}/{uri}/filter", json=[])
+
+
+def _collect_twice(metrics, slow, second_deadline):
+    """Collect once without time pressure, then again with a short deadline."""
+    token = scrape_deadline.set(Deadline(5))
+    try:
+        list(metrics.collect())
+        slow.append(True)
+        scrape_deadline.set(Deadline(second_deadline))
+        started = time.monotonic()
+        families = {family.name: family for family in metrics.collect()}
+        return families, time.monotonic() - started
+    finally:
+        scrape_deadline.reset(token)
+
+
+def _staleness(families):
+    return {
+        sample.labels["resource"]: sample.value
+        for sample in families["prefect_exporter_resource_staleness_seconds"].samples
+    }
+
+
+@responses.activate
+def test_unfinished_fetches_are_served_from_the_last_cycle():
+    slow, finished = [], threading.Event()
+    _register_slow_flows(slow, finished)
+
+    families, elapsed = _collect_twice(_make(fetch_concurrency=4), slow, 0.2)
+    # Let the abandoned request finish inside this test's mock.
+    finished.wait(5)
+
+    # The slow fetch is abandoned rather than waited for.
+    assert elapsed < 0.5
+    info_flows = families["prefect_info_flows"].samples
+    assert [sample.labels["flow_name"] for sample in info_flows] == ["old"]
+    staleness = _staleness(families)
+    assert staleness["flows"] > 0
+    assert staleness["deployments"] == 0
+    assert families["prefect_exporter_deadline_exceeded"].samples[0].value == 1
+
+
+@responses.activate
+def test_flow_run_window_unfinished_on_the_first_cycle_is_served_empty():
+    finished = threading.Event()
+
+    def flow_runs(request):
+        time.sleep(0.5)
+        finished.set()
+        return (200, {}, "[]")
+
+    responses.add_callback(
+        responses.POST, f"{URL}/flow_runs/filter", callback=flow_runs
+    )
+    responses.add(
+        responses.POST, f"{URL}/flows/filter", json=[{"id": "flow-1", "name": "f"}]
+    )
+    for uri in ("deployments", "work_pools", "work_queues"):
+        responses.add(responses.POST, f"{URL}/{uri}/filter", json=[])
+    metrics = _make(enable_incremental_flow_runs=True)
+
+    token = scrape_deadline.set(Deadline(0.2))
+    try:
+        families = {family.name: family for family in metrics.collect()}
+    finally:
+        scrape_deadline.reset(token)
+    finished.wait(5)
+
+    # The other resources are still served.
+    info_flows = families["prefect_info_flows"].samples
+    assert [sample.labels["flow_name"] for sample in info_flows] == ["f"]
+    assert families["prefect_flow_runs_total"].samples[0].value == 0
+    assert families["prefect_exporter_deadline_exceeded"].samples[0].value == 1
+
+
+@responses.activate
+def test_serial_fetches_after_the_deadline_are_skipped():
+    slow, finished = [], threading.Event()
+    _register_slow_flows(slow, finished)
+    metrics = _make(fetch_concurrency=1)
+
+    families, _ = _collect_twice(metrics, slow, 0.2)
+
+    # The slow fetch completed, so its data is fresh; the ones after it are not.
+    staleness = _staleness(families)
+    assert staleness["flows"] == 0
+    assert staleness["work_pools"] > 0
+    work_pool_calls = [
+        call for call in responses.calls if "work_pools" in call.request.url
+    ]
+    assert len(work_pool_calls) == 1
+
+
+def test_scrape_deadline_app_publishes_header_deadline():
+    seen = []
+
+    def app(environ, start_response):
+        seen.append(scrape_deadline.get())
+        return [b""]
+
+    wrapped = scrape_deadline_app(app, margin=1)
+    wrapped({"HTTP_X_PROMETHEUS_SCRAPE_TIMEOUT_SECONDS": "10"}, None)
+    wrapped({}, None)
+
+    assert 8 < seen[0].remaining() <= 9
+    assert seen[1] is None
+    assert scrape_deadline.get() is None
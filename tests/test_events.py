@@ -0,0 +1,218 @@
+"""Tests for the event-stream flow run mode."""
+
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import responses
+from prefect.events import Event
+from websockets.asyncio.server import serve
+
+from metrics.events import FlowRunEventListener, FlowRunEventStore
+from metrics.metrics import PrefectMetrics
+
+
+def _event(run_id, state_type, at, deployment_id="dep-1", flow_id="flow-1"):
+    return Event(
+        id=uuid.uuid4(),
+        occurred=at,
+        event=f"prefect.flow-run.{state_type.capitalize()}",
+        resource={
+            "prefect.resource.id": f"prefect.flow-run.{run_id}",
+            "prefect.resource.name": f"name-{run_id}",
+            "prefect.state-type": state_type,
+            "prefect.state-name": state_type.capitalize(),
+            "prefect.state-timestamp": at.isoformat(),
+        },
+        related=[
+            {
+                "prefect.resource.id": f"prefect.deployment.{deployment_id}",
+                "prefect.resource.role": "deployment",
+            },
+            {
+                "prefect.resource.id": f"prefect.flow.{flow_id}",
+                "prefect.resource.role": "flow",
+            },
+            {
+                "prefect.resource.id": "prefect.work-queue.wq-1",
+                "prefect.resource.role": "work-queue",
+                "prefect.resource.name": "default",
+            },
+        ],
+    )
+
+
+def _ids(runs):
+    return sorted(run.get("id") for run in runs)
+
+
+def test_events_move_run_from_ongoing_to_ended():
+    store = FlowRunEventStore(offset_minutes=3, reconcile_interval=300)
+    now = datetime.now(timezone.utc)
+
+    store.apply(_event("run-1", "PENDING", now - timedelta(seconds=30)))
+    store.apply(_event("run-1", "RUNNING", now - timedelta(seconds=20)))
+    window = store.window(now)
+    assert _ids(window["ongoing_flow_runs"]) == ["run-1"]
+    assert _ids(window["flow_runs"]) == ["run-1"]
+    assert window["all_flow_runs"] == []
+
+    store.apply(_event("run-1", "COMPLETED", now - timedelta(seconds=5)))
+    window = store.window(now)
+    (run,) = window["all_flow_runs"]
+    assert window["ongoing_flow_runs"] == []
+    assert run.get("state_name") == "Completed"
+    assert run.get("deployment_id") == "dep-1"
+    assert run.get("work_queue_name") == "default"
+    assert run.get("total_run_time") == 15.0
+
+
+def test_out_of_order_event_ignored():
+    store = FlowRunEventStore(offset_minutes=3, reconcile_interval=300)
+    now = datetime.now(timezone.utc)
+
+    store.apply(_event("run-1", "FAILED", now))
+    assert not store.apply(_event("run-1", "RUNNING", now - timedelta(seconds=10)))
+    assert store.runs_by_id["run-1"].get("state_type") == "FAILED"
+
+
+def test_reconcile_keeps_events_newer_than_poll():
+    store = FlowRunEventStore(offset_minutes=3, reconcile_interval=300)
+    now = datetime.now(timezone.utc)
+    polled_at = now - timedelta(seconds=10)
+    store.apply(_event("run-1", "COMPLETED", now))
+    store.apply(_event("run-2", "RUNNING", now - timedelta(seconds=60)))
+
+    store.reconcile(
+        [
+            {"id": "run-1", "state_type": "RUNNING", "start_time": now.isoformat()},
+            {"id": "run-3", "state_type": "RUNNING", "start_time": now.isoformat()},
+        ],
+        polled_at,
+    )
+
+    assert sorted(store.runs_by_id) == ["run-1", "run-3"]
+    assert store.runs_by_id["run-1"].get("state_type") == "COMPLETED"
+    assert not store.needs_reconcile()
+    store.mark_stale()
+    assert store.needs_reconcile()
+
+
+@pytest.fixture
+def fake_event_server():
+    """Serve /events/out like Prefect: auth handshake, filter, then queued events."""
+    received = []
+    outgoing = asyncio.Queue()
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def handler(websocket):
+        received.append(json.loads(await websocket.recv()))
+        await websocket.send(json.dumps({"type": "auth_success"}))
+        received.append(json.loads(await websocket.recv()))
+        while (event := await outgoing.get()) is not None:
+            await websocket.send(
+                json.dumps({"type": "event", "event": event.model_dump(mode="json")})
+            )
+
+    async def run():
+        async with serve(handler, "127.0.0.1", 0, subprotocols=["prefect"]) as server:
+            state["port"] = server.sockets[0].getsockname()[1]
+            state["stop"] = loop.create_future()
+            ready.set()
+            await state["stop"]
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(run(),))
+    thread.start()
+    ready.wait(5)
+
+    def send(event):
+        loop.call_soon_threadsafe(outgoing.put_nowait, event)
+
+    yield f"http://127.0.0.1:{state['port']}/api", send, received
+    send(None)
+    loop.call_soon_threadsafe(state["stop"].set_result, None)
+    thread.join(5)
+    loop.close()
+
+
+def test_listener_applies_streamed_events(fake_event_server):
+    url, send, received = fake_event_server
+    store = FlowRunEventStore(offset_minutes=3, reconcile_interval=300)
+    listener = FlowRunEventListener(
+        url, store, logging.getLogger("test"), api_auth_string="user:pass"
+    )
+    listener.start()
+    try:
+        assert listener.connected.wait(10)
+        send(_event("run-1", "RUNNING", datetime.now(timezone.utc)))
+        for _ in range(100):
+            if store.events_applied:
+                break
+            threading.Event().wait(0.05)
+    finally:
+        listener.stop(timeout=5)
+
+    assert list(store.runs_by_id) == ["run-1"]
+    assert received[0] == {"type": "auth", "token": "user:pass"}
+    assert received[1]["type"] == "filter"
+    assert received[1]["filter"]["event"]["prefix"] == ["prefect.flow-run."]
+    # Subscribing forces a reconciliation, since events may have been missed before.
+    assert store.needs_reconcile()
+
+
+def test_cloud_listener_authenticates_with_its_workspace_key():
+    store = FlowRunEventStore(offset_minutes=3, reconcile_interval=300)
+    listener = FlowRunEventListener(
+        "https://api.prefect.cloud/api/accounts/a/workspaces/w",
+        store,
+        logging.getLogger("test"),
+        api_key="workspace-key",
+    )
+
+    assert listener._subscriber()._api_key == "workspace-key"
+
+
+@responses.activate
+def test_metrics_poll_flow_runs_only_to_reconcile():
+    url = "http://prefect.test/api"
+    for uri in ("deployments", "flows", "flow_runs", "work_pools", "work_queues"):
+        responses.add(responses.POST, f"{url}/{uri}/filter", json=[])
+    metrics = PrefectMetrics(
+        url=url,
+        headers={"accept": "application/json"},
+        offset_minutes=3,
+        failed_runs_offset_minutes=0,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        enable_event_stream=True,
+    )
+
+    def flow_run_queries():
+        return sum(
+            call.request.url.endswith("/flow_runs/filter") for call in responses.calls
+        )
+
+    list(metrics.collect())
+    reconcile_queries = flow_run_queries()
+    metrics.event_store.apply(_event("run-1", "RUNNING", datetime.now(timezone.utc)))
+    ongoing = [
+        sample.labels["flow_run_id"]
+        for family in metrics.collect()
+        if family.name == "prefect_flow_runs_ongoing_run_time"
+        for sample in family.samples
+    ]
+
+    assert reconcile_queries > 0
+    assert flow_run_queries() == reconcile_queries
+    assert ongoing == ["run-1"]
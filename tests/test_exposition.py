@@ -0,0 +1,120 @@
+"""Tests for serving scrapes from a pre-rendered exposition."""
+
+import gzip
+import logging
+
+import responses
+from prometheus_client import CollectorRegistry
+from prometheus_client.core import GaugeMetricFamily
+
+from metrics.metrics import PrefectMetrics
+from metrics.server import ExpositionCache, cached_exposition_app
+
+URL = "http://prefect.test/api"
+
+
+class _CountingCollector:
+    def __init__(self):
+        self.collects = 0
+
+    def collect(self):
+        self.collects += 1
+        gauge = GaugeMetricFamily("test_value", "Test value", labels=[])
+        gauge.add_metric([], self.collects)
+        yield gauge
+
+
+def _scrape(app, **environ):
+    response = {}
+
+    def start_response(status, headers):
+        response["status"] = status
+        response["headers"] = dict(headers)
+
+    response["body"] = b"".join(app(environ, start_response))
+    return response
+
+
+def _setup(version, max_age=60):
+    registry = CollectorRegistry()
+    collector = _CountingCollector()
+    registry.register(collector)
+    cache = ExpositionCache(registry, version, max_age)
+
+    def fallback(environ, start_response):
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [b"fallback"]
+
+    return collector, cache, cached_exposition_app(fallback, cache)
+
+
+def test_rendering_is_reused_until_the_version_changes():
+    version = [1]
+    collector, cache, app = _setup(lambda: version[0])
+
+    first = _scrape(app)
+    second = _scrape(app, HTTP_ACCEPT_ENCODING="gzip")
+    assert collector.collects == 1
+    assert b"test_value 1.0" in first["body"]
+    assert second["headers"]["Content-Encoding"] == "gzip"
+    assert gzip.decompress(second["body"]) == first["body"]
+    assert second["headers"]["ETag"] == first["headers"]["ETag"]
+
+    not_modified = _scrape(app, HTTP_IF_NONE_MATCH=first["headers"]["ETag"])
+    assert not_modified["status"] == "304 Not Modified"
+    assert not_modified["body"] == b""
+
+    version[0] = 2
+    third = _scrape(app, HTTP_IF_NONE_MATCH=first["headers"]["ETag"])
+    assert third["status"] == "200 OK"
+    assert b"test_value 2.0" in third["body"]
+    assert third["headers"]["ETag"] != first["headers"]["ETag"]
+    assert (cache.renders, cache.hits) == (2, 2)
+
+
+def test_expired_rendering_is_rendered_again():
+    collector, cache, app = _setup(lambda: 1, max_age=0)
+
+    _scrape(app)
+    _scrape(app)
+
+    assert collector.collects == 2
+
+
+def test_uncacheable_scrapes_go_to_the_wrapped_app():
+    collector, cache, app = _setup(lambda: None)
+
+    assert _scrape(app)["body"] == b"fallback"
+    _, _, app = _setup(lambda: 1)
+    assert _scrape(app, QUERY_STRING="name[]=test_value")["body"] == b"fallback"
+    assert collector.collects == 0
+
+
+@responses.activate
+def test_exposition_version_follows_coalesced_collections():
+    for uri in ("deployments", "flows", "flow_runs", "work_pools", "work_queues"):
+        responses.add(responses.POST, f"{URL}/{uri}/filter", json=[])
+    metrics = PrefectMetrics(
+        url=URL,
+        headers={},
+        offset_minutes=3,
+        failed_runs_offset_minutes=60,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        coalesce_window=60,
+    )
+
+    assert metrics.exposition_version() is None
+    list(metrics.collect())
+    version = metrics.exposition_version()
+    assert version is not None
+
+    metrics.single_flight.last = None
+    assert metrics.exposition_version() is None
+    list(metrics.collect())
+    assert metrics.exposition_version() != version
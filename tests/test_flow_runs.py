@@ -9,15 +9,25 @@ silently truncated.
 
 import json
 import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 
+import pytest
 import responses
 
-from metrics.flow_runs import PrefectFlowRuns
+from metrics.flow_runs import FlowRunIndex, PrefectFlowRuns
+from metrics.records import FlowRunRecord
 
 URL = "http://prefect.test/api"
 
 
-def _make(enable_pagination=False, pagination_limit=200):
+def _make(
+    enable_pagination=False,
+    pagination_limit=200,
+    max_concurrency=1,
+    pagination_mode="offset",
+):
     return PrefectFlowRuns(
         url=URL,
         headers={"accept": "application/json"},
@@ -26,6 +36,8 @@ def _make(enable_pagination=False, pagination_limit=200):
         logger=logging.getLogger("test"),
         enable_pagination=enable_pagination,
         pagination_limit=pagination_limit,
+        max_concurrency=max_concurrency,
+        pagination_mode=pagination_mode,
     )
 
 
@@ -144,3 +156,292 @@ def test_pagination_applies_per_state():
 
     failed_ids = {r["id"] for r in result if r["id"].startswith("fail-")}
     assert len(failed_ids) == 5
+
+
+@responses.activate
+def test_concurrent_states_match_serial():
+    """Concurrent per-state queries merge to the same result as the serial path."""
+    shared = _run("shared", "RUNNING")
+    runs_by_state = {
+        "RUNNING": [shared],
+        "COMPLETED": [dict(shared, state_name="Completed")]
+        + [_run(f"done-{i}", "COMPLETED") for i in range(5)],
+        "FAILED": [_run("fail-1", "FAILED")],
+    }
+    _register_by_state(runs_by_state)
+
+    serial = _make(enable_pagination=True, pagination_limit=2).get_flow_runs_info()
+    concurrent = _make(
+        enable_pagination=True, pagination_limit=2, max_concurrency=4
+    ).get_flow_runs_info()
+
+    assert concurrent == serial
+
+
+@responses.activate
+def test_concurrent_states_respect_cap():
+    """No more than max_concurrency state queries are in flight at once."""
+    lock = threading.Lock()
+    in_flight = {"current": 0, "peak": 0}
+
+    def callback(request):
+        with lock:
+            in_flight["current"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["current"])
+        time.sleep(0.02)
+        with lock:
+            in_flight["current"] -= 1
+        return (200, {}, "[]")
+
+    responses.add_callback(
+        responses.POST,
+        f"{URL}/flow_runs/filter",
+        callback=callback,
+        content_type="application/json",
+    )
+
+    _make(max_concurrency=3).get_flow_runs_info()
+
+    assert len(responses.calls) == len(PrefectFlowRuns.STATE_TYPES)
+    assert 1 < in_flight["peak"] <= 3
+
+
+def _register_keyset(runs, on_page=None, nulls_first=False):
+    """Answer flow_runs/filter like Prefect for keyset queries.
+
+    Sorts by expected_start_time, applies the inclusive after_ bound and the
+    id not_any_ exclusion, then takes ``limit`` rows. ``on_page`` runs after
+    each page so a test can mutate ``runs`` between requests.
+    """
+
+    def callback(request):
+        body = json.loads(request.body)
+        assert "offset" not in body
+        assert body["sort"] == "EXPECTED_START_TIME_ASC"
+        filters = body["flow_runs"]
+        after = filters.get("expected_start_time", {}).get("after_")
+        excluded = set(filters.get("id", {}).get("not_any_", []))
+        # A null expected_start_time never satisfies after_, and sorts first
+        # or last depending on the database (SQLite or PostgreSQL).
+        matching = sorted(
+            (
+                run
+                for run in runs
+                if (
+                    after is None
+                    or (
+                        run["expected_start_time"] is not None
+                        and run["expected_start_time"] >= after
+                    )
+                )
+                and run["id"] not in excluded
+            ),
+            key=lambda run: (
+                (run["expected_start_time"] is None) != nulls_first,
+                run["expected_start_time"] or "",
+            ),
+        )
+        page = matching[: body["limit"]]
+        if on_page is not None:
+            on_page()
+        return (200, {}, json.dumps(page))
+
+    responses.add_callback(
+        responses.POST,
+        f"{URL}/flow_runs/filter",
+        callback=callback,
+        content_type="application/json",
+    )
+
+
+def _keyset_run(run_id, minute):
+    return dict(
+        _run(run_id, "COMPLETED"),
+        expected_start_time=f"2026-06-01T10:{minute:02d}:00+00:00",
+    )
+
+
+@responses.activate
+def test_keyset_pagination_returns_every_run_once():
+    """Runs sharing a timestamp across a page boundary are neither skipped nor repeated."""
+    runs = [_keyset_run(f"run-{i}", i // 3) for i in range(10)]
+    _register_keyset(runs)
+
+    api = _make(enable_pagination=True, pagination_limit=2, pagination_mode="keyset")
+    result = api._get_with_pagination(base_data=api._all_flow_runs_filter())
+
+    assert sorted(r["id"] for r in result) == sorted(r["id"] for r in runs)
+
+
+@pytest.mark.parametrize(
+    "nulls_first, returned_nulls",
+    [(True, {"null-0", "null-1", "null-2"}), (False, set())],
+)
+@responses.activate
+def test_keyset_pagination_with_null_expected_start_times(nulls_first, returned_nulls):
+    """Null-keyed runs sorted first span pages like any other; sorted last they are skipped."""
+    runs = [_keyset_run(f"run-{i}", i) for i in range(3)] + [
+        dict(_run(f"null-{i}", "COMPLETED"), expected_start_time=None) for i in range(3)
+    ]
+    _register_keyset(runs, nulls_first=nulls_first)
+
+    api = _make(enable_pagination=True, pagination_limit=2, pagination_mode="keyset")
+    result = api._get_with_pagination(base_data=api._all_flow_runs_filter())
+
+    ids = [r["id"] for r in result]
+    assert len(ids) == len(set(ids))
+    assert set(ids) == {"run-0", "run-1", "run-2"} | returned_nulls
+
+
+@responses.activate
+def test_keyset_pagination_stable_when_rows_shift():
+    """A run inserted ahead of the cursor mid-pagination does not shift later pages."""
+    runs = [_keyset_run(f"run-{i}", 10 + i) for i in range(6)]
+    inserted = []
+
+    def insert_early_run():
+        if not inserted:
+            inserted.append(_keyset_run("early", 0))
+            runs.insert(0, inserted[0])
+
+    _register_keyset(runs, on_page=insert_early_run)
+
+    api = _make(enable_pagination=True, pagination_limit=2, pagination_mode="keyset")
+    result = api._get_with_pagination(base_data=api._all_flow_runs_filter())
+
+    ids = [r["id"] for r in result]
+    assert len(ids) == len(set(ids))
+    assert set(ids) == {f"run-{i}" for i in range(6)}
+
+
+def _register_filtering(runs):
+    """Answer flow_runs/filter by evaluating state and time filters on ``runs``.
+
+    Returns the list of request bodies so a test can inspect the queries.
+    """
+    bodies = []
+
+    def parse(value):
+        return datetime.fromisoformat(value) if value else None
+
+    def matches(run, filters):
+        states = filters.get("state", {}).get("type", {}).get("any_")
+        if states is not None and run["state_name"].upper() not in states:
+            return False
+        for field in ("start_time", "end_time"):
+            after = filters.get(field, {}).get("after_")
+            if after is not None:
+                value = parse(run.get(field))
+                if value is None or value < parse(after):
+                    return False
+        return True
+
+    def callback(request):
+        body = json.loads(request.body)
+        bodies.append(body)
+        page = [run for run in runs if matches(run, body["flow_runs"])]
+        return (200, {}, json.dumps(page))
+
+    responses.add_callback(
+        responses.POST,
+        f"{URL}/flow_runs/filter",
+        callback=callback,
+        content_type="application/json",
+    )
+    return bodies
+
+
+def _timed_run(run_id, state_type, started_ago=None, ended_ago=None):
+    now = datetime.now(timezone.utc)
+    return dict(
+        _run(run_id, state_type),
+        start_time=(
+            (now - timedelta(minutes=started_ago)).isoformat()
+            if started_ago is not None
+            else None
+        ),
+        end_time=(
+            (now - timedelta(minutes=ended_ago)).isoformat()
+            if ended_ago is not None
+            else None
+        ),
+    )
+
+
+@responses.activate
+def test_incremental_sync_fetches_only_changes_after_first_sync():
+    runs = [
+        _timed_run("run-1", "RUNNING", started_ago=1),
+        _timed_run("run-2", "COMPLETED", started_ago=2, ended_ago=1),
+    ]
+    bodies = _register_filtering(runs)
+    api = _make()
+    index = FlowRunIndex(offset_minutes=3, full_sync_every=10)
+
+    first = api.sync_flow_run_index(index)
+    full_sync_queries = len(bodies)
+    assert sorted(r["id"] for r in first["flow_runs"]) == ["run-1", "run-2"]
+    assert [r["id"] for r in first["all_flow_runs"]] == ["run-2"]
+
+    # run-1 finishes between cycles.
+    runs[0] = _timed_run("run-1", "FAILED", started_ago=1, ended_ago=0)
+    watermark = index.watermark_fmt()
+    second = api.sync_flow_run_index(index)
+
+    incremental = bodies[full_sync_queries:]
+    assert len(incremental) == 2 + len(PrefectFlowRuns.NON_TERMINAL_STATE_TYPES)
+    assert incremental[0]["flow_runs"]["start_time"]["after_"] == watermark
+    assert "state" not in incremental[0]["flow_runs"]
+    assert {r["id"]: r["state_name"] for r in second["flow_runs"]} == {
+        "run-1": "Failed",
+        "run-2": "Completed",
+    }
+    assert sorted(r["id"] for r in second["all_flow_runs"]) == ["run-1", "run-2"]
+
+
+@responses.activate
+def test_incremental_sync_expires_runs_outside_window():
+    runs = [_timed_run("old", "COMPLETED", started_ago=2, ended_ago=2)]
+    _register_filtering(runs)
+    api = _make()
+    index = FlowRunIndex(offset_minutes=3, full_sync_every=10)
+    api.sync_flow_run_index(index)
+
+    # Age the indexed run past the 3 minute window without the server changing.
+    index.runs_by_id["old"] = _timed_run("old", "COMPLETED", started_ago=5, ended_ago=5)
+    runs.clear()
+    window = api.sync_flow_run_index(index)
+
+    assert window == {"flow_runs": [], "all_flow_runs": []}
+    assert index.runs_by_id == {}
+
+
+@responses.activate
+def test_incremental_sync_rebuilds_periodically():
+    runs = [_timed_run("run-1", "COMPLETED", started_ago=1, ended_ago=1)]
+    _register_filtering(runs)
+    api = _make()
+    index = FlowRunIndex(offset_minutes=3, full_sync_every=2)
+
+    api.sync_flow_run_index(index)
+    api.sync_flow_run_index(index)
+    api.sync_flow_run_index(index)
+    assert index.needs_full_sync()
+
+    # A run deleted server-side only disappears on the next full sync.
+    runs.clear()
+    window = api.sync_flow_run_index(index)
+    assert window == {"flow_runs": [], "all_flow_runs": []}
+    assert index.syncs_since_full == 0
+
+
+@responses.activate
+def test_flow_runs_projected_onto_compact_records():
+    run = dict(_run("run-1", "FAILED"), parameters={"big": "x" * 1000}, labels={})
+    _register_by_state({"FAILED": [run]})
+
+    result = _make().get_flow_runs_info()
+
+    assert [type(r) for r in result] == [FlowRunRecord]
+    assert "parameters" not in result[0]
+    assert result[0].get("state_name") == "Failed"
@@ -0,0 +1,80 @@
+"""Tests for the single-pass histogram aggregation of flow run run times."""
+
+import logging
+
+from metrics.histograms import HistogramAggregator
+from metrics.metrics import PrefectMetrics
+
+
+def test_buckets_are_cumulative_and_upper_bound_inclusive():
+    aggregator = HistogramAggregator(buckets=[10, 60])
+    for value in (5, 10, 30, 120):
+        aggregator.observe(("dep", "flow"), value)
+
+    family = aggregator.family("h", "help", ["deployment_name", "flow_name"])
+    samples = {
+        (s.name, s.labels.get("le")): s.value
+        for s in family.samples
+        if not s.name.endswith("_created")
+    }
+
+    assert samples == {
+        ("h_bucket", "10.0"): 2,
+        ("h_bucket", "60.0"): 3,
+        ("h_bucket", "+Inf"): 4,
+        ("h_count", None): 4,
+        ("h_sum", None): 165,
+    }
+
+
+def test_histogram_series_scale_with_flows_not_runs():
+    metrics = PrefectMetrics(
+        url="http://prefect.test/api",
+        headers={},
+        offset_minutes=3,
+        failed_runs_offset_minutes=0,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        enable_run_time_histogram=True,
+        run_time_buckets=[60],
+    )
+    flow_runs = [
+        {
+            "id": f"run-{i}",
+            "deployment_id": "dep-1",
+            "flow_id": "flow-1",
+            "total_run_time": i,
+        }
+        for i in range(1000)
+    ] + [
+        {
+            "id": "pending",
+            "deployment_id": "dep-1",
+            "flow_id": "flow-1",
+            "total_run_time": None,
+        }
+    ]
+    resources = {
+        "deployments": [{"id": "dep-1", "name": "my-deployment"}],
+        "flows": [{"id": "flow-1", "name": "my-flow"}],
+        "flow_runs": [],
+        "all_flow_runs": flow_runs,
+        "ongoing_flow_runs": [],
+        "failed_flow_runs": {},
+        "work_pools": [],
+        "work_queues": [],
+    }
+
+    families = {family.name: family for family in metrics._build_metrics(resources)}
+
+    assert "prefect_flow_runs_total_run_time" not in families
+    samples = families["prefect_flow_runs_run_time_seconds"].samples
+    assert len(samples) == 4
+    assert {s.labels["flow_name"] for s in samples} == {"my-flow"}
+    count = next(s for s in samples if s.name.endswith("_count"))
+    assert count.value == 1000
@@ -0,0 +1,143 @@
+"""Tests for the exporter's self-instrumentation of API calls and collection phases."""
+
+import logging
+from unittest.mock import MagicMock
+
+import responses
+
+from metrics.api_metric import PrefectApiMetric
+from metrics.instrumentation import ExporterStats, PrefectExporterMetrics
+from metrics.metrics import PrefectMetrics
+from metrics.work_queues import PrefectWorkQueues
+
+URL = "http://prefect.test/api"
+
+
+def _samples(stats):
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in PrefectExporterMetrics(stats).collect()
+        for sample in family.samples
+    }
+
+
+@responses.activate
+def test_pages_bytes_and_latency_per_endpoint():
+    stats = ExporterStats()
+    api = PrefectApiMetric(
+        url=URL,
+        headers={},
+        max_retries=1,
+        logger=logging.getLogger("test"),
+        enable_pagination=True,
+        pagination_limit=1,
+        uri="flows",
+        stats=stats,
+    )
+    url = f"{URL}/flows/filter"
+    responses.add(responses.POST, url, body='[{"id": "a"}]')
+    responses.add(responses.POST, url, body="[]")
+
+    api._get_with_pagination()
+
+    samples = _samples(stats)
+    endpoint = (("endpoint", "flows/filter"),)
+    assert samples[("prefect_exporter_api_pages_total", endpoint)] == 1
+    assert samples[("prefect_exporter_api_response_bytes_total", endpoint)] == 15
+    assert (
+        samples[("prefect_exporter_api_request_duration_seconds_count", endpoint)] == 2
+    )
+    # No cycle has completed yet.
+    assert not any(name.startswith("prefect_exporter_cycle") for name, _ in samples)
+
+
+@responses.activate
+def test_retries_and_retry_after_aborts(monkeypatch):
+    monkeypatch.setattr("metrics.api_metric.time.sleep", MagicMock())
+    monkeypatch.setattr("metrics.work_queues.time.sleep", MagicMock())
+    stats = ExporterStats()
+    api = PrefectWorkQueues(
+        url=URL,
+        headers={},
+        max_retries=3,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        stats=stats,
+    )
+    responses.add(responses.POST, f"{URL}/work_queues/filter", status=500)
+    responses.add(responses.POST, f"{URL}/work_queues/filter", json=[{"id": "q-1"}])
+    responses.add(
+        responses.GET,
+        f"{URL}/work_queues/q-1/status",
+        status=503,
+        headers={"Retry-After": "60"},
+    )
+
+    api.get_work_queues_info()
+
+    samples = _samples(stats)
+    assert (
+        samples[
+            (
+                "prefect_exporter_api_retries_total",
+                (("endpoint", "work_queues/filter"),),
+            )
+        ]
+        == 1
+    )
+    assert (
+        samples[
+            (
+                "prefect_exporter_api_retry_after_aborts_total",
+                (("endpoint", "work_queues/status"),),
+            )
+        ]
+        == 1
+    )
+
+
+@responses.activate
+def test_collection_records_family_build_and_cycle_times():
+    stats = ExporterStats()
+    metrics = PrefectMetrics(
+        url=URL,
+        headers={},
+        offset_minutes=3,
+        failed_runs_offset_minutes=0,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        stats=stats,
+    )
+    for uri in ("deployments", "flows", "flow_runs", "work_pools", "work_queues"):
+        responses.add(responses.POST, f"{URL}/{uri}/filter", json=[])
+
+    families = [family.name for family in metrics.collect()]
+
+    assert stats.cycle_duration >= stats.fetch_duration > 0
+    assert set(stats.family_build_seconds) == set(families) - {
+        "prefect_exporter_coalesced_scrapes"
+    }
+    samples = _samples(stats)
+    assert (
+        "prefect_exporter_family_build_seconds",
+        (("family", "prefect_flow_runs_total"),),
+    ) in samples
+    assert ("prefect_exporter_cycle_duration_seconds", ()) in samples
+
+
+def test_lock_released_while_families_are_consumed():
+    stats = ExporterStats()
+    stats.observe_request("flows/filter", 0.1, 10)
+    families = PrefectExporterMetrics(stats).collect()
+
+    next(families)
+
+    # A fetch thread can record while the scrape is still being encoded.
+    assert stats.lock.acquire(blocking=False)
+    stats.lock.release()
@@ -0,0 +1,124 @@
+"""Tests for the TTL cache of deployments, flows and work pools."""
+
+import logging
+
+import responses
+
+from metrics.metrics import PrefectMetrics
+
+URL = "http://prefect.test/api"
+
+
+def _make(catalog_ttl):
+    return PrefectMetrics(
+        url=URL,
+        headers={"accept": "application/json"},
+        offset_minutes=3,
+        failed_runs_offset_minutes=0,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        catalog_ttl=catalog_ttl,
+    )
+
+
+def _register_endpoints(flow_runs):
+    for uri in ("flows", "work_pools", "work_queues"):
+        responses.add(responses.POST, f"{URL}/{uri}/filter", json=[])
+    responses.add(
+        responses.POST,
+        f"{URL}/deployments/filter",
+        json=[{"id": "dep-1", "name": "first"}],
+    )
+    responses.add(
+        responses.POST,
+        f"{URL}/flow_runs/filter",
+        json=flow_runs,
+    )
+
+
+def _calls(uri):
+    return sum(call.request.url == f"{URL}/{uri}/filter" for call in responses.calls)
+
+
+def _counters(metrics):
+    return {
+        s.name: s.value
+        for family in metrics.collect()
+        if family.name.startswith("prefect_exporter_catalog_cache")
+        for s in family.samples
+    }
+
+
+@responses.activate
+def test_catalog_served_from_cache_within_ttl():
+    _register_endpoints([])
+    metrics = _make(catalog_ttl=3600)
+
+    list(metrics.collect())
+    counters = _counters(metrics)
+
+    assert _calls("deployments") == 1
+    assert _calls("flows") == 1
+    assert _calls("work_pools") == 1
+    assert _calls("work_queues") == 2
+    assert counters == {
+        "prefect_exporter_catalog_cache_hits_total": 3,
+        "prefect_exporter_catalog_cache_misses_total": 3,
+        "prefect_exporter_catalog_cache_evictions_total": 0,
+    }
+
+
+@responses.activate
+def test_expired_entries_are_evicted_and_refetched():
+    _register_endpoints([])
+    metrics = _make(catalog_ttl=3600)
+    list(metrics.collect())
+
+    metrics.catalog_cache.ttl = 0
+    list(metrics.collect())
+
+    assert _calls("deployments") == 2
+    assert metrics.catalog_cache.evictions == 3
+
+
+@responses.activate
+def test_unknown_deployment_refreshes_cached_list_once():
+    run = {
+        "id": "run-1",
+        "deployment_id": "dep-2",
+        "flow_id": None,
+        "state_name": "Running",
+    }
+    _register_endpoints([])
+    metrics = _make(catalog_ttl=3600)
+    list(metrics.collect())
+
+    # dep-2 is created and starts a run while deployments are cached.
+    responses.replace(
+        responses.POST,
+        f"{URL}/deployments/filter",
+        json=[{"id": "dep-1", "name": "first"}, {"id": "dep-2", "name": "second"}],
+    )
+    responses.replace(responses.POST, f"{URL}/flow_runs/filter", json=[run])
+    names = {
+        s.labels["deployment_name"]
+        for family in metrics.collect()
+        if family.name == "prefect_info_flow_runs"
+        for s in family.samples
+    }
+
+    assert names == {"second"}
+    assert _calls("deployments") == 2
+
+    # A reference that the refresh could not resolve is not retried every cycle.
+    run["deployment_id"] = "deleted"
+    responses.replace(responses.POST, f"{URL}/flow_runs/filter", json=[run])
+    list(metrics.collect())
+    list(metrics.collect())
+
+    assert _calls("deployments") == 3
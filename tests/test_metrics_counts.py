@@ -0,0 +1,74 @@
+"""Tests for *_total metrics computed with server-side /count queries."""
+
+import logging
+
+import responses
+
+from metrics.metrics import PrefectMetrics
+
+URL = "http://prefect.test/api"
+
+
+def _make(enable_count_queries):
+    return PrefectMetrics(
+        url=URL,
+        headers={"accept": "application/json"},
+        offset_minutes=3,
+        failed_runs_offset_minutes=0,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        # A single page of 2: list lengths undercount the real totals.
+        enable_pagination=False,
+        pagination_limit=2,
+        enable_count_queries=enable_count_queries,
+    )
+
+
+def _register_endpoints():
+    two = [{"id": "a", "name": "a"}, {"id": "b", "name": "b"}]
+    for uri in ("deployments", "flows", "flow_runs", "work_pools", "work_queues"):
+        responses.add(responses.POST, f"{URL}/{uri}/filter", json=[])
+    responses.replace(responses.POST, f"{URL}/deployments/filter", json=two)
+    for uri, count in (
+        ("deployments", 500),
+        ("flows", 40),
+        ("flow_runs", 12000),
+        ("work_pools", 3),
+    ):
+        responses.add(responses.POST, f"{URL}/{uri}/count", json=count)
+
+
+def _totals(metrics):
+    return {
+        family.name: family.samples[0].value
+        for family in metrics.collect()
+        if family.name.endswith("_total")
+    }
+
+
+@responses.activate
+def test_totals_use_server_side_counts():
+    _register_endpoints()
+
+    totals = _totals(_make(enable_count_queries=True))
+
+    assert totals == {
+        "prefect_deployments_total": 500,
+        "prefect_flows_total": 40,
+        "prefect_flow_runs_total": 12000,
+        "prefect_work_pools_total": 3,
+        "prefect_work_queues_total": 0,
+    }
+
+
+@responses.activate
+def test_totals_fall_back_to_list_length():
+    _register_endpoints()
+
+    totals = _totals(_make(enable_count_queries=False))
+
+    assert totals["prefect_deployments_total"] == 2
+    assert not any(call.request.url.endswith("/count") for call in responses.calls)
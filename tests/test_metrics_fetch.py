@@ -0,0 +1,100 @@
+"""Tests for the concurrent resource fetch stage of PrefectMetrics."""
+
+import logging
+import threading
+import time
+
+import pytest
+import responses
+
+from metrics.metrics import PrefectMetrics
+
+URL = "http://prefect.test/api"
+
+
+def _make(fetch_concurrency):
+    return PrefectMetrics(
+        url=URL,
+        headers={"accept": "application/json"},
+        offset_minutes=3,
+        failed_runs_offset_minutes=10080,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        fetch_concurrency=fetch_concurrency,
+    )
+
+
+class _InFlight:
+    """Callback factory recording the peak number of concurrent requests."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def callback(self, payload):
+        def _callback(request):
+            with self.lock:
+                self.current += 1
+                self.peak = max(self.peak, self.current)
+            time.sleep(0.02)
+            with self.lock:
+                self.current -= 1
+            return (200, {}, payload)
+
+        return _callback
+
+
+def _register_endpoints(in_flight):
+    for uri, payload in [
+        ("deployments", '[{"id": "dep-1", "name": "d", "flow_id": "flow-1"}]'),
+        ("flows", '[{"id": "flow-1", "name": "f"}]'),
+        ("flow_runs", "[]"),
+        ("work_pools", "[]"),
+        ("work_queues", "[]"),
+    ]:
+        responses.add_callback(
+            responses.POST,
+            f"{URL}/{uri}/filter",
+            callback=in_flight.callback(payload),
+            content_type="application/json",
+        )
+
+
+@pytest.mark.parametrize("fetch_concurrency", [1, 3])
+@responses.activate
+def test_in_flight_requests_bounded(fetch_concurrency):
+    in_flight = _InFlight()
+    _register_endpoints(in_flight)
+
+    _make(fetch_concurrency)._fetch_resources()
+
+    assert in_flight.peak <= fetch_concurrency
+    if fetch_concurrency > 1:
+        assert in_flight.peak > 1
+
+
+@responses.activate
+def test_concurrent_fetch_matches_serial():
+    _register_endpoints(_InFlight())
+
+    serial = _make(1)._fetch_resources()
+    concurrent = _make(4)._fetch_resources()
+
+    assert concurrent == serial
+    assert concurrent["deployments"] == [
+        {"id": "dep-1", "name": "d", "flow_id": "flow-1"}
+    ]
+
+
+def test_fetch_error_propagates():
+    def boom():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        _make(4)._run_fetches({"ok": list, "bad": boom})
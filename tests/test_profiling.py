@@ -0,0 +1,96 @@
+"""Tests for the on-demand collection cycle profiler."""
+
+import logging
+import os
+import threading
+
+import pytest
+import responses
+
+from metrics.metrics import PrefectMetrics
+from metrics import profiling
+from metrics.profiling import CycleProfiler
+
+URL = "http://prefect.test/api"
+
+
+def _make(profiler, fetch_concurrency=1):
+    return PrefectMetrics(
+        url=URL,
+        headers={},
+        offset_minutes=3,
+        failed_runs_offset_minutes=0,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        fetch_concurrency=fetch_concurrency,
+        profiler=profiler,
+    )
+
+
+def _register_endpoints():
+    for uri in ("deployments", "flows", "flow_runs", "work_pools", "work_queues"):
+        responses.add(responses.POST, f"{URL}/{uri}/filter", json=[])
+
+
+@responses.activate
+def test_profiles_only_armed_cycles(tmp_path):
+    _register_endpoints()
+    profiler = CycleProfiler(str(tmp_path), logging.getLogger("test"))
+    metrics = _make(profiler)
+
+    list(metrics.collect())
+    assert os.listdir(tmp_path) == []
+
+    profiler.arm(1)
+    families = list(metrics.collect())
+    list(metrics.collect())
+
+    files = sorted(os.listdir(tmp_path))
+    assert len(files) == 3
+    assert files[0].endswith("-allocations.txt")
+    assert files[1].endswith("-top.txt")
+    assert files[2].endswith(".pstats")
+    assert "by cumulative time" in (tmp_path / files[1]).read_text()
+    assert "peak" in (tmp_path / files[0]).read_text()
+    assert len(families) == 15
+    assert profiler.active is None
+
+
+@responses.activate
+def test_fetch_threads_are_profiled(tmp_path):
+    _register_endpoints()
+    profiler = CycleProfiler(str(tmp_path), logging.getLogger("test"))
+    profiler.arm(1)
+    metrics = _make(profiler, fetch_concurrency=4)
+
+    list(metrics.collect())
+
+    (top,) = [name for name in os.listdir(tmp_path) if name.endswith("-top.txt")]
+    # HTTP calls only happen on the fetch threads.
+    assert "_post_json" in (tmp_path / top).read_text()
+
+
+@pytest.mark.parametrize("sees_all_threads, profiles", [(False, 2), (True, 1)])
+def test_fetch_thread_profilers_only_before_python_3_12(
+    tmp_path, monkeypatch, sees_all_threads, profiles
+):
+    # Python 3.12+ allows one active profiler, which sees every thread.
+    monkeypatch.setattr(profiling, "PROFILER_SEES_ALL_THREADS", sees_all_threads)
+    profiler = CycleProfiler(str(tmp_path), logging.getLogger("test"))
+    profiler.arm(1)
+
+    with profiler.next_cycle() as cycle:
+
+        def fetch():
+            with profiler.thread():
+                sum(range(100))
+
+        fetch_thread = threading.Thread(target=fetch)
+        fetch_thread.start()
+        fetch_thread.join()
+        assert len(cycle.profiles) == profiles
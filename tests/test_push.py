@@ -0,0 +1,263 @@
+"""Tests for pushing metrics to a Pushgateway or remote-write receiver."""
+
+import gzip
+import logging
+import os
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from prometheus_client import CollectorRegistry
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from metrics.push import (
+    PushgatewayPusher,
+    PushLoop,
+    RemoteWritePusher,
+    encode_write_request,
+    parse_push_labels,
+    snappy_compress,
+    snappy_decompress,
+)
+
+LOGGER = logging.getLogger("test")
+
+
+@pytest.fixture
+def receiver():
+    """Local HTTP receiver recording requests and answering with queued statuses."""
+
+    class Receiver(ThreadingHTTPServer):
+        requests = []
+        statuses = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def _receive(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            self.server.requests.append((self.command, self.path, self.headers, body))
+            status = self.server.statuses.pop(0) if self.server.statuses else 200
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        do_PUT = do_POST = _receive
+
+        def log_message(self, format, *args):
+            pass
+
+    server = Receiver(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def _url(receiver):
+    return f"http://127.0.0.1:{receiver.server_port}"
+
+
+def _families():
+    runs = GaugeMetricFamily("prefect_flow_runs", "Runs", labels=["state"])
+    runs.add_metric(["COMPLETED"], 3)
+    runs.add_metric(["FAILED"], 1)
+    retries = CounterMetricFamily("prefect_retries", "Retries", labels=[])
+    retries.add_metric([], 7)
+    return [runs, retries]
+
+
+def _fields(data):
+    """Decode a protobuf message into (field number, value) pairs."""
+    position, fields = 0, []
+
+    def varint():
+        nonlocal position
+        value = shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                return value
+
+    while position < len(data):
+        key = varint()
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            fields.append((number, varint()))
+        elif wire_type == 1:
+            fields.append(
+                (number, struct.unpack("<d", data[position : position + 8])[0])
+            )
+            position += 8
+        else:
+            size = varint()
+            fields.append((number, data[position : position + size]))
+            position += size
+    return fields
+
+
+def _decode_write_request(body):
+    series = []
+    for _, timeseries in _fields(snappy_decompress(body)):
+        labels, samples = {}, []
+        for number, value in _fields(timeseries):
+            if number == 1:
+                name, label_value = (v.decode() for _, v in _fields(value))
+                labels[name] = label_value
+            else:
+                samples.append(dict(_fields(value)))
+        series.append((labels, samples))
+    return series
+
+
+def test_parse_push_labels():
+    assert parse_push_labels(" instance=ci-1, env = dev ,") == {
+        "instance": "ci-1",
+        "env": "dev",
+    }
+    assert parse_push_labels("") == {}
+    with pytest.raises(ValueError):
+        parse_push_labels("instance")
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"", b"a", os.urandom(5000), b"prefect_flow_runs{state=COMPLETED}" * 500],
+)
+def test_snappy_round_trip(data):
+    assert snappy_decompress(snappy_compress(data)) == data
+
+
+def test_snappy_compresses_repetitive_payloads():
+    data = b"".join(b'job="exporter",state="%d"' % (i % 7) for i in range(2000))
+
+    assert len(snappy_compress(data)) < len(data) / 4
+
+
+# Golden bytes checked against reference implementations (python-snappy 0.7.3,
+# protobuf 7.36 with Prometheus' remote.proto types), so encoder and decoder
+# bugs cannot cancel each other out.
+SNAPPY_PAYLOAD = (
+    b'prefect_flow_runs{state="COMPLETED"} 3\nprefect_flow_runs{state="FAILED"} 1\n' * 3
+)
+# snappy.compress(SNAPPY_PAYLOAD)
+SNAPPY_REFERENCE = bytes.fromhex(
+    "e101a0707265666563745f666c6f775f72756e737b73746174653d22434f4d504c45544544"
+    "227d20330a70725a2700104641494c45012404310a622400fe4b00f24b00"
+)
+# snappy_compress(SNAPPY_PAYLOAD), which snappy.decompress() accepts.
+SNAPPY_OURS = bytes.fromhex(
+    "e10198707265666563745f666c6f775f72756e737b73746174653d22434f4d504c45544544"
+    "227d20330a6227000c4641494c1224000031662400fe4b00f29600"
+)
+# WriteRequest.SerializeToString() of WRITE_REQUEST_SERIES at 1760000000123.
+WRITE_REQUEST_SERIES = [
+    (
+        [("__name__", "prefect_flow_runs"), ("job", "exporter"), ("state", "FAILED")],
+        1.5,
+    ),
+    ([("__name__", "prefect_retries_total"), ("job", "exporter")], 7.0),
+]
+WRITE_REQUEST_REFERENCE = bytes.fromhex(
+    "0a530a1d0a085f5f6e616d655f5f1211707265666563745f666c6f775f72756e730a0f0a03"
+    "6a6f6212086578706f727465720a0f0a05737461746512064641494c45441210090000000000"
+    "00f83f10fb80b3c19c330a460a210a085f5f6e616d655f5f1215707265666563745f72657472"
+    "6965735f746f74616c0a0f0a036a6f6212086578706f727465721210090000000000001c4010"
+    "fb80b3c19c33"
+)
+
+
+def test_snappy_matches_the_reference_implementation():
+    assert snappy_decompress(SNAPPY_REFERENCE) == SNAPPY_PAYLOAD
+    assert snappy_compress(SNAPPY_PAYLOAD) == SNAPPY_OURS
+
+
+def test_write_request_matches_the_reference_encoding():
+    encoded = encode_write_request(WRITE_REQUEST_SERIES, 1760000000123)
+
+    assert encoded == WRITE_REQUEST_REFERENCE
+
+
+def test_remote_write_batches_labeled_series(receiver):
+    pusher = RemoteWritePusher(
+        f"{_url(receiver)}/api/v1/write",
+        "exporter",
+        {"instance": "ci-1"},
+        LOGGER,
+        batch_size=2,
+    )
+
+    pusher.push(_families())
+
+    assert len(receiver.requests) == 2
+    series = []
+    for method, path, headers, body in receiver.requests:
+        assert (method, path) == ("POST", "/api/v1/write")
+        assert headers["Content-Encoding"] == "snappy"
+        assert headers["Content-Type"] == "application/x-protobuf"
+        series += _decode_write_request(body)
+    assert [labels for labels, _ in series] == [
+        {
+            "__name__": "prefect_flow_runs",
+            "instance": "ci-1",
+            "job": "exporter",
+            "state": "COMPLETED",
+        },
+        {
+            "__name__": "prefect_flow_runs",
+            "instance": "ci-1",
+            "job": "exporter",
+            "state": "FAILED",
+        },
+        {"__name__": "prefect_retries_total", "instance": "ci-1", "job": "exporter"},
+    ]
+    assert [samples[0][1] for _, samples in series] == [3.0, 1.0, 7.0]
+    assert len({samples[0][2] for _, samples in series}) == 1
+    assert pusher.bytes_sent == sum(len(body) for *_, body in receiver.requests)
+
+
+def test_pushgateway_replaces_the_group(receiver):
+    pusher = PushgatewayPusher(_url(receiver), "exporter", {"instance": "ci/1"}, LOGGER)
+
+    pusher.push(_families())
+
+    [(method, path, headers, body)] = receiver.requests
+    assert method == "PUT"
+    assert path == "/metrics/job/exporter/instance@base64/Y2kvMQ=="
+    assert headers["Content-Encoding"] == "gzip"
+    text = gzip.decompress(body).decode()
+    assert 'prefect_flow_runs{state="FAILED"} 1.0' in text
+    assert "prefect_retries_total 7.0" in text
+
+
+def test_server_errors_are_retried_and_rejections_are_not(receiver, monkeypatch):
+    monkeypatch.setattr("metrics.push.time.sleep", lambda seconds: None)
+    pusher = PushgatewayPusher(_url(receiver), "exporter", {}, LOGGER, max_retries=3)
+
+    receiver.statuses[:] = [503, 429]
+    pusher.push(_families())
+    assert len(receiver.requests) == 3
+
+    receiver.requests.clear()
+    receiver.statuses[:] = [400]
+    with pytest.raises(requests.exceptions.HTTPError):
+        pusher.push(_families())
+    assert len(receiver.requests) == 1
+
+
+def test_push_loop_reports_its_pushes(receiver):
+    registry = CollectorRegistry()
+    pusher = PushgatewayPusher(_url(receiver), "exporter", {}, LOGGER, max_retries=1)
+    loop = PushLoop(registry, pusher, 60, LOGGER)
+    registry.register(loop)
+
+    receiver.statuses[:] = [400]
+    assert not loop.push_once()
+    assert loop.push_once()
+
+    # The second push carries the outcome of the first.
+    text = gzip.decompress(receiver.requests[-1][3]).decode()
+    assert 'prefect_exporter_pushes_total{outcome="failure"} 1.0' in text
+    assert loop.pushes == {"success": 1, "failure": 1}
@@ -0,0 +1,32 @@
+"""Tests for the compact records API items are projected onto."""
+
+import pytest
+
+from metrics.records import FlowRunRecord
+
+
+def test_record_keeps_only_declared_fields():
+    record = FlowRunRecord.from_json(
+        {
+            "id": "run-1",
+            "state_name": "Failed",
+            "parameters": {"x": 1},
+            "empirical_policy": {"retries": 0},
+        }
+    )
+
+    assert record.to_dict() == {"id": "run-1", "state_name": "Failed"}
+    assert not hasattr(record, "__dict__")
+    assert "parameters" not in record
+
+
+def test_record_get_matches_dict_semantics():
+    item = {"id": "run-1", "start_time": None}
+    record = FlowRunRecord.from_json(item)
+
+    for field, default in (("start_time", "null"), ("name", "null"), ("id", None)):
+        assert record.get(field, default) == item.get(field, default)
+    assert record["id"] == "run-1"
+    with pytest.raises(KeyError):
+        record["name"]
+    assert record == item
@@ -0,0 +1,129 @@
+"""Tests for per-group refresh schedules."""
+
+import json
+import logging
+
+import pytest
+import responses
+
+from metrics.metrics import PrefectMetrics
+from metrics.schedule import RefreshSchedule, parse_refresh_schedule
+
+URL = "http://prefect.test/api"
+
+
+def _make(refresh_schedule):
+    return PrefectMetrics(
+        url=URL,
+        headers={"accept": "application/json"},
+        offset_minutes=3,
+        failed_runs_offset_minutes=60,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        refresh_schedule=refresh_schedule,
+    )
+
+
+def _register_endpoints():
+    for uri in ("deployments", "flows", "flow_runs", "work_pools", "work_queues"):
+        responses.add(responses.POST, f"{URL}/{uri}/filter", json=[])
+
+
+def _flow_run_queries():
+    """Flow run filter bodies sent, as "failed", "ongoing" or "recent"."""
+    kinds = []
+    for call in responses.calls:
+        if call.request.url != f"{URL}/flow_runs/filter":
+            continue
+        states = (
+            json.loads(call.request.body)["flow_runs"]
+            .get("state", {})
+            .get("type", {})
+            .get("any_", [])
+        )
+        if states == ["FAILED", "CRASHED"]:
+            kinds.append("failed")
+        elif len(states) == 3:
+            kinds.append("ongoing")
+        else:
+            kinds.append("recent")
+    return kinds
+
+
+def test_parse_refresh_schedule():
+    assert parse_refresh_schedule(" ongoing_runs=15, failed_runs=600 ,") == {
+        "ongoing_runs": 15.0,
+        "failed_runs": 600.0,
+    }
+    assert parse_refresh_schedule("") == {}
+    with pytest.raises(ValueError, match="Unknown refresh group"):
+        parse_refresh_schedule("flow_runs=10")
+
+
+def test_group_is_reused_until_its_interval_elapses():
+    schedule = RefreshSchedule({"catalog": 60})
+
+    assert schedule.lookup(["deployments", "flows", "work_pools"]) == {}
+    schedule.store(
+        {"deployments": [1], "flows": [2], "work_pools": [3]},
+        ["deployments", "flows", "work_pools"],
+    )
+    assert schedule.lookup(["deployments", "flows", "work_pools"]) == {
+        "deployments": [1],
+        "flows": [2],
+    }
+
+    schedule.refreshed_at["catalog"] -= 60
+    assert schedule.lookup(["deployments", "flows"]) == {}
+
+
+def test_group_missing_a_resource_is_refetched():
+    schedule = RefreshSchedule({"catalog": 60})
+    schedule.store({"deployments": [1], "flows": [2]}, ["deployments", "flows"])
+
+    # Count queries were enabled since the last refresh.
+    assert schedule.lookup(["deployments", "flows", "deployments_count"]) == {}
+
+
+def test_partially_fetched_group_is_refetched():
+    schedule = RefreshSchedule({"catalog": 60, "work_pools": 60})
+    names = ["deployments", "flows", "work_pools"]
+    schedule.store({"deployments": [1], "flows": [2], "work_pools": [3]}, names)
+    schedule.refreshed_at["catalog"] -= 60
+    schedule.refreshed_at["work_pools"] -= 60
+
+    # The deadline abandoned the flows fetch: the old flows must not be reused.
+    schedule.store({"deployments": [10], "work_pools": [30]}, names)
+
+    assert schedule.lookup(names) == {"work_pools": [30]}
+
+
+@responses.activate
+def test_only_due_groups_are_fetched():
+    _register_endpoints()
+    metrics = _make({"failed_runs": 600, "catalog": 600})
+
+    list(metrics.collect())
+    first = _flow_run_queries()
+    responses.calls.reset()
+    families = {family.name: family for family in metrics.collect()}
+    second = _flow_run_queries()
+
+    assert first.count("failed") == 1
+    assert second.count("failed") == 0
+    assert second.count("ongoing") == 1
+    assert second.count("recent") == first.count("recent")
+    assert not any(
+        call.request.url.endswith(("/deployments/filter", "/flows/filter"))
+        for call in responses.calls
+    )
+    ages = {
+        sample.labels["group"]
+        for sample in families["prefect_exporter_refresh_group_age_seconds"].samples
+    }
+    assert ages == {"catalog", "failed_runs"}
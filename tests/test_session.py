@@ -0,0 +1,78 @@
+"""Tests for the shared pooled session and its connection reuse metrics."""
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import responses
+
+from metrics.deployments import PrefectDeployments
+from metrics.session import ConnectionStats, PrefectSessionMetrics, build_session
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps([]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api"
+    server.shutdown()
+    server.server_close()
+
+
+def _deployments(url, session):
+    return PrefectDeployments(
+        url,
+        {"accept": "application/json"},
+        1,
+        logging.getLogger("test"),
+        False,
+        200,
+        session=session,
+    )
+
+
+def test_connections_reused_across_collectors(server_url):
+    stats = ConnectionStats()
+    session = build_session(4, stats)
+
+    for _ in range(5):
+        _deployments(server_url, session).get_deployments_info()
+
+    assert stats.requests == 5
+    assert stats.connections_opened == 1
+
+
+@responses.activate
+def test_session_metrics_expose_counts():
+    responses.add(responses.POST, "http://prefect.test/api/deployments/filter", json=[])
+    stats = ConnectionStats()
+    session = build_session(4, stats)
+
+    _deployments("http://prefect.test/api", session).get_deployments_info()
+
+    samples = {
+        s.name: s.value
+        for family in PrefectSessionMetrics(stats).collect()
+        for s in family.samples
+    }
+    assert samples["prefect_exporter_http_requests_total"] == 1
+    assert samples["prefect_exporter_http_connections_opened_total"] == 0
@@ -0,0 +1,137 @@
+"""Tests for splitting collection across sharded exporter replicas."""
+
+import json
+import logging
+
+import pytest
+import responses
+
+from metrics.metrics import PrefectMetrics
+from metrics.sharding import Shard
+
+URL = "http://prefect.test/api"
+DEPLOYMENTS = [
+    {"id": f"dep-{i}", "name": f"deployment-{i}", "flow_id": "flow-1"}
+    for i in range(12)
+]
+WORK_QUEUES = [{"id": f"wq-{i}", "name": f"queue-{i}"} for i in range(12)]
+
+
+def _make(shard):
+    return PrefectMetrics(
+        url=URL,
+        headers={},
+        offset_minutes=3,
+        failed_runs_offset_minutes=0,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        shard=shard,
+    )
+
+
+def _register_endpoints():
+    responses.add(responses.POST, f"{URL}/deployments/filter", json=DEPLOYMENTS)
+    responses.add(
+        responses.POST, f"{URL}/flows/filter", json=[{"id": "flow-1", "name": "f"}]
+    )
+    responses.add(responses.POST, f"{URL}/flow_runs/filter", json=[])
+    responses.add(responses.POST, f"{URL}/flow_runs/count", json=42)
+    responses.add(responses.POST, f"{URL}/work_pools/filter", json=[])
+    responses.add(responses.POST, f"{URL}/work_queues/filter", json=WORK_QUEUES)
+    for queue in WORK_QUEUES:
+        responses.add(responses.GET, f"{URL}/work_queues/{queue['id']}/status", json={})
+
+
+def test_every_key_has_exactly_one_owner():
+    shards = [Shard(index, 3) for index in range(3)]
+    keys = [f"dep-{i}" for i in range(300)]
+
+    owners = [[shard.owns(key) for shard in shards].count(True) for key in keys]
+
+    assert owners == [1] * len(keys)
+    # Each shard gets a reasonable share.
+    assert all(sum(shard.owns(key) for key in keys) > 60 for shard in shards)
+
+
+def test_adding_a_shard_only_moves_keys_to_it():
+    keys = [f"dep-{i}" for i in range(300)]
+    before = {key: Shard(0, 3).owner(key) for key in keys}
+    after = {key: Shard(0, 4).owner(key) for key in keys}
+
+    moved = [key for key in keys if before[key] != after[key]]
+    assert moved
+    assert all(after[key] == 3 for key in moved)
+
+
+def test_invalid_shard_index_is_rejected():
+    with pytest.raises(ValueError):
+        Shard(2, 2)
+
+
+def test_deployment_filter():
+    designated, other = Shard(0, 2), Shard(1, 2)
+    designated.deployment_ids = other.deployment_ids = ["dep-1"]
+
+    assert designated.deployment_filter() == {
+        "operator": "or_",
+        "any_": ["dep-1"],
+        "is_null_": True,
+    }
+    assert designated.deployment_filter(include_adhoc=False) == {"any_": ["dep-1"]}
+    assert other.deployment_filter() == {"any_": ["dep-1"]}
+
+
+def _collect(shard):
+    responses.calls.reset()
+    families = {family.name: family for family in _make(shard).collect()}
+    return families, list(responses.calls)
+
+
+@responses.activate
+def test_shards_split_queries_and_series():
+    _register_endpoints()
+    deployment_names, queue_statuses = [], []
+
+    for index in range(2):
+        shard = Shard(index, 2)
+        families, calls = _collect(shard)
+        owned = sorted(d["id"] for d in DEPLOYMENTS if shard.owns(d["id"]))
+
+        # Flow run queries select the owned deployments' runs.
+        flow_run_filters = [
+            json.loads(call.request.body)["flow_runs"]["deployment_id"]
+            for call in calls
+            if call.request.url.endswith("/flow_runs/filter")
+        ]
+        assert flow_run_filters
+        assert all(f["any_"] == owned for f in flow_run_filters)
+        # Runs without a deployment belong to the designated shard.
+        adhoc = [f.get("is_null_") for f in flow_run_filters]
+        assert adhoc == [True if index == 0 else None] * len(adhoc)
+
+        # Only the owned queues' statuses are fetched.
+        queue_statuses += [
+            call.request.url.split("/")[-2]
+            for call in calls
+            if call.request.url.endswith("/status")
+        ]
+        deployment_names += [
+            sample.labels["deployment_name"]
+            for sample in families["prefect_info_deployment"].samples
+        ]
+
+        # Workspace-wide totals come from the designated shard only.
+        if index == 0:
+            assert families["prefect_deployments_total"].samples[0].value == 12
+            assert families["prefect_flow_runs_total"].samples[0].value == 42
+        else:
+            assert "prefect_deployments_total" not in families
+            assert not any(call.request.url.endswith("/count") for call in calls)
+
+    assert sorted(queue_statuses) == sorted(queue["id"] for queue in WORK_QUEUES)
+    assert sorted(deployment_names) == sorted(d["name"] for d in DEPLOYMENTS)
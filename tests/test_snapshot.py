@@ -0,0 +1,173 @@
+"""Tests for serving PrefectMetrics from a background-refreshed snapshot."""
+
+import logging
+import threading
+import time
+
+import pytest
+import responses
+
+from metrics.metrics import PrefectMetrics
+from metrics.snapshot import SingleFlight, SnapshotRefresher
+
+URL = "http://prefect.test/api"
+
+
+def _make(refresh_interval=60):
+    return PrefectMetrics(
+        url=URL,
+        headers={"accept": "application/json"},
+        offset_minutes=3,
+        failed_runs_offset_minutes=0,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+        refresh_interval=refresh_interval,
+    )
+
+
+def _register_endpoints():
+    responses.add(
+        responses.POST,
+        f"{URL}/deployments/filter",
+        json=[{"id": "dep-1", "name": "my-deployment", "flow_id": "flow-1"}],
+    )
+    responses.add(
+        responses.POST, f"{URL}/flows/filter", json=[{"id": "flow-1", "name": "f"}]
+    )
+    responses.add(responses.POST, f"{URL}/flow_runs/filter", json=[])
+    responses.add(responses.POST, f"{URL}/work_pools/filter", json=[])
+    responses.add(responses.POST, f"{URL}/work_queues/filter", json=[])
+
+
+def _by_name(families):
+    return {f.name: f for f in families}
+
+
+@responses.activate
+def test_collect_serves_snapshot_without_api_calls():
+    _register_endpoints()
+    metrics = _make()
+    metrics.refresher.refresh_once()
+    calls_after_refresh = len(responses.calls)
+
+    families = _by_name(metrics.collect())
+
+    assert len(responses.calls) == calls_after_refresh
+    assert families["prefect_deployments_total"].samples[0].value == 1
+    assert "prefect_exporter_snapshot_age_seconds" in families
+    assert "prefect_exporter_refresh_duration_seconds" in families
+
+
+def test_collect_before_first_refresh_only_reports_exporter_state():
+    families = _by_name(_make().collect())
+
+    assert set(families) == {"prefect_exporter_refresh_failures"}
+
+
+def test_failed_refresh_keeps_previous_snapshot():
+    results = [["first"]]
+
+    def build():
+        if not results:
+            raise RuntimeError("boom")
+        return results.pop()
+
+    refresher = SnapshotRefresher(build, 60, logging.getLogger("test"))
+    first = refresher.refresh_once()
+
+    assert refresher.refresh_once() is None
+    assert refresher.snapshot is first
+    assert refresher.snapshot.families == ("first",)
+    assert refresher.refresh_failures == 1
+
+
+def test_wait_for_snapshot_waits_for_a_successful_refresh():
+    failing = [True]
+
+    def build():
+        if failing[0]:
+            raise RuntimeError("boom")
+        return ["first"]
+
+    refresher = SnapshotRefresher(build, 60, logging.getLogger("test"))
+    refresher.refresh_once()
+    assert not refresher.wait_for_snapshot(0)
+
+    failing[0] = False
+    threading.Timer(0.05, refresher.refresh_once).start()
+    assert refresher.wait_for_snapshot(5)
+    assert refresher.snapshot.families == ("first",)
+
+
+def test_refresh_interval_zero_collects_inline():
+    metrics = _make(refresh_interval=0)
+    assert metrics.refresher is None
+    assert metrics.wait_for_snapshot(0)
+
+
+def test_concurrent_collects_share_one_build():
+    builds = []
+    release = threading.Event()
+
+    def build():
+        builds.append(1)
+        release.wait(5)
+        return ["family"]
+
+    single_flight = SingleFlight(build)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(single_flight.collect()))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    while single_flight.coalesced < 2:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(builds) == 1
+    assert results == [("family",)] * 3
+    # The window is 0, so the next scrape builds again.
+    single_flight.collect()
+    assert len(builds) == 2
+
+
+def test_window_reuses_finished_build_but_not_failures():
+    calls = []
+
+    def build():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return [len(calls)]
+
+    single_flight = SingleFlight(build, window=60)
+
+    with pytest.raises(RuntimeError):
+        single_flight.collect()
+    assert single_flight.collect() == (2,)
+    assert single_flight.collect() == (2,)
+    assert len(calls) == 2
+    assert single_flight.coalesced == 1
+
+
+@responses.activate
+def test_inline_collect_reports_coalesced_scrapes():
+    _register_endpoints()
+    metrics = _make(refresh_interval=0)
+    metrics.single_flight.window = 60
+
+    list(metrics.collect())
+    calls = len(responses.calls)
+    families = _by_name(metrics.collect())
+
+    assert len(responses.calls) == calls
+    assert families["prefect_exporter_coalesced_scrapes"].samples[0].value == 1
@@ -1,13 +1,17 @@
+import json
 import logging
+import re
+import threading
+import time
 import uuid
 from unittest.mock import MagicMock
 
 import responses
 
-from metrics.work_queues import PrefectWorkQueues
+from metrics.work_queues import PrefectWorkQueues, WorkQueueStatusCache
 
 
-def _make():
+def _make(**kwargs):
     return PrefectWorkQueues(
         url="http://prefect.test/api",
         headers={"accept": "application/json"},
@@ -15,6 +19,7 @@ def _make():
         logger=logging.getLogger("test"),
         enable_pagination=True,
         pagination_limit=2,
+        **kwargs,
     )
 
 
@@ -52,3 +57,146 @@ def test_status_500_without_retry_after_still_retries(monkeypatch):
     assert result == {}
     assert len(responses.calls) == 3
     assert sleep_mock.call_count == 2
+
+
+def _register_queues(queue_ids, on_status=None):
+    queues = [
+        {"id": queue_id, "name": queue_id, "work_pool_name": "pool"}
+        for queue_id in queue_ids
+    ]
+    responses.add_callback(
+        responses.POST,
+        "http://prefect.test/api/work_queues/filter",
+        callback=lambda request: (
+            200,
+            {},
+            json.dumps(queues if json.loads(request.body)["offset"] == 0 else []),
+        ),
+        content_type="application/json",
+    )
+
+    def status(request):
+        if on_status is not None:
+            on_status()
+        queue_id = request.url.split("/")[-2]
+        return (200, {}, json.dumps({"healthy": True, "queue": queue_id}))
+
+    responses.add_callback(
+        responses.GET,
+        re.compile(r"http://prefect\.test/api/work_queues/.*/status"),
+        callback=status,
+        content_type="application/json",
+    )
+
+
+def _status_calls():
+    return [
+        call.request.url.split("/")[-2]
+        for call in responses.calls
+        if call.request.method == "GET"
+    ]
+
+
+def _track_in_flight():
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0}
+
+    def on_status():
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        time.sleep(0.05)
+        with lock:
+            in_flight["now"] -= 1
+
+    return in_flight, on_status
+
+
+@responses.activate
+def test_statuses_fetched_concurrently():
+    in_flight, on_status = _track_in_flight()
+    _register_queues([f"wq-{i}" for i in range(6)], on_status=on_status)
+    api = _make(status_concurrency=3)
+
+    result = api.get_work_queues_info()
+
+    assert [q["status_info"]["queue"] for q in result] == [f"wq-{i}" for i in range(6)]
+    assert 1 < in_flight["peak"] <= 3
+
+
+@responses.activate
+def test_status_concurrency_is_not_held_to_fetch_concurrency():
+    in_flight, on_status = _track_in_flight()
+    _register_queues([f"wq-{i}" for i in range(8)], on_status=on_status)
+    # The limiter PrefectMetrics shares across fetches, sized by fetch_concurrency.
+    fetch_concurrency = 2
+    api = _make(
+        limiter=threading.BoundedSemaphore(fetch_concurrency), status_concurrency=6
+    )
+
+    api.get_work_queues_info()
+
+    assert fetch_concurrency < in_flight["peak"] <= 6
+
+
+@responses.activate
+def test_expired_statuses_refreshed_in_rolling_batches():
+    _register_queues([f"wq-{i}" for i in range(5)])
+    cache = WorkQueueStatusCache(ttl=0, batch_size=2)
+    api = _make()
+    api.status_cache = cache
+
+    # First sight fetches every queue, whatever the batch size.
+    api.get_work_queues_info()
+    assert sorted(_status_calls()) == [f"wq-{i}" for i in range(5)]
+
+    responses.calls.reset()
+    result = api.get_work_queues_info()
+    first_batch = _status_calls()
+    responses.calls.reset()
+    api.get_work_queues_info()
+    second_batch = _status_calls()
+
+    assert len(first_batch) == len(second_batch) == 2
+    assert not set(first_batch) & set(second_batch)
+    assert all(q["status_info"] for q in result)
+
+
+@responses.activate
+def test_statuses_reused_within_ttl_and_forgotten_for_deleted_queues():
+    _register_queues(["wq-1", "wq-2"])
+    cache = WorkQueueStatusCache(ttl=3600)
+    api = _make()
+    api.status_cache = cache
+
+    api.get_work_queues_info()
+    api.get_work_queues_info()
+
+    assert sorted(_status_calls()) == ["wq-1", "wq-2"]
+    assert cache.due(["wq-2"]) == []
+    assert list(cache.statuses) == ["wq-2"]
+
+
+def test_failed_refresh_reports_status_unknown():
+    cache = WorkQueueStatusCache()
+    cache.update({"wq-1": {"healthy": True}})
+    cache.update({"wq-1": {}})
+
+    assert cache.get("wq-1") == {}
+    assert cache.get("wq-unknown") == {}
+
+
+def test_failed_refresh_after_ttl_is_retried_first():
+    cache = WorkQueueStatusCache(ttl=60, batch_size=1)
+    cache.update({"wq-1": {"healthy": True}, "wq-2": {"healthy": True}})
+    # wq-1 expired first, wq-2 shortly after.
+    cache.statuses["wq-1"] = ({"healthy": True}, cache.statuses["wq-1"][1] - 120)
+    cache.statuses["wq-2"] = ({"healthy": True}, cache.statuses["wq-2"][1] - 90)
+
+    assert cache.due(["wq-1", "wq-2"]) == ["wq-1"]
+    cache.update({"wq-1": {}})
+
+    # The expired status is not served on account of the failure.
+    assert cache.get("wq-1") == {}
+    assert cache.get("wq-2") == {"healthy": True}
+    assert cache.due(["wq-1", "wq-2"]) == ["wq-1"]
@@ -0,0 +1,161 @@
+"""Tests for collecting several Prefect workspaces from one exporter."""
+
+import logging
+import threading
+
+import pytest
+import responses
+from prometheus_client import CollectorRegistry, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+from metrics.deadline import Deadline, scrape_deadline
+from metrics.metrics import PrefectMetrics
+from metrics.workspaces import MultiWorkspaceCollector, build_headers, load_workspaces
+
+PROD = "http://prod.test/api"
+STAGING = "http://staging.test/api"
+
+
+def _make(url):
+    return PrefectMetrics(
+        url=url,
+        headers=build_headers(),
+        offset_minutes=3,
+        failed_runs_offset_minutes=0,
+        failed_runs_limit=10,
+        max_retries=1,
+        client_id="test-client-id",
+        csrf_enabled=False,
+        logger=logging.getLogger("test"),
+        enable_pagination=False,
+        pagination_limit=200,
+    )
+
+
+def _register_endpoints(url, flow_name):
+    responses.add(
+        responses.POST,
+        f"{url}/flows/filter",
+        json=[{"id": "flow-1", "name": flow_name}],
+    )
+    for uri in ("deployments", "flow_runs", "work_pools", "work_queues"):
+        responses.add(responses.POST, f"{url}/{uri}/filter", json=[])
+
+
+class _Gauge:
+    """Collector yielding one gauge, optionally only once released."""
+
+    def __init__(self, value, release=None):
+        self.value = value
+        self.release = release
+        self.collects = 0
+
+    def collect(self):
+        self.collects += 1
+        if self.release is not None:
+            self.release.wait(5)
+        gauge = GaugeMetricFamily("test_value", "Test value", labels=[])
+        gauge.add_metric([], self.value)
+        yield gauge
+
+
+def test_load_workspaces(tmp_path, monkeypatch):
+    monkeypatch.setenv("STAGING_KEY", "secret")
+    config = tmp_path / "workspaces.yaml"
+    config.write_text(
+        "workspaces:\n"
+        f"  - name: prod\n    url: {PROD}\n    api_auth_string: user:pass\n"
+        f"  - name: staging\n    url: {STAGING}\n    api_key_env: STAGING_KEY\n"
+    )
+
+    prod, staging = load_workspaces(str(config))
+
+    assert (prod.name, prod.url) == ("prod", PROD)
+    assert prod.headers["Authorization"] == "Basic dXNlcjpwYXNz"
+    assert staging.headers["Authorization"] == "Bearer secret"
+    assert (prod.api_auth_string, staging.api_key) == ("user:pass", "secret")
+
+
+def test_load_workspaces_rejects_repeated_names(tmp_path):
+    config = tmp_path / "workspaces.json"
+    config.write_text(
+        '{"workspaces": [{"name": "a", "url": "http://a"}, {"name": "a", "url": "http://b"}]}'
+    )
+
+    with pytest.raises(ValueError, match="listed twice"):
+        load_workspaces(str(config))
+
+
+@responses.activate
+def test_families_are_merged_and_labeled_by_workspace():
+    _register_endpoints(PROD, "etl")
+    _register_endpoints(STAGING, "etl-staging")
+    collector = MultiWorkspaceCollector(
+        {"prod": [_make(PROD)], "staging": [_make(STAGING)]}, logging.getLogger("test")
+    )
+
+    families = list(collector.collect())
+
+    names = [family.name for family in families]
+    assert len(names) == len(set(names))
+    info_flows = {family.name: family for family in families}["prefect_info_flows"]
+    assert sorted(
+        (sample.labels["workspace"], sample.labels["flow_name"])
+        for sample in info_flows.samples
+    ) == [("prod", "etl"), ("staging", "etl-staging")]
+
+    registry = CollectorRegistry()
+    registry.register(collector)
+    exposition = generate_latest(registry).decode()
+    assert exposition.count("# TYPE prefect_info_flows gauge") == 1
+    assert 'prefect_exporter_workspace_up{workspace="staging"} 1.0' in exposition
+    collector.stop()
+
+
+def test_slow_workspace_does_not_delay_the_others():
+    release = threading.Event()
+    collector = MultiWorkspaceCollector(
+        {"fast": [_Gauge(1)], "slow": [_Gauge(2, release)]},
+        logging.getLogger("test"),
+    )
+
+    token = scrape_deadline.set(Deadline(0.2))
+    try:
+        families = {family.name: family for family in collector.collect()}
+    finally:
+        scrape_deadline.reset(token)
+        release.set()
+
+    assert [sample.labels for sample in families["test_value"].samples] == [
+        {"workspace": "fast"}
+    ]
+    up = {
+        sample.labels["workspace"]: sample.value
+        for sample in families["prefect_exporter_workspace_up"].samples
+    }
+    assert up == {"fast": 1, "slow": 0}
+    collector.stop()
+
+
+def test_workspace_still_collecting_is_not_collected_again():
+    release = threading.Event()
+    slow = _Gauge(2, release)
+    collector = MultiWorkspaceCollector(
+        {"fast": [_Gauge(1)], "slow": [slow]},
+        logging.getLogger("test"),
+        timeout=0.2,
+    )
+
+    try:
+        # No scrape deadline: bounded by the collector's timeout instead.
+        list(collector.collect())
+        families = {family.name: family for family in collector.collect()}
+    finally:
+        release.set()
+
+    assert slow.collects == 1
+    assert [sample.labels for sample in families["test_value"].samples] == [
+        {"workspace": "fast"}
+    ]
+    assert collector.up == {"fast": True, "slow": False}
+    collector.stop()